@@ -0,0 +1,42 @@
+"""Масштабирование src.batch.process_statements по числу процессов на наборе синтетических выписок.
+Пул запускается принудительно (min_pool_bytes=0); строка 'авто' - порог POOL_MIN_BYTES по умолчанию.
+Перед замерами выполняется прогрев (импорт pandas и openpyxl), чтобы он не попадал в замер одного процесса.
+Старт пула стоит порядка секунды, поэтому он окупается только на нескольких ядрах и выписках в мегабайты:
+на одном ядре пул всегда медленнее.
+
+Запуск: python -m benchmarks.bench_batch [количество файлов] [строк в файле]"""
+
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.generator import generate_statement
+from src.batch import POOL_MIN_BYTES, process_statements
+
+
+def main(files: int, rows: int) -> None:
+    work_dir = tempfile.mkdtemp()
+    file_names = []
+    for number in range(files):
+        file_name = os.path.join(work_dir, f"account_{number}.xlsx")
+        generate_statement(rows, seed=number).to_excel(file_name, index=False)
+        file_names.append(file_name)
+    size = sum(os.path.getsize(file_name) for file_name in file_names)
+    cores = os.cpu_count() or 1
+    threshold = POOL_MIN_BYTES / 2**20
+    print(f"{files} файлов по {rows} строк, {size / 2**20:.1f} МиБ (порог пула {threshold:.0f} МиБ), ядер: {cores}")
+    process_statements(file_names[:1], processes=1, use_cache=False)
+    runs = [(str(count), count, 0) for count in sorted({1, 2, cores // 2, cores} - {0})]
+    base = None
+    for label, processes, min_pool_bytes in [*runs, ("авто", cores, POOL_MIN_BYTES)]:
+        started = time.perf_counter()
+        process_statements(file_names, processes=processes, use_cache=False, min_pool_bytes=min_pool_bytes)
+        elapsed = time.perf_counter() - started
+        base = base or elapsed
+        throughput = files * rows / elapsed
+        print(f"{label:>4} процессов: {elapsed:8.2f} с, {throughput:>12,.0f} строк/с, x{base / elapsed:.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 16, int(sys.argv[2]) if len(sys.argv) > 2 else 5_000)
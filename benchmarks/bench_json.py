@@ -0,0 +1,56 @@
+"""Сравнение сериализации результатов в JSON: прежний путь (to_dict(orient='records') + json.dumps),
+pandas.DataFrame.to_json и колоночный кодировщик src.json_encoder.
+
+Запуск: python -m benchmarks.bench_json [количество строк]"""
+
+import json
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from benchmarks.generator import generate_statement
+from src.json_encoder import dumps, write_records_json
+from src.transactions import Transactions
+
+
+class Discard:
+    """Приёмник, который выбрасывает записанный текст: измеряется только сериализация."""
+
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+def measure(serialize: Callable[[], Any]) -> str:
+    started = time.perf_counter()
+    serialize()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    try:
+        serialize()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return f"{elapsed:8.3f} с {peak / 2**20:>10.1f} МиБ"
+
+
+def main(rows: int) -> None:
+    statement = generate_statement(rows)
+    compact = Transactions.from_frame(statement).frame
+    cases = {
+        "json, to_dict + json.dump(indent=4)": lambda: json.dump(
+            statement.to_dict(orient="records"), Discard(), ensure_ascii=False, indent=4
+        ),
+        "json, json_encoder(indent=4)": lambda: write_records_json(statement, Discard(), indent=4),
+        "json, json_encoder, Transactions": lambda: write_records_json(compact, Discard(), indent=4),
+        "ndjson, DataFrame.to_json": lambda: statement.to_json(orient="records", lines=True, force_ascii=False),
+        "ndjson, json_encoder": lambda: write_records_json(statement, Discard(), lines=True),
+        "views, топ-5, json.dumps": lambda: json.dumps(statement.iloc[:5].to_dict(orient="records")),
+        "views, топ-5, json_encoder.dumps": lambda: dumps(statement.iloc[:5].to_dict(orient="records")),
+    }
+    for name, serialize in cases.items():
+        print(f"{name:<40} {measure(serialize)}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,53 @@
+"""Сравнение пропускной способности старого (синхронный FileHandler на DEBUG) и нового (очередь + фоновый поток)
+логирования на горячем цикле, имитирующем limit_payment: две записи на вызов.
+На DEBUG очередь не ускоряет вызывающий код: сообщение форматируется в нём же (QueueHandler.prepare), и это
+стоит столько же, сколько запись в файл через кэш страниц ОС. Выигрыш даёт уровень INFO по умолчанию
+(debug-записи отбрасываются до форматирования); очередь лишь уносит запись на диск и ротацию из вызывающего потока.
+
+Запуск: python -m benchmarks.bench_logging [количество вызовов]"""
+
+import logging
+import os
+import sys
+import tempfile
+import time
+from math import floor
+
+from src.logging_setup import flush_logs, get_logger
+
+
+def hot_loop(logger: logging.Logger, calls: int) -> float:
+    start = time.perf_counter()
+    for payment in range(calls):
+        logger.debug("Функция начала свою работу.")
+        floor(-payment / 100) * 100
+        logger.debug("Функция успешно завершила свою работу.")
+    return time.perf_counter() - start
+
+
+def sync_logger(log_file: str) -> logging.Logger:
+    logger = logging.getLogger("bench.sync")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    handler = logging.FileHandler(log_file, mode="w")
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(filename)s - %(funcName)s - %(levelname)s - %(message)s"))
+    logger.addHandler(handler)
+    return logger
+
+
+def main(calls: int) -> None:
+    log_dir = tempfile.mkdtemp()
+    queue_debug = get_logger("bench.queue", os.path.join(log_dir, "queue.log"), "DEBUG")
+    queue_info = get_logger("bench.info", os.path.join(log_dir, "info.log"), "INFO")
+    results = {
+        "sync FileHandler, DEBUG": hot_loop(sync_logger(os.path.join(log_dir, "sync.log")), calls),
+        "queue, DEBUG (caller time)": hot_loop(queue_debug, calls),
+        "queue, INFO (debug skipped)": hot_loop(queue_info, calls),
+    }
+    flush_logs()
+    for name, elapsed in results.items():
+        print(f"{name:<30} {calls / elapsed:>14,.0f} вызовов/с")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,47 @@
+"""Память на выписку в разных представлениях: список словарей (to_dict(orient='records')), DataFrame
+с объектными строковыми колонками (как после pd.read_excel) и компактная src.transactions.Transactions.
+Результат пересчитывается на 1 млн строк.
+
+Запуск: python -m benchmarks.bench_memory [количество строк]"""
+
+import gc
+import sys
+import tracemalloc
+from typing import Any, Callable
+
+from benchmarks.generator import generate_statement
+from src.transactions import Transactions
+
+
+def allocated(build: Callable[[], Any]) -> int:
+    """Возвращает объём памяти, который остаётся занятым построенным объектом (по tracemalloc)."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return current
+
+
+def main(rows: int) -> None:
+    generated = generate_statement(rows)
+    holder = {}
+
+    def read_like_excel() -> None:
+        # Как и после pd.read_excel, у каждой ячейки - своя строка, а не ссылка на общую.
+        holder["frame"] = generated.map(lambda value: value.encode().decode() if isinstance(value, str) else value)
+
+    results = {"DataFrame (object)": allocated(read_like_excel)}
+    statement = holder.pop("frame")
+    results["список словарей"] = allocated(lambda: statement.to_dict(orient="records"))
+    results["Transactions"] = allocated(lambda: Transactions.from_frame(statement))
+    for name, size in results.items():
+        per_million = size * 1_000_000 / rows / 2**20
+        print(f"{name:<20} {size / rows:>8.0f} байт/строку {per_million:>10.0f} МиБ на 1 млн строк")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
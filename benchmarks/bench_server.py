@@ -0,0 +1,110 @@
+"""Нагрузочный тест сервиса src.server против разового запуска скрипта (python -m src.main).
+Сервис держит выписку и индексы в памяти, разовый запуск каждый раз поднимает интерпретатор,
+читает выписку (из колоночного кэша) и строит индексы заново.
+Раздел views не нагружается: он ходит во внешние API курсов валют и акций.
+
+Запуск: python -m benchmarks.bench_server [строк в выписке] [запросов к сервису] [клиентов] [разовых запусков]"""
+
+import http.client
+import itertools
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import List, Sequence, Tuple
+from urllib.parse import urlencode
+
+import numpy as np
+
+from benchmarks.generator import generate_statement
+from config import ROOT_DIR
+from src.server import AnalyticsServer, StatementStore
+
+FILE_NAME = "statement.xlsx"
+QUERIES: List[Tuple[str, dict]] = [
+    ("invest", {"month": "2021-06", "limit": "50"}),
+    ("spent", {"category": "Супермаркеты", "date": "2021-06-30"}),
+    ("invest", {"month": "2019-12", "limit": "100"}),
+    ("spent", {"category": "Фастфуд|Транспорт", "date": "2020-03-15"}),
+]
+
+
+def percentiles(latencies: Sequence[float]) -> str:
+    p50, p99 = np.percentile(np.asarray(latencies) * 1000, [50, 99])
+    return f"p50 {p50:9.2f} мс, p99 {p99:9.2f} мс"
+
+
+def load_server(port: int, requests: int, clients: int) -> Tuple[float, List[float]]:
+    """Клиенты с keep-alive соединениями по кругу отправляют запросы QUERIES; возвращает время и задержки."""
+    latencies: List[float] = []
+    counter = itertools.count()
+    lock = threading.Lock()
+
+    def client() -> None:
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        own: List[float] = []
+        while (number := next(counter)) < requests:
+            endpoint, query = QUERIES[number % len(QUERIES)]
+            started = time.perf_counter()
+            connection.request("GET", f"/{endpoint}?{urlencode({**query, 'file': FILE_NAME})}")
+            response = connection.getresponse()
+            response.read()
+            own.append(time.perf_counter() - started)
+            assert response.status == 200, response.status
+        connection.close()
+        with lock:
+            latencies.extend(own)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, latencies
+
+
+def run_script(file_path: str, runs: int) -> Tuple[float, List[float]]:
+    """Последовательно запускает python -m src.main с теми же запросами; возвращает время и задержки."""
+    latencies = []
+    started = time.perf_counter()
+    for number in range(runs):
+        endpoint, query = QUERIES[number % len(QUERIES)]
+        arguments = [f"--{key}={value}" for key, value in query.items()]
+        run_started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "src.main", endpoint, *arguments, "--file", file_path],
+            cwd=ROOT_DIR,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        latencies.append(time.perf_counter() - run_started)
+    return time.perf_counter() - started, latencies
+
+
+def main(rows: int, requests: int, clients: int, runs: int) -> None:
+    work_dir = tempfile.mkdtemp()
+    file_path = os.path.join(work_dir, FILE_NAME)
+    generate_statement(rows).to_excel(file_path, index=False)
+    server = AnalyticsServer(("127.0.0.1", 0), StatementStore(work_dir))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        started = time.perf_counter()
+        server.store.get(FILE_NAME)
+        print(f"Загрузка выписки в сервис ({rows} строк): {time.perf_counter() - started:.2f} с")
+        elapsed, latencies = load_server(server.server_address[1], requests, clients)
+        print(f"сервис, {clients} клиентов:  {requests / elapsed:>9.1f} запр/с, {percentiles(latencies)}")
+    finally:
+        server.shutdown()
+        server.server_close()
+    elapsed, latencies = run_script(file_path, runs)
+    print(f"разовый скрипт:        {runs / elapsed:>9.1f} запр/с, {percentiles(latencies)}")
+
+
+if __name__ == "__main__":
+    arguments = [int(argument) for argument in sys.argv[1:]]
+    defaults = [50_000, 2_000, 8, 10]
+    main(*(arguments + defaults[len(arguments) :]))
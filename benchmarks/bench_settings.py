@@ -0,0 +1,115 @@
+"""Запросы к API котировок на 1000 вызовов views для многих пользователей за один цикл обновления (кэш пуст).
+Внешние API заменены заглушкой с задержкой, которая считает запросы.
+Режимы: 'по запросу' - каждый views сам получает котировки своего пользователя (общий QuoteCache);
+'с предзагрузкой' - refresh_quotes один раз запрашивает объединение символов всех пользователей, затем views.
+
+Запуск: python -m benchmarks.bench_settings [пользователей] [вызовов views] [потоков]"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from src.settings_registry import settings_registry
+from src.utils import currency_cache, stock_cache
+from src.views import refresh_quotes, views
+
+CURRENCIES = ["USD", "EUR", "CNY", "GBP", "JPY", "CHF", "KZT", "TRY"]
+STOCKS = [f"STOCK{number:02d}" for number in range(30)]
+LATENCY = 0.02
+
+
+class FakeResponse:
+    def __init__(self, body: Dict[str, Any]) -> None:
+        self.body = body
+
+    def json(self) -> Dict[str, Any]:
+        return self.body
+
+
+class FakeUpstream:
+    """Заглушка requests.Session для apilayer и Alpha Vantage: отвечает через LATENCY секунд и считает запросы."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def get(self, url: str, **kwargs: Any) -> FakeResponse:
+        with self._lock:
+            self.calls += 1
+        time.sleep(LATENCY)
+        parsed = urlparse(url)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        if parsed.path.endswith("/latest"):
+            return FakeResponse({"rates": {symbol: 0.01 for symbol in query["symbols"].split(",")}})
+        if parsed.path.endswith("/convert"):
+            return FakeResponse({"result": 100.0})
+        return FakeResponse({"Global Quote": {"05. price": 123.45}})
+
+
+def write_profiles(directory: str, users: int) -> List[str]:
+    generator = random.Random(0)
+    names = []
+    for number in range(users):
+        name = f"user{number:05d}"
+        settings = {
+            "user_currencies": generator.sample(CURRENCIES, generator.randint(1, 3)),
+            "user_stocks": generator.sample(STOCKS, generator.randint(2, 5)),
+        }
+        with open(os.path.join(directory, f"{name}.json"), "w", encoding="utf-8") as file_out:
+            json.dump(settings, file_out)
+        names.append(name)
+    return names
+
+
+def run(names: List[str], requests: int, threads: int, prefetch: bool) -> None:
+    transactions = pd.DataFrame(
+        {"Дата операции": ["01.10.2021 17:53:24"], "Номер карты": ["*7197"], "Сумма операции": [-1.0]}
+    )
+    generator = random.Random(1)
+    order = [generator.choice(names) for _ in range(requests)]
+    for cache in (currency_cache, stock_cache):
+        cache.reset(None)
+    settings_registry.clear()
+    upstream = FakeUpstream()
+    started = time.perf_counter()
+    with patch("src.utils.get_session", return_value=upstream):
+        if prefetch:
+            refresh_quotes(names)
+        prefetch_calls = upstream.calls
+        with ThreadPoolExecutor(threads) as executor:
+            responses = list(
+                executor.map(lambda user: json.loads(views("2024-07-06 10:42:30", transactions, user=user)), order)
+            )
+    elapsed = time.perf_counter() - started
+    failed = sum("sections_status" in response for response in responses)
+    per_thousand = upstream.calls * 1000 / requests
+    mode = "с предзагрузкой" if prefetch else "по запросу"
+    print(
+        f"{mode:<16} запросов к API: {upstream.calls:>5} (из них предзагрузка {prefetch_calls}), "
+        f"на 1000 views: {per_thousand:>7.1f}, ошибок разделов: {failed}, {elapsed:.2f} с"
+    )
+
+
+def main(users: int, requests: int, threads: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        names = write_profiles(directory, users)
+        with patch.object(settings_registry, "settings_dir", directory):
+            for prefetch in (False, True):
+                run(names, requests, threads, prefetch)
+            print(f"Разборов файлов профилей: {settings_registry.loads} на {users} пользователей.")
+
+
+if __name__ == "__main__":
+    arguments = [int(argument) for argument in sys.argv[1:]]
+    defaults = [2_000, 1_000, 8]
+    main(*(arguments + defaults[len(arguments) :]))
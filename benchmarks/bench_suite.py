@@ -0,0 +1,298 @@
+"""Набор бенчмарков публичных функций src.utils, src.services и src.reports на синтетических выписках
+(benchmarks.generator) размером от 10 тыс. до 10 млн строк. Для каждой функции и размера измеряются
+лучшее время из нескольких повторов и пиковое выделение памяти (tracemalloc); индексы src.indexes строятся
+заново в каждом повторе, т.е. меряется холодный вызов. Результаты пишутся в json-базу, а режим --compare
+сравнивает текущий прогон с сохранённой базой и завершается с кодом 1, если регрессия превышает порог.
+
+Не измеряются функции, время которых определяется сетью или окружением, а не данными: currency_rates,
+stock_rates, fetch_concurrently, get_session, load_environment. reading_excel измеряется только на размерах
+не больше EXCEL_MAX_ROWS, потому что запись xlsx для большой выписки занимает минуты.
+
+Запуск:
+    python -m benchmarks.bench_suite --sizes 10k,100k,1M --output benchmarks/baseline.json
+    python -m benchmarks.bench_suite --sizes 10k,100k,1M --compare benchmarks/baseline.json --threshold 0.25"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generator import generate_statement
+from src.reports import (
+    category_spend_series,
+    date_window,
+    filtered_by_category,
+    filtered_by_date,
+    log,
+    spent_by_category,
+    spent_cache,
+)
+from src.result_writer import flush_results
+from src.services import (
+    date_sorting,
+    investment_bank,
+    investment_bank_batch,
+    limit_payment,
+    rounding_deltas,
+    rounding_savings,
+)
+from src.utils import (
+    card_info,
+    greetings,
+    json_loader,
+    reading_excel,
+    top_five_transactions,
+    top_positions,
+    top_transactions,
+)
+
+DEFAULT_SIZES = "10k,100k,1M"
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.25
+# Разница меньше этого порога (секунды) считается шумом таймера и не является регрессией.
+DEFAULT_MIN_SECONDS = 0.005
+EXCEL_MAX_ROWS = 20_000
+SCALAR_CALLS = 10_000
+BENCH_DATE = "2021-12-31"
+BENCH_MONTH = "2021-12"
+
+
+@dataclass
+class Case:
+    """Бенчмарк одной функции: setup готовит аргументы (не входит в замер), call выполняет замеряемый вызов."""
+
+    name: str
+    setup: Callable[["Context"], Tuple]
+    call: Callable[..., Any]
+    max_rows: Optional[int] = None
+
+
+@dataclass
+class Context:
+    """Данные одного размера, общие для всех бенчмарков."""
+
+    rows: int
+    statement: pd.DataFrame
+    work_dir: str
+    excel_path: Optional[str] = None
+
+
+def fresh(statement: pd.DataFrame) -> pd.DataFrame:
+    """Поверхностная копия выписки: данные те же, но индексы src.indexes для неё ещё не построены."""
+    return statement.copy(deep=False)
+
+
+def _excel_path(context: Context) -> str:
+    if context.excel_path is None:
+        context.excel_path = os.path.join(context.work_dir, f"statement_{context.rows}.xlsx")
+        context.statement.to_excel(context.excel_path, index=False)
+    return context.excel_path
+
+
+def _uncached_spent(context: Context) -> Tuple:
+    """Замеряется вычисление, а не попадание в кэш результатов spent_by_category."""
+    spent_cache.clear()
+    return fresh(context.statement), "Супермаркеты", BENCH_DATE
+
+
+def _logged(context: Context) -> Callable[[pd.DataFrame], pd.DataFrame]:
+    path = os.path.join(context.work_dir, "bench_log.ndjson")
+
+    @log(path, fmt="ndjson", rotate=True, keep=1, background=True)
+    def last_month(transactions: pd.DataFrame) -> pd.DataFrame:
+        return date_sorting(BENCH_MONTH, transactions)
+
+    return last_month
+
+
+def _greetings_loop(dates: List[str]) -> None:
+    for date in dates:
+        greetings(date)
+
+
+def _limit_payment_loop(payments: List[float]) -> None:
+    for payment in payments:
+        limit_payment(50, payment)
+
+
+def _log_call(decorated: Callable[[pd.DataFrame], pd.DataFrame], transactions: pd.DataFrame) -> None:
+    decorated(transactions)
+    flush_results()
+
+
+CASES: List[Case] = [
+    Case("utils.greetings", lambda c: (["2024-07-06 10:42:30"] * SCALAR_CALLS,), _greetings_loop),
+    Case("utils.reading_excel", lambda c: (_excel_path(c), False), reading_excel, max_rows=EXCEL_MAX_ROWS),
+    Case("utils.card_info", lambda c: (fresh(c.statement),), card_info),
+    Case(
+        "utils.top_positions",
+        lambda c: (np.abs(c.statement["Сумма операции"].to_numpy(dtype=float)), 5, True),
+        top_positions,
+    ),
+    Case("utils.top_transactions", lambda c: (fresh(c.statement), 100), top_transactions),
+    Case("utils.top_five_transactions", lambda c: (fresh(c.statement),), top_five_transactions),
+    Case("utils.json_loader", lambda c: (), json_loader),
+    Case(
+        "services.limit_payment",
+        lambda c: (c.statement["Сумма операции"].iloc[:SCALAR_CALLS].tolist(),),
+        _limit_payment_loop,
+    ),
+    Case(
+        "services.rounding_savings",
+        lambda c: (50, c.statement["Сумма операции"].to_numpy(dtype=float)),
+        rounding_savings,
+    ),
+    Case(
+        "services.rounding_deltas",
+        lambda c: (50, c.statement["Сумма операции"].to_numpy(dtype=float)),
+        rounding_deltas,
+    ),
+    Case("services.date_sorting", lambda c: (BENCH_MONTH, fresh(c.statement)), date_sorting),
+    Case("services.investment_bank", lambda c: (BENCH_MONTH, fresh(c.statement), 50), investment_bank),
+    Case(
+        "services.investment_bank_batch",
+        lambda c: (fresh(c.statement), (10, 50, 100)),
+        investment_bank_batch,
+    ),
+    Case("reports.log", lambda c: (_logged(c), fresh(c.statement)), _log_call),
+    Case("reports.filtered_by_category", lambda c: ("супер", fresh(c.statement)), filtered_by_category),
+    Case("reports.date_window", lambda c: (BENCH_DATE,), date_window),
+    Case("reports.filtered_by_date", lambda c: (fresh(c.statement), BENCH_DATE), filtered_by_date),
+    Case("reports.spent_by_category", _uncached_spent, getattr(spent_by_category, "__wrapped__")),
+    Case(
+        "reports.category_spend_series",
+        lambda c: (fresh(c.statement), "2021-01-01", BENCH_DATE),
+        category_spend_series,
+    ),
+]
+
+
+def parse_size(text: str) -> int:
+    """Функция переводит размер вида '10k', '1M' или '250000' в число строк."""
+    text = text.strip().lower().replace("_", "")
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    if text and text[-1] in multipliers:
+        return int(float(text[:-1]) * multipliers[text[-1]])
+    return int(text)
+
+
+def measure(case: Case, context: Context, repeat: int) -> Dict[str, Any]:
+    """Функция возвращает лучшее время из repeat повторов и пиковую память отдельного прогона под tracemalloc."""
+    timings = []
+    for _ in range(repeat):
+        args = case.setup(context)
+        started = time.perf_counter()
+        case.call(*args)
+        timings.append(time.perf_counter() - started)
+    args = case.setup(context)
+    tracemalloc.start()
+    try:
+        case.call(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "rows": context.rows,
+        "seconds": min(timings),
+        "median_seconds": float(np.median(timings)),
+        "peak_bytes": peak,
+    }
+
+
+def run_suite(
+    sizes: List[int], repeat: int = DEFAULT_REPEAT, only: Optional[List[str]] = None, seed: int = 0
+) -> Dict[str, Any]:
+    """Функция прогоняет все бенчмарки (или только перечисленные в only) на выписках заданных размеров.
+    Возвращает словарь {'meta': ..., 'results': {'<функция>@<строк>': {...}}}, пригодный для записи в базу."""
+    results: Dict[str, Dict[str, Any]] = {}
+    cases = [case for case in CASES if only is None or case.name in only or case.name.split(".")[-1] in only]
+    with tempfile.TemporaryDirectory() as work_dir:
+        for rows in sizes:
+            context = Context(rows, generate_statement(rows, seed), work_dir)
+            for case in cases:
+                if case.max_rows is not None and rows > case.max_rows:
+                    continue
+                key = f"{case.name}@{rows}"
+                results[key] = measure(case, context, repeat)
+                print(f"{key:<45} {results[key]['seconds']:>10.4f} с {results[key]['peak_bytes'] / 2**20:>10.1f} МиБ")
+    meta = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "seed": seed,
+        "repeat": repeat,
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+    memory_threshold: Optional[float] = None,
+    min_seconds: float = DEFAULT_MIN_SECONDS,
+) -> List[str]:
+    """Функция сравнивает текущий прогон с базой по общим ключам.
+    Возвращает список описаний регрессий: время выросло больше чем в (1 + threshold) раз и больше чем на
+    min_seconds, либо (если задан memory_threshold) пиковая память выросла больше чем в (1 + memory_threshold) раз."""
+    regressions = []
+    for key, result in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            continue
+        ratio = result["seconds"] / base["seconds"] if base["seconds"] else float("inf")
+        if ratio > 1 + threshold and result["seconds"] - base["seconds"] > min_seconds:
+            regressions.append(f"{key}: время {base['seconds']:.4f} -> {result['seconds']:.4f} с (x{ratio:.2f})")
+        if memory_threshold is not None and base["peak_bytes"]:
+            memory_ratio = result["peak_bytes"] / base["peak_bytes"]
+            if memory_ratio > 1 + memory_threshold:
+                regressions.append(
+                    f"{key}: память {base['peak_bytes']} -> {result['peak_bytes']} байт (x{memory_ratio:.2f})"
+                )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="размеры выписок через запятую, например 10k,1M,10M")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", help="имена функций через запятую, например card_info,spent_by_category")
+    parser.add_argument("--output", help="куда записать результаты (json)")
+    parser.add_argument("--compare", help="база для сравнения (json)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="допустимый рост времени")
+    parser.add_argument("--memory-threshold", type=float, help="допустимый рост пиковой памяти")
+    parser.add_argument("--min-seconds", type=float, default=DEFAULT_MIN_SECONDS)
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    only = args.only.split(",") if args.only else None
+    current = run_suite(sizes, args.repeat, only, args.seed)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file_out:
+            json.dump(current, file_out, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file_in:
+            baseline = json.load(file_in)
+        regressions = compare(baseline, current, args.threshold, args.memory_threshold, args.min_seconds)
+        for regression in regressions:
+            print(f"РЕГРЕССИЯ {regression}")
+        if regressions:
+            return 1
+        print("Регрессий нет.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""Генератор синтетических выписок в формате data/operations.xls: те же 15 колонок, номера карт, категории с MCC
+и типичными описаниями, валюты, форматы дат ('%d.%m.%Y %H:%M:%S' и '%d.%m.%Y'), доли пропусков и порядок строк
+(от новых операций к старым). Генерация векторная и детерминированная для заданного seed.
+
+Запуск: python -m benchmarks.generator <количество строк> <файл.csv|.xlsx> [seed]"""
+
+import sys
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = [
+    "Дата операции",
+    "Дата платежа",
+    "Номер карты",
+    "Статус",
+    "Сумма операции",
+    "Валюта операции",
+    "Сумма платежа",
+    "Валюта платежа",
+    "Кэшбэк",
+    "Категория",
+    "MCC",
+    "Описание",
+    "Бонусы (включая кэшбэк)",
+    "Округление на инвесткопилку",
+    "Сумма операции с округлением",
+]
+
+# Категория, MCC (nan - нет кода), описания, медианная сумма (со знаком), вес - по частотам data/operations.xls.
+CATEGORIES: List[Tuple[str, float, List[str], float, int]] = [
+    ("Супермаркеты", 5411.0, ["Колхоз", "Магнит", "SPAR", "Пятёрочка", "Перекрёсток"], -110.83, 2274),
+    ("Фастфуд", 5814.0, ["McDonald's", "Rumyanyj Khleb", "IP Yakubovskaya M. V."], -110.0, 1291),
+    ("Транспорт", 4121.0, ["Яндекс Такси", "Метро Санкт-Петербург", "Стрелка"], -186.0, 383),
+    ("Переводы", 6012.0, ["Перевод на карту", "Перевод Кредитная карта. ТП 10.2 RUR", "Пополнение счета"], -500, 351),
+    ("Ж/д билеты", 4111.0, ["РЖД", "Метро Санкт-Петербург", "Московский метрополитен"], -300.0, 245),
+    ("Различные товары", 5331.0, ["Улыбка радуги", "FGBU Rgb Bufet 1", "Mitrankov M.V."], -130.0, 227),
+    ("Связь", 4814.0, ["МТС", "Devajs Servis.", "REG.RU"], -250.0, 194),
+    ("Пополнения", 6012.0, ["Перевод с карты", "Внесение наличных через банкомат Тинькофф"], 7000.0, 183),
+    ("Аптеки", 5912.0, ["Apteka 7", "Аптека Вита", "Apteka2965 Antares"], -351.0, 152),
+    ("Каршеринг", 7512.0, ["Ситидрайв"], -50.0, 119),
+    ("Рестораны", 5812.0, ['OOO "Nord-S"', "Kebab 24 Mm", "Fethiye Restoran"], -111.0, 117),
+    ("Бонусы", np.nan, ["Вознаграждение за операции покупок", "Проценты на остаток по счету"], 390.0, 103),
+    ("Наличные", 6011.0, ["Снятие в банкомате Сбербанк", "Снятие в банкомате Тинькофф"], -3500.0, 100),
+    ("Дом и ремонт", 5211.0, ["Строитель", "МаксидоМ", "Леруа Мерлен"], -320.0, 99),
+    ("Услуги банка", np.nan, ["Плата за оповещения об операциях", "Плата за обслуживание"], -59.0, 93),
+    ("Топливо", 5541.0, ["Circle K", "AZS 78", "ЛУКОЙЛ"], -149.0, 75),
+    ("Образование", 8220.0, ["СПбПУ", "СКОЛКОВО"], -84.0, 75),
+    ("Одежда и обувь", 5641.0, ["Detki", "WILDBERRIES", "Детки"], -419.0, 65),
+    ("Другое", 4900.0, ["ГУП ВЦКП ЖХ", "Петроэлектросбыт", "Федеральная Налоговая Служба"], -1622.4, 65),
+    ("Сервис", 7221.0, ["Sp_Fotostudiya Mariya", "Fotokopicentr"], -67.5, 58),
+    ("Зарплата", np.nan, ['Пополнение. ООО "ФОРТУНА". Зарплата', 'Пополнение. ООО "ФОРТУНА". Аванс'], 26100.0, 40),
+    ("Авиабилеты", 4511.0, ["Тинькофф Авиа", "Аэрофлот", "Авиакомпания UTair"], -5854.0, 30),
+    ("Медицина", 8043.0, ["Stomatologiya 24", "Счастливый взгляд"], -2999.0, 25),
+    ("Кино", 7832.0, ["Киноход", "Билеты в кино"], -350.0, 20),
+    ("ЖКХ", np.nan, ["ЖКУ Квартира", "Электричество"], -2274.15, 15),
+]
+CARDS = ["*7197", "*4556", "*5091", "*5441", "*1112", "*5507", "*6002"]
+CARD_WEIGHTS = [4834, 1143, 52, 12, 7, 2, 2]
+CURRENCIES = ["RUB", "TRY", "EUR", "CNY", "USD"]
+CURRENCY_WEIGHTS = [6574, 74, 29, 18, 10]
+CURRENCY_RATES = {"RUB": 1.0, "TRY": 7.8, "EUR": 95.0, "CNY": 12.5, "USD": 90.0}
+START = np.datetime64("2018-01-01T00:00:00", "s")
+END = np.datetime64("2021-12-31T23:59:59", "s")
+MISSING_CARD_SHARE = 0.097
+MISSING_CATEGORY_SHARE = 0.006
+FAILED_SHARE = 0.006
+CASHBACK_SHARE = 0.094
+
+
+def _probabilities(weights: List[float]) -> np.ndarray:
+    weights_array = np.asarray(weights, dtype=float)
+    return weights_array / weights_array.sum()
+
+
+def _format_dates(seconds: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Переводит секунды в строки '%d.%m.%Y %H:%M:%S' и '%d.%m.%Y' перестановкой символов ISO-строк numpy."""
+    iso = np.datetime_as_string(seconds, unit="s").astype("<U19")
+    chars = iso.view("<U1").reshape(len(iso), 19)
+    reordered = chars[:, [8, 9, 4, 5, 6, 7, 0, 1, 2, 3, 10, 11, 12, 13, 14, 15, 16, 17, 18]].copy()
+    reordered[:, [2, 5]] = "."
+    reordered[:, 10] = " "
+    date_times = reordered.view("<U19").reshape(len(iso))
+    dates = np.ascontiguousarray(reordered[:, :10]).view("<U10").reshape(len(iso))
+    return date_times.astype(object), dates.astype(object)
+
+
+def generate_statement(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Функция принимает количество строк и seed генератора случайных чисел.
+    Возвращает pd.DataFrame выписки в формате data/operations.xls (колонки и типы как у pd.read_excel),
+    операции отсортированы от новых к старым. Одинаковые rows и seed дают одинаковую выписку."""
+    rng = np.random.default_rng(seed)
+    span = int((END - START).astype(np.int64))
+    seconds = START + np.sort(rng.integers(0, span, rows))[::-1].astype("timedelta64[s]")
+    operation_dates, payment_dates = _format_dates(seconds)
+    payment_dates[rng.random(rows) < 0.0015] = np.nan
+
+    category_codes = rng.choice(len(CATEGORIES), rows, p=_probabilities([item[4] for item in CATEGORIES]))
+    categories = np.array([item[0] for item in CATEGORIES], dtype=object)[category_codes]
+    categories[rng.random(rows) < MISSING_CATEGORY_SHARE] = np.nan
+    mcc = np.array([item[1] for item in CATEGORIES])[category_codes]
+    max_descriptions = max(len(item[2]) for item in CATEGORIES)
+    description_table = np.array(
+        [[item[2][position % len(item[2])] for position in range(max_descriptions)] for item in CATEGORIES],
+        dtype=object,
+    )
+    descriptions = description_table[category_codes, rng.integers(0, max_descriptions, rows)]
+
+    medians = np.array([item[3] for item in CATEGORIES])[category_codes]
+    amounts = np.round(medians * rng.lognormal(0.0, 0.6, rows), 2)
+    currency_codes = rng.choice(len(CURRENCIES), rows, p=_probabilities(CURRENCY_WEIGHTS))
+    currencies = np.array(CURRENCIES, dtype=object)[currency_codes]
+    rates = np.array([CURRENCY_RATES[currency] for currency in CURRENCIES])[currency_codes]
+    operation_amounts = np.round(amounts / rates, 2)
+
+    cards = np.array(CARDS, dtype=object)[rng.choice(len(CARDS), rows, p=_probabilities(CARD_WEIGHTS))]
+    cards[rng.random(rows) < MISSING_CARD_SHARE] = np.nan
+    statuses = np.where(rng.random(rows) < FAILED_SHARE, "FAILED", "OK").astype(object)
+    spending = amounts < 0
+    cashback = np.where(spending & (rng.random(rows) < CASHBACK_SHARE), np.floor(-amounts / 100), np.nan)
+    bonuses = np.where(spending, np.floor(-amounts / 50), 0).astype(np.int64)
+    rounding = np.where(rng.random(rows) < 0.002, rng.integers(1, 50, rows), 0).astype(np.int64)
+
+    return pd.DataFrame(
+        {
+            "Дата операции": operation_dates,
+            "Дата платежа": payment_dates,
+            "Номер карты": cards,
+            "Статус": statuses,
+            "Сумма операции": operation_amounts,
+            "Валюта операции": currencies,
+            "Сумма платежа": amounts,
+            "Валюта платежа": np.full(rows, "RUB", dtype=object),
+            "Кэшбэк": cashback,
+            "Категория": categories,
+            "MCC": mcc,
+            "Описание": descriptions,
+            "Бонусы (включая кэшбэк)": bonuses,
+            "Округление на инвесткопилку": rounding,
+            "Сумма операции с округлением": np.abs(amounts) + rounding,
+        },
+        columns=COLUMNS,
+    )
+
+
+if __name__ == "__main__":
+    statement = generate_statement(int(sys.argv[1]), int(sys.argv[3]) if len(sys.argv) > 3 else 0)
+    if sys.argv[2].endswith(".csv"):
+        statement.to_csv(sys.argv[2], index=False)
+    else:
+        statement.to_excel(sys.argv[2], index=False)
@@ -3,19 +3,35 @@ import os
 # Корневая директория проекта
 ROOT_DIR = os.path.dirname(__file__)
 
-# Директория для логов
+# Директория для логов (создаётся при первой записи в лог)
 LOGS_DIR = os.path.join(ROOT_DIR, "logs")
 
 # Директория для файлов с данными
 DATA_DIR = os.path.join(ROOT_DIR, "data")
 
+# Директория для кэша разобранных выписок (создаётся при первой записи)
+CACHE_DIR = os.path.join(ROOT_DIR, ".cache")
+
+# Директория профилей пользователей (по файлу <пользователь>.json с user_currencies и user_stocks)
+USERS_DIR = os.path.join(ROOT_DIR, "users")
 
-# Создание каталога для логов, если он не существует
-if not os.path.exists(LOGS_DIR):
-    os.makedirs(LOGS_DIR)
 
 UTILS_LOGS = os.path.join(LOGS_DIR, "utils.log")
 SERVICES_LOGS = os.path.join(LOGS_DIR, "services.log")
 REPORTS_LOGS = os.path.join(LOGS_DIR, "reports.log")
 VIEWS_LOGS = os.path.join(LOGS_DIR, "views.log")
+CACHE_LOGS = os.path.join(LOGS_DIR, "cache.log")
+INDEXES_LOGS = os.path.join(LOGS_DIR, "indexes.log")
+QUOTES_LOGS = os.path.join(LOGS_DIR, "quotes.log")
+WRITER_LOGS = os.path.join(LOGS_DIR, "writer.log")
+STREAMING_LOGS = os.path.join(LOGS_DIR, "streaming.log")
+AGGREGATES_LOGS = os.path.join(LOGS_DIR, "aggregates.log")
+BATCH_LOGS = os.path.join(LOGS_DIR, "batch.log")
+TRANSACTIONS_LOGS = os.path.join(LOGS_DIR, "transactions.log")
+SERVER_LOGS = os.path.join(LOGS_DIR, "server.log")
+RESULT_CACHE_LOGS = os.path.join(LOGS_DIR, "result_cache.log")
+SETTINGS_LOGS = os.path.join(LOGS_DIR, "settings.log")
 
+# Файлы экспорта метрик (src.metrics): текстовый формат Prometheus и JSON-снимок
+METRICS_PROM = os.path.join(LOGS_DIR, "metrics.prom")
+METRICS_JSON = os.path.join(LOGS_DIR, "metrics.json")
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set
+
+from config import AGGREGATES_LOGS
+from src.indexes import parse_dates
+from src.lazy import lazy_import
+from src.logging_setup import get_logger
+from src.reports import date_window
+from src.services import rounding_deltas
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+logger = get_logger(__name__, AGGREGATES_LOGS)
+
+DEFAULT_LIMITS = (10, 50, 100)
+STORE_VERSION = 2
+# После стольких записей в журнале он сворачивается в снимок.
+COMPACT_EVERY = 256
+
+
+def to_kopecks(amounts: Any) -> np.ndarray:
+    """Функция переводит суммы в рублях в целые копейки (int64).
+    Суммы в выписке даны с точностью до копейки, поэтому в копейках агрегаты складываются без ошибок округления
+    и не зависят от того, какими порциями пришли транзакции. Пустые суммы (NaN) не принимаются: вызывает ValueError."""
+    values = np.asarray(amounts, dtype=float)
+    if np.isnan(values).any():
+        raise ValueError("В транзакциях есть пустые суммы операций!")
+    return np.rint(values * 100).astype(np.int64)
+
+
+class AggregateStore:
+    """Материализованные агрегаты выписки, которые обновляются только по новым транзакциям:
+    суммы по картам, суммы Инвесткопилки по месяцам для заданных лимитов и траты по (категории, дню).
+    Все суммы хранятся в целых копейках. Состояние хранится в json-снимке path и журнале '<path>.journal':
+    append дописывает в журнал одну строку с агрегатами порции, поэтому запись зависит от размера порции,
+    а не от накопленной истории; каждые COMPACT_EVERY записей журнал сворачивается в снимок (save)."""
+
+    def __init__(self, path: Optional[str] = None, limits: Iterable[int] = DEFAULT_LIMITS) -> None:
+        self.path = path
+        self.limits = sorted(set(limits))
+        self.rows = 0
+        self.batches: Set[str] = set()
+        self.cards: Dict[str, int] = {}
+        self.savings: Dict[str, Dict[str, int]] = {}
+        self.categories: Dict[str, Dict[str, List[int]]] = {}
+        # Номер последней записи журнала, учтённой в состоянии, и число записей в текущем журнале.
+        self.sequence = 0
+        self.journal_entries = 0
+
+    @property
+    def journal_path(self) -> Optional[str]:
+        return None if self.path is None else f"{self.path}.journal"
+
+    def _state(self) -> Dict[str, Any]:
+        return {
+            "version": STORE_VERSION,
+            "limits": self.limits,
+            "sequence": self.sequence,
+            "rows": self.rows,
+            "batches": sorted(self.batches),
+            "cards": self.cards,
+            "savings": self.savings,
+            "categories": self.categories,
+        }
+
+    def _restore(self, data: Dict[str, Any]) -> None:
+        self.sequence = data["sequence"]
+        self.rows = data["rows"]
+        self.batches = set(data["batches"])
+        self.cards = data["cards"]
+        self.savings = data["savings"]
+        self.categories = data["categories"]
+
+    @classmethod
+    def load(cls, path: str, limits: Iterable[int] = DEFAULT_LIMITS) -> "AggregateStore":
+        """Загружает хранилище из снимка и журнала или создаёт пустое, если файлов ещё нет."""
+        store = cls(path, limits)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file_in:
+                data = json.load(file_in)
+            if data.get("version") != STORE_VERSION or data["limits"] != store.limits:
+                logger.warning(f"Хранилище {path} создано с другими параметрами и будет пересчитано заново.")
+                store.save()
+                return store
+            store._restore(data)
+        if store._replay_journal():
+            store.save()
+        return store
+
+    def _replay_journal(self) -> bool:
+        """Применяет к состоянию записи журнала новее снимка. Возвращает True, если журнал нужно переписать:
+        в нём есть оборванная или несовместимая запись."""
+        journal_path = self.journal_path
+        if journal_path is None or not os.path.exists(journal_path):
+            return False
+        with open(journal_path, "r", encoding="utf-8") as file_in:
+            for line in file_in:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Журнал {journal_path} оборван, последняя запись пропущена.")
+                    return True
+                if entry.get("version") != STORE_VERSION or entry["limits"] != self.limits:
+                    logger.warning(f"Журнал {journal_path} создан с другими параметрами и пропущен.")
+                    return True
+                self.journal_entries += 1
+                if entry["sequence"] <= self.sequence:
+                    continue
+                delta = AggregateStore(limits=self.limits)
+                delta._restore(entry)
+                self.merge(delta)
+                self.sequence = entry["sequence"]
+        return False
+
+    def save(self) -> None:
+        """Атомарно записывает полный снимок состояния в файл path и удаляет журнал."""
+        if self.path is None:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as file_out:
+            json.dump(self._state(), file_out, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        # Записи журнала уже в снимке (их номера не больше sequence), поэтому сбой до удаления ничего не удвоит.
+        if self.journal_path is not None and os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self.journal_entries = 0
+
+    def _record(self, delta: "AggregateStore") -> None:
+        """Дописывает агрегаты порции в журнал или, когда журнал достаточно вырос, сворачивает его в снимок."""
+        journal_path = self.journal_path
+        if self.path is None or journal_path is None:
+            return
+        if self.journal_entries + 1 >= COMPACT_EVERY or not os.path.exists(self.path):
+            self.save()
+            return
+        with open(journal_path, "a", encoding="utf-8") as file_out:
+            file_out.write(json.dumps(delta._state(), ensure_ascii=False) + "\n")
+        self.journal_entries += 1
+
+    def append(self, batch: pd.DataFrame, batch_id: Optional[str] = None) -> bool:
+        """Добавляет в агрегаты новую порцию транзакций; стоимость пропорциональна размеру порции.
+        Если batch_id уже встречался, порция пропускается и возвращается False.
+        Порция с пустыми суммами операций не принимается (ValueError), агрегаты при этом не меняются."""
+        if batch_id is not None and batch_id in self.batches:
+            logger.info(f"Порция {batch_id} уже учтена.")
+            return False
+        delta = AggregateStore(limits=self.limits)
+        kopecks = to_kopecks(batch["Сумма операции"])
+        delta._append_cards(batch["Номер карты"], kopecks)
+        dates = parse_dates(batch["Дата операции"])
+        valid = ~np.isnat(dates)
+        delta._append_savings(dates[valid], batch["Сумма операции"].to_numpy(dtype=float)[valid])
+        delta._append_categories(batch["Категория"].to_numpy(dtype=object)[valid], dates[valid], kopecks[valid])
+        delta.rows = len(batch)
+        if batch_id is not None:
+            delta.batches.add(batch_id)
+        self.merge(delta)
+        self.sequence += 1
+        delta.sequence = self.sequence
+        self._record(delta)
+        logger.info(f"Добавлено {len(batch)} транзакций, всего {self.rows}.")
+        return True
+
+    def merge(self, other: "AggregateStore") -> "AggregateStore":
+        """Добавляет к агрегатам агрегаты другого хранилища (с теми же limits), посчитанные по следующим транзакциям.
+        Слияние ассоциативно и даёт то же, что append всех транзакций по порядку; возвращает self."""
+        if other.limits != self.limits:
+            raise ValueError(f"Нельзя объединить хранилища с лимитами {self.limits} и {other.limits}!")
+        for card_num, total in other.cards.items():
+            self.cards[card_num] = self.cards.get(card_num, 0) + total
+        for month, by_limit in other.savings.items():
+            current_by_limit = self.savings.setdefault(month, {})
+            for limit, total in by_limit.items():
+                current_by_limit[limit] = current_by_limit.get(limit, 0) + total
+        for category, by_day in other.categories.items():
+            current_by_day = self.categories.setdefault(category, {})
+            for day, (total, count) in by_day.items():
+                current = current_by_day.setdefault(day, [0, 0])
+                current[0] += total
+                current[1] += count
+        self.rows += other.rows
+        self.batches.update(other.batches)
+        return self
+
+    def _append_cards(self, card_numbers: pd.Series, kopecks: np.ndarray) -> None:
+        totals = pd.Series(kopecks, index=card_numbers.index).groupby(card_numbers, sort=False).sum()
+        for card_num, total in zip(totals.index, totals.tolist()):
+            self.cards[card_num] = self.cards.get(card_num, 0) + total
+
+    def _append_savings(self, dates: np.ndarray, payments: np.ndarray) -> None:
+        months = pd.Series(dates.astype("datetime64[M]").astype(str))
+        for limit in self.limits:
+            deltas = pd.Series(to_kopecks(rounding_deltas(limit, payments))).groupby(months, sort=False).sum()
+            for month, total in zip(deltas.index, deltas.tolist()):
+                by_limit = self.savings.setdefault(month, {})
+                by_limit[str(limit)] = by_limit.get(str(limit), 0) + total
+
+    def _append_categories(self, categories: np.ndarray, dates: np.ndarray, kopecks: np.ndarray) -> None:
+        days = dates.astype("datetime64[D]").astype(str)
+        frame = pd.DataFrame({"category": categories, "day": days, "sum": kopecks}).dropna(subset=["category"])
+        grouped = frame.groupby(["category", "day"], sort=False)["sum"].agg(["sum", "count"])
+        for (category, day), total, count in zip(grouped.index, grouped["sum"].tolist(), grouped["count"].tolist()):
+            by_day = self.categories.setdefault(category, {})
+            current = by_day.setdefault(day, [0, 0])
+            current[0] += total
+            current[1] += count
+
+    def card_info(self) -> List[Dict]:
+        """Возвращает то же, что card_info по всем добавленным транзакциям."""
+        result = []
+        for card_num, kopecks in self.cards.items():
+            total = kopecks / 100
+            result.append(
+                {"last_digits": card_num[1:], "total_spent": round(total, 2), "cashback": round(total / 100, 2)}
+            )
+        return result
+
+    def investment_bank(self, month: str, limit: int) -> str:
+        """Возвращает то же, что investment_bank(month, transactions, limit) по всем добавленным транзакциям.
+        Лимит должен входить в набор limits хранилища."""
+        if limit not in self.limits:
+            raise ValueError(f"Лимит {limit} не входит в материализованные лимиты {self.limits}!")
+        total = self.savings.get(month, {}).get(str(limit), 0)
+        return json.dumps(round(total / 100, 2), ensure_ascii=False)
+
+    def category_spend(self, category: str, date: str = "") -> Dict[str, Any]:
+        """Возвращает сумму и количество операций, которые вернул бы spent_by_category(transactions, category, date):
+        категория ищется как регулярное выражение без учёта регистра, период - 12 недель до даты включительно."""
+        start, end = date_window(date)
+        first_day, last_day = start.date().isoformat(), end.date().isoformat()
+        pattern = re.compile(rf"{category}", flags=re.IGNORECASE)
+        total = count = 0
+        for stored_category, by_day in self.categories.items():
+            if not pattern.search(stored_category):
+                continue
+            for day, (day_total, day_count) in by_day.items():
+                if first_day <= day <= last_day:
+                    total += day_total
+                    count += day_count
+        return {"category": category, "total": round(total / 100, 2), "count": count}
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence, Tuple, cast
+
+from config import BATCH_LOGS, DATA_DIR
+from src.aggregates import DEFAULT_LIMITS, AggregateStore
+from src.lazy import lazy_import
+from src.logging_setup import get_logger
+from src.utils import reading_excel, top_positions
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+logger = get_logger(__name__, BATCH_LOGS)
+
+TOP_N = 5
+# Запуск пула spawn-процессов стоит порядка секунды (каждый процесс заново импортирует pandas), поэтому выписки
+# меньшего суммарного размера (байт) обрабатываются в родительском процессе.
+POOL_MIN_BYTES = 4 * 2**20
+
+
+class PartialAggregates:
+    """Частичные агрегаты по одной или нескольким выпискам: суммы по картам, Инвесткопилка по месяцам,
+    траты по (категории, дню) - в AggregateStore, и кандидаты в топ-N транзакций по модулю суммы.
+    Кандидат хранится как (модуль суммы, номер файла, номер строки, транзакция), поэтому после слияния
+    равенства разрешаются так же, как top_transactions на склеенной по порядку файлов выписке."""
+
+    def __init__(self, limits: Iterable[int] = DEFAULT_LIMITS, top_n: int = TOP_N) -> None:
+        self.store = AggregateStore(limits=limits)
+        self.top_n = top_n
+        self.top: List[Tuple[float, int, int, Dict[str, Any]]] = []
+
+    @classmethod
+    def from_statement(
+        cls,
+        transactions: pd.DataFrame,
+        file_number: int = 0,
+        limits: Iterable[int] = DEFAULT_LIMITS,
+        top_n: int = TOP_N,
+    ) -> "PartialAggregates":
+        """Считает частичные агрегаты по одной выписке с порядковым номером file_number."""
+        partial = cls(limits, top_n)
+        partial.store.append(transactions)
+        if top_n <= 0:
+            return partial
+        values = np.abs(transactions["Сумма операции"].to_numpy(dtype=float))
+        positions = top_positions(values, top_n, largest=True)
+        records = cast(List[Dict[str, Any]], transactions.iloc[positions].to_dict(orient="records"))
+        partial.top = [
+            (float(values[position]), file_number, int(position), record)
+            for position, record in zip(positions, records)
+        ]
+        return partial
+
+    def merge(self, other: "PartialAggregates") -> "PartialAggregates":
+        """Добавляет агрегаты выписок, идущих после уже учтённых; слияние ассоциативно. Возвращает self."""
+        self.store.merge(other.store)
+        candidates = sorted(self.top + other.top, key=lambda candidate: candidate[:3])
+        self.top = candidates[-self.top_n :] if self.top_n > 0 else []
+        return self
+
+    @property
+    def rows(self) -> int:
+        return self.store.rows
+
+    def card_info(self) -> List[Dict]:
+        """Возвращает то же, что card_info по всем выпискам."""
+        return self.store.card_info()
+
+    def top_transactions(self) -> List[Dict]:
+        """Возвращает то же, что top_transactions(..., top_n) по всем выпискам."""
+        return [candidate[3] for candidate in self.top]
+
+    def investment_bank(self, month: str, limit: int) -> str:
+        """Возвращает то же, что investment_bank(month, ..., limit) по всем выпискам."""
+        return self.store.investment_bank(month, limit)
+
+    def category_spend(self, category: str, date: str = "") -> Dict[str, Any]:
+        """Возвращает сумму и количество операций, которые вернул бы spent_by_category по всем выпискам."""
+        return self.store.category_spend(category, date)
+
+
+def statement_partial(
+    file_name: str, file_number: int, limits: Sequence[int], top_n: int, use_cache: bool
+) -> PartialAggregates:
+    """Функция рабочего процесса: читает выписку и считает по ней частичные агрегаты."""
+    transactions = reading_excel(file_name, use_cache=use_cache)
+    partial = PartialAggregates.from_statement(transactions, file_number, limits, top_n)
+    logger.info(f"Выписка {file_name}: {len(transactions)} транзакций.")
+    return partial
+
+
+def _total_size(file_names: Sequence[str]) -> int:
+    total = 0
+    for file_name in file_names:
+        try:
+            total += os.path.getsize(os.path.join(DATA_DIR, file_name))
+        except OSError:
+            pass
+    return total
+
+
+def process_statements(
+    file_names: Sequence[str],
+    processes: Optional[int] = None,
+    limits: Iterable[int] = DEFAULT_LIMITS,
+    top_n: int = TOP_N,
+    use_cache: bool = True,
+    min_pool_bytes: int = POOL_MIN_BYTES,
+) -> PartialAggregates:
+    """Функция принимает названия файлов выписок (xls/xlsx, в каталоге data или полные пути),
+    число процессов (по умолчанию - число ядер), лимиты Инвесткопилки, размер топа, флаг кэша reading_excel
+    и порог суммарного размера файлов для пула процессов.
+    Выписки разбираются и агрегируются в пуле процессов, частичные агрегаты объединяются в родительском процессе
+    в порядке файлов. Если файлы вместе меньше min_pool_bytes, пул не запускается: его старт дороже разбора.
+    Результат совпадает с агрегатами однопроцессного прогона (processes=1) и с результатами
+    card_info, top_transactions, investment_bank и spent_by_category на склеенной по порядку выписке."""
+    limits = sorted(set(limits))
+    processes = processes or os.cpu_count() or 1
+    processes = max(1, min(processes, len(file_names)))
+    if processes > 1 and _total_size(file_names) < min_pool_bytes:
+        processes = 1
+    logger.info(f"Обработка {len(file_names)} выписок в {processes} процессах.")
+    count = len(file_names)
+    arguments = (file_names, range(count), [limits] * count, [top_n] * count, [use_cache] * count)
+    if processes == 1:
+        partials: Iterable[PartialAggregates] = map(statement_partial, *arguments)
+        return _merge_all(partials, limits, top_n)
+    # fork небезопасен: в родительском процессе уже работают фоновые потоки логов и записи результатов.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context) as executor:
+        return _merge_all(executor.map(statement_partial, *arguments), limits, top_n)
+
+
+def _merge_all(partials: Iterable[PartialAggregates], limits: Sequence[int], top_n: int) -> PartialAggregates:
+    result = PartialAggregates(limits, top_n)
+    for partial in partials:
+        result.merge(partial)
+    logger.info(f"Всего обработано {result.rows} транзакций.")
+    return result
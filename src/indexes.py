@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import weakref
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Tuple, TypeVar, cast
+
+from config import INDEXES_LOGS
+from src.lazy import lazy_import
+from src.logging_setup import get_logger
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+logger = get_logger(__name__, INDEXES_LOGS)
+
+DATE_COLUMN = "Дата операции"
+CATEGORY_COLUMN = "Категория"
+DATE_FORMAT = "%d.%m.%Y %H:%M:%S"
+
+T = TypeVar("T")
+
+_index_registry: Dict[Tuple[int, str], Tuple[Any, Any]] = {}
+_frozen: Dict[int, Any] = {}
+
+
+def freeze(transactions_df: pd.DataFrame) -> pd.DataFrame:
+    """Функция отмечает DataFrame как принадлежащий библиотеке: такой DataFrame больше не меняется на месте,
+    поэтому индексы для него строятся один раз (см. cached_index). Возвращает тот же DataFrame.
+    Отмечаются DataFrame, которые библиотека создаёт сама (reading_excel, выписки StatementStore, Transactions)."""
+    key = id(transactions_df)
+    _frozen[key] = weakref.ref(transactions_df, lambda _: _frozen.pop(key, None))
+    return transactions_df
+
+
+def is_frozen(transactions_df: pd.DataFrame) -> bool:
+    """Функция проверяет, отмечен ли DataFrame через freeze."""
+    ref = _frozen.get(id(transactions_df))
+    return ref is not None and ref() is transactions_df
+
+
+def cached_index(transactions_df: pd.DataFrame, name: str, builder: Callable[[pd.DataFrame], T]) -> T:
+    """Функция возвращает индекс name для DataFrame, построенный через builder.
+    Для DataFrame, отмеченного freeze, индекс строится при первом обращении и живёт, пока жив DataFrame.
+    Остальные DataFrame вызывающий код может изменить на месте, поэтому для них индекс строится при каждом
+    обращении."""
+    if not is_frozen(transactions_df):
+        return builder(transactions_df)
+    key = (id(transactions_df), name)
+    entry = _index_registry.get(key)
+    if entry is not None and entry[0]() is transactions_df:
+        return cast(T, entry[1])
+    logger.info(f"Строится индекс {name} по {len(transactions_df)} строкам.")
+    index = builder(transactions_df)
+    ref = weakref.ref(transactions_df, lambda _: _index_registry.pop(key, None))
+    _index_registry[key] = (ref, index)
+    return index
+
+
+def parse_dates(values: Any) -> np.ndarray:
+    """Функция векторно разбирает строки 'Дата операции' (формат '%d.%m.%Y %H:%M:%S').
+    Возвращает массив datetime64[ns], нераспознанные значения превращаются в NaT.
+    Для pd.Categorical разбираются только уникальные значения."""
+    if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+        lookup = np.append(parse_dates(values.cat.categories.to_numpy(dtype=object)), np.datetime64("NaT", "ns"))
+        return np.asarray(lookup[values.cat.codes.to_numpy()])
+    return pd.to_datetime(pd.Series(values, dtype=object), format=DATE_FORMAT, errors="coerce").to_numpy()
+
+
+def operation_dates(transactions_df: pd.DataFrame) -> np.ndarray:
+    """Функция возвращает разобранную один раз колонку 'Дата операции' DataFrame (datetime64[ns])."""
+    return cached_index(transactions_df, "dates", lambda df: parse_dates(df[DATE_COLUMN]))
+
+
+class MonthIndex:
+    """Индекс транзакций по месяцам: позиции строк отсортированы по (год, месяц),
+    для каждого месяца хранится диапазон [start, stop) в массиве позиций."""
+
+    def __init__(self, dates: np.ndarray) -> None:
+        valid = np.flatnonzero(~np.isnat(dates))
+        month_keys = dates[valid].astype("datetime64[M]").astype(np.int64)
+        order = np.argsort(month_keys, kind="stable")
+        self.positions = valid[order]
+        sorted_keys = month_keys[order]
+        starts = np.empty(0, dtype=np.intp)
+        if len(sorted_keys):
+            starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        bounds = list(starts) + [len(sorted_keys)]
+        self.buckets: Dict[int, Tuple[int, int]] = {
+            int(sorted_keys[start]): (int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:])
+        }
+
+    @staticmethod
+    def month_key(year: int, month: int) -> int:
+        """Ключ месяца: число месяцев от января 1970 года."""
+        return (year - 1970) * 12 + month - 1
+
+    def lookup(self, year: int, month: int) -> np.ndarray:
+        """Возвращает позиции строк за указанный месяц в исходном порядке."""
+        start, stop = self.buckets.get(self.month_key(year, month), (0, 0))
+        return self.positions[start:stop]
+
+
+def month_index(transactions_df: pd.DataFrame) -> MonthIndex:
+    """Функция возвращает индекс по месяцам для DataFrame (строится один раз на DataFrame)."""
+    return cached_index(transactions_df, "months", lambda df: MonthIndex(operation_dates(df)))
+
+
+class TimeIndex:
+    """Индекс транзакций по времени операции: отсортированные метки времени и соответствующие позиции строк.
+    Запрос окна [start, end] - два бинарных поиска и k позиций окна: O(log n + k), если выписка упорядочена
+    по времени (в любую сторону, как выгрузка банка), иначе позиции окна досортировываются - O(log n + k log k)."""
+
+    def __init__(self, dates: np.ndarray) -> None:
+        valid = np.flatnonzero(~np.isnat(dates))
+        if len(valid) > 1 and np.all(dates[valid][1:] <= dates[valid][:-1]):
+            # Выписка по убыванию времени: при равном времени позиции тоже идут по убыванию.
+            valid = valid[::-1]
+        order = np.argsort(dates[valid], kind="stable")
+        self.positions = valid[order]
+        self.timestamps = dates[valid][order]
+        steps = np.diff(self.positions)
+        # Порядок позиций строк внутри любого окна: 1 - уже исходный, -1 - обратный, 0 - нужна сортировка.
+        self.direction = 1 if np.all(steps > 0) else -1 if np.all(steps < 0) else 0
+
+    def window(self, start: Any, end: Any) -> np.ndarray:
+        """Возвращает позиции строк с временем операции в [start, end] (обе границы включены)
+        в исходном порядке строк."""
+        left = np.searchsorted(self.timestamps, np.datetime64(start, "ns"), side="left")
+        right = np.searchsorted(self.timestamps, np.datetime64(end, "ns"), side="right")
+        positions = self.positions[left:right]
+        if self.direction == 1:
+            return positions
+        if self.direction == -1:
+            return positions[::-1]
+        return np.sort(positions)
+
+
+def time_index(transactions_df: pd.DataFrame) -> TimeIndex:
+    """Функция возвращает индекс по времени операции для DataFrame (строится один раз на DataFrame)."""
+    return cached_index(transactions_df, "time", lambda df: TimeIndex(operation_dates(df)))
+
+
+class CategoryIndex:
+    """Словарное кодирование колонки 'Категория' с инвертированным индексом код -> позиции строк.
+    Пустые категории получают код -1 и ни в один поиск не попадают."""
+
+    def __init__(self, categories: Iterable[Any]) -> None:
+        if isinstance(categories, pd.Series) and isinstance(categories.dtype, pd.CategoricalDtype):
+            codes, uniques = categories.cat.codes.to_numpy().astype(np.intp), categories.cat.categories
+        else:
+            codes, uniques = pd.factorize(pd.Series(categories, dtype=object), use_na_sentinel=True)
+        self.codes = codes
+        self.categories: List[str] = [str(category) for category in uniques]
+        self.code_by_category = {category: code for code, category in enumerate(self.categories)}
+        self.codes_by_folded: Dict[str, List[int]] = {}
+        for code, category in enumerate(self.categories):
+            self.codes_by_folded.setdefault(category.casefold(), []).append(code)
+        order = np.argsort(codes, kind="stable")
+        sorted_codes = codes[order]
+        bounds = np.searchsorted(sorted_codes, np.arange(len(self.categories) + 1), side="left")
+        self.positions = order
+        self.bounds = bounds
+
+    def rows(self, codes: Iterable[int]) -> np.ndarray:
+        """Возвращает позиции строк с любым из переданных кодов в исходном порядке."""
+        parts = [self.positions[self.bounds[code] : self.bounds[code + 1]] for code in codes]
+        if not parts:
+            return np.array([], dtype=np.intp)
+        return np.sort(np.concatenate(parts)) if len(parts) > 1 else parts[0]
+
+    def exact(self, category: str, ignore_case: bool = False) -> List[int]:
+        """Возвращает коды категорий, совпадающих с category целиком (с учётом или без учёта регистра)."""
+        if ignore_case:
+            return list(self.codes_by_folded.get(category.casefold(), []))
+        code = self.code_by_category.get(category)
+        return [] if code is None else [code]
+
+    def search(self, pattern: str, regex: bool = True) -> List[int]:
+        """Возвращает коды категорий, в которых без учёта регистра находится pattern
+        (регулярное выражение или, при regex=False, обычная подстрока).
+        Выражение проверяется один раз на каждую уникальную категорию."""
+        compiled = re.compile(pattern if regex else re.escape(pattern), flags=re.IGNORECASE)
+        return [code for code, category in enumerate(self.categories) if compiled.search(category)]
+
+
+def category_index(transactions_df: pd.DataFrame) -> CategoryIndex:
+    """Функция возвращает индекс по колонке 'Категория' для DataFrame (строится один раз на DataFrame)."""
+    return cached_index(transactions_df, "categories", lambda df: CategoryIndex(df[CATEGORY_COLUMN]))
+
+
+def _fingerprint(transactions_df: pd.DataFrame) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(list(transactions_df.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(transactions_df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def dataset_fingerprint(transactions_df: pd.DataFrame) -> str:
+    """Функция возвращает отпечаток содержимого DataFrame (хэш колонок и значений всех строк);
+    у перечитанной без изменений выписки он тот же. Для DataFrame, отмеченного freeze, отпечаток считается
+    один раз, для остальных - при каждом вызове, поэтому изменения на месте сразу меняют отпечаток."""
+    return cached_index(transactions_df, "fingerprint", _fingerprint)
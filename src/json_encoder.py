@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import datetime
+import json
+from typing import IO, TYPE_CHECKING, Any, Iterator, List, Optional
+
+from src.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+CHUNK_SIZE = 10_000
+NULL = "null"
+
+
+def _encode_string(value: str) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def encode_value(value: Any) -> str:
+    """Функция возвращает JSON-текст одного значения. В отличие от json.dumps, NaN, бесконечности, None и NaT
+    записываются как null, numpy-числа - как обычные числа, даты - строками '%Y-%m-%d %H:%M:%S'."""
+    if value is None or value is pd.NaT:
+        return NULL
+    if isinstance(value, str):
+        return _encode_string(value)
+    if isinstance(value, (bool, np.bool_)):
+        return "true" if value else "false"
+    if isinstance(value, (int, np.integer)):
+        return str(int(value))
+    if isinstance(value, (float, np.floating)):
+        return float.__repr__(float(value)) if np.isfinite(value) else NULL
+    if isinstance(value, (datetime.datetime, np.datetime64)):
+        timestamp = pd.Timestamp(value)
+        return NULL if pd.isna(timestamp) else _encode_string(timestamp.strftime("%Y-%m-%d %H:%M:%S"))
+    if isinstance(value, datetime.date):
+        return _encode_string(value.isoformat())
+    if isinstance(value, pd.DataFrame):
+        return "".join(iter_records_json(value))
+    if isinstance(value, dict):
+        items = (f"{_encode_string(str(key))}: {encode_value(item)}" for key, item in value.items())
+        return "{" + ", ".join(items) + "}"
+    if isinstance(value, (list, tuple, np.ndarray, pd.Series)):
+        return "[" + ", ".join(encode_value(item) for item in value) + "]"
+    return _encode_string(str(value))
+
+
+def dumps(value: Any) -> str:
+    """Функция сериализует значение (словари, списки, DataFrame, числа, строки) в JSON-строку в формате
+    json.dumps(value, ensure_ascii=False), но всегда валидную: NaN и NaT становятся null.
+    DataFrame кодируется по колонкам, без промежуточных словарей-записей."""
+    return encode_value(value)
+
+
+def _lookup(uniques: Any) -> np.ndarray:
+    """Массив JSON-текстов уникальных значений; последний элемент (код -1) - null."""
+    lookup = np.empty(len(uniques) + 1, dtype=object)
+    lookup[:-1] = [encode_value(unique) for unique in uniques]
+    lookup[-1] = NULL
+    return lookup
+
+
+def encode_column(column: pd.Series) -> np.ndarray:
+    """Функция возвращает массив JSON-текстов значений колонки. Числа форматируются векторно
+    (так же, как json.dumps), строки и прочие объекты кодируются один раз на уникальное значение."""
+    dtype = column.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return _lookup(column.cat.categories)[column.cat.codes.to_numpy()]
+    values = column.to_numpy()
+    if dtype.kind == "f":
+        encoded = values.astype(str).astype(object)
+        encoded[~np.isfinite(values)] = NULL
+        return encoded
+    if dtype.kind in "iu":
+        return values.astype(str).astype(object)
+    if dtype.kind == "b":
+        return np.where(values, "true", "false").astype(object)
+    if dtype.kind == "M":
+        encoded = np.char.replace(np.datetime_as_string(values.astype("datetime64[s]")), "T", " ")
+        encoded = np.char.add(np.char.add('"', encoded), '"').astype(object)
+        encoded[np.isnat(values)] = NULL
+        return encoded
+    try:
+        codes, uniques = pd.factorize(column, use_na_sentinel=True)
+    except TypeError:
+        return np.array([encode_value(value) for value in values], dtype=object)
+    return _lookup(uniques)[codes]
+
+
+def _record_template(columns: List[Any], indent: Optional[int]) -> str:
+    keys = [_encode_string(str(column)).replace("%", "%%") for column in columns]
+    if not keys:
+        return "{}"
+    if indent is None:
+        return "{" + ", ".join(f"{key}: %s" for key in keys) + "}"
+    inner = " " * indent * 2
+    return " " * indent + "{\n" + ",\n".join(f"{inner}{key}: %s" for key in keys) + "\n" + " " * indent + "}"
+
+
+def iter_records_json(
+    transactions_df: pd.DataFrame, indent: Optional[int] = None, lines: bool = False, chunk_size: int = CHUNK_SIZE
+) -> Iterator[str]:
+    """Генератор кодирует DataFrame в JSON-массив записей (как json.dumps(df.to_dict(orient='records'),
+    ensure_ascii=False, indent=indent), но с null вместо NaN) или, при lines=True, в NDJSON - по записи на строку.
+    Колонки кодируются векторно, записи собираются одним форматированием строки-шаблона, без словарей;
+    текст выдаётся кусками по chunk_size записей, так что его можно писать в файл или сокет по мере готовности."""
+    template = _record_template(list(transactions_df.columns), None if lines else indent)
+    if lines:
+        separator, opening, closing = "\n", "", "\n"
+    elif indent is None:
+        separator, opening, closing = ", ", "[", "]"
+    else:
+        separator, opening, closing = ",\n", "[\n", "\n]"
+    if len(transactions_df) == 0:
+        yield "" if lines else "[]"
+        return
+    # Словари категориальных колонок кодируются один раз на весь DataFrame, а не на каждый кусок.
+    categorical = {}
+    for position in range(transactions_df.shape[1]):
+        column = transactions_df.iloc[:, position]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            categorical[position] = (column.cat.codes.to_numpy(), _lookup(column.cat.categories))
+    yield opening
+    for start in range(0, len(transactions_df), chunk_size):
+        stop = min(start + chunk_size, len(transactions_df))
+        columns = []
+        for position in range(transactions_df.shape[1]):
+            if position in categorical:
+                codes, lookup = categorical[position]
+                columns.append(lookup[codes[start:stop]])
+            else:
+                columns.append(encode_column(transactions_df.iloc[start:stop, position]))
+        rows = [template % row for row in zip(*columns)] if columns else [template] * (stop - start)
+        yield ("" if start == 0 else separator) + separator.join(rows)
+    yield closing
+
+
+def write_records_json(
+    transactions_df: pd.DataFrame,
+    file_out: IO[str],
+    indent: Optional[int] = None,
+    lines: bool = False,
+    chunk_size: int = CHUNK_SIZE,
+) -> None:
+    """Функция потоково пишет DataFrame в текстовый файл (или сокет, открытый через makefile('w')) в формате
+    iter_records_json; в памяти одновременно находится только текст одного куска."""
+    for text in iter_records_json(transactions_df, indent, lines, chunk_size):
+        file_out.write(text)
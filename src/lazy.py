@@ -0,0 +1,35 @@
+import importlib
+import sys
+import types
+from typing import Any, List, Optional
+
+
+class LazyModule(types.ModuleType):
+    """Заместитель модуля: сам модуль импортируется при первом обращении к любому его атрибуту.
+    Атрибуты не копируются, а каждый раз берутся из настоящего модуля, поэтому patch("pandas.read_excel")
+    и подобные подмены видны и через заместитель."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self) -> types.ModuleType:
+        module: Optional[types.ModuleType] = self.__dict__["_lazy_module"]
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._load(), attribute)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """Функция возвращает модуль name, если он уже импортирован, иначе - LazyModule,
+    который импортирует его при первом использовании. Так тяжёлые зависимости (pandas, numpy, requests)
+    не замедляют запуск команд и импорт модулей, которым они не нужны."""
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
@@ -0,0 +1,178 @@
+import atexit
+import logging
+import os
+import queue
+import re
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = "%(asctime)s - %(process)d - %(filename)s - %(funcName)s - %(levelname)s - %(message)s"
+# Файл лога больше LOG_MAX_BYTES переименовывается в '<файл>.1' (прежняя копия удаляется) и начинается заново.
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 2**20)))
+# Сколько файлов процессов одного модуля хранить: при открытии нового более старые удаляются.
+LOG_KEEP_FILES = int(os.getenv("LOG_KEEP_FILES", "20"))
+
+_lock = threading.Lock()
+_log_files: Dict[str, str] = {}
+
+
+def process_log_path(log_file: str, pid: Optional[int] = None) -> str:
+    """Функция добавляет к имени файла лога PID процесса: 'logs/utils.log' -> 'logs/utils.12345.log'."""
+    root, extension = os.path.splitext(log_file)
+    return f"{root}.{os.getpid() if pid is None else pid}{extension}"
+
+
+def _prune_process_logs(log_file: str, keep: int) -> None:
+    """Удаляет файлы процессов модуля log_file (вместе с копиями '.1'), кроме keep самых новых по времени изменения."""
+    directory = os.path.dirname(os.path.abspath(log_file))
+    root, extension = os.path.splitext(os.path.basename(log_file))
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    pattern = re.compile(rf"{re.escape(root)}\.\d+{re.escape(extension)}")
+    paths = [os.path.join(directory, name) for name in names if pattern.fullmatch(name)]
+    try:
+        paths.sort(key=lambda path: (os.stat(path).st_mtime_ns, path), reverse=True)
+    except OSError:
+        return
+    for path in paths[keep:]:
+        for stale in (path, f"{path}.1"):
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+
+class _RouterHandler(logging.Handler):
+    """Обработчик фонового потока: направляет запись в файл, закреплённый за её логгером.
+    Каждый процесс пишет в свои файлы '<модуль>.<PID>.log' (см. process_log_path), поэтому у файла один писатель
+    и ротация по размеру не пересекается с другими процессами (например, с процессами src.batch).
+    Каталог и файл лога создаются при первой записи в него; тогда же удаляются файлы модуля, оставшиеся
+    от старых процессов, сверх LOG_KEEP_FILES."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.file_handlers: Dict[str, logging.FileHandler] = {}
+        self.formatter = logging.Formatter(LOG_FORMAT)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        log_file = _log_files.get(record.name)
+        if log_file is None:
+            return
+        handler = self.file_handlers.get(log_file)
+        if handler is None:
+            os.makedirs(os.path.dirname(os.path.abspath(log_file)), exist_ok=True)
+            handler = logging.FileHandler(process_log_path(log_file), mode="a", encoding="utf-8")
+            handler.setFormatter(self.formatter)
+            self.file_handlers[log_file] = handler
+            _prune_process_logs(log_file, LOG_KEEP_FILES)
+        handler.handle(record)
+        stream = handler.stream
+        if stream is not None and stream.tell() > LOG_MAX_BYTES:
+            self._rollover(log_file, handler)
+
+    def _rollover(self, log_file: str, handler: logging.FileHandler) -> None:
+        """Переносит заполненный файл процесса в '<файл>.1'; следующая запись откроет новый файл."""
+        handler.close()
+        del self.file_handlers[log_file]
+        try:
+            os.replace(handler.baseFilename, f"{handler.baseFilename}.1")
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        for handler in self.file_handlers.values():
+            handler.close()
+        super().close()
+
+
+class _Writer:
+    """Поток-писатель процесса: очередь записей, QueueListener и обработчик, раскладывающий записи по файлам."""
+
+    __slots__ = ("pid", "queue", "router", "listener")
+
+    def __init__(self) -> None:
+        self.pid = os.getpid()
+        self.queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        self.router = _RouterHandler()
+        self.listener = QueueListener(self.queue, self.router)
+        self.listener.start()
+
+
+_writer: Optional[_Writer] = None
+
+
+def _current_writer() -> Optional[_Writer]:
+    writer = _writer
+    return writer if writer is not None and writer.pid == os.getpid() else None
+
+
+def _current_queue() -> "queue.SimpleQueue[logging.LogRecord]":
+    """Возвращает очередь логов текущего процесса, при первом обращении (и после fork) запуская поток-писатель."""
+    global _writer
+    writer = _current_writer()
+    if writer is None:
+        with _lock:
+            writer = _current_writer()
+            if writer is None:
+                writer = _writer = _Writer()
+    return writer.queue
+
+
+class _ProcessQueueHandler(QueueHandler):
+    """QueueHandler, отдающий записи в очередь потока-писателя текущего процесса. Сообщение и traceback
+    собираются в вызывающем потоке (QueueHandler.prepare), поэтому в файл попадают значения на момент записи.
+    Очередь выбирается при каждой записи (_current_queue), поэтому переданная в конструктор не используется."""
+
+    def __init__(self) -> None:
+        super().__init__(queue.SimpleQueue())
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        _current_queue().put_nowait(record)
+
+
+_queue_handler = _ProcessQueueHandler()
+
+
+def get_logger(name: str, log_file: str, level: Optional[str] = None) -> logging.Logger:
+    """Функция возвращает логгер, записи которого через общую очередь пишет один фоновый поток
+    в файл log_file с PID процесса в имени (размер ограничен LOG_MAX_BYTES). Уровень берётся из переменной
+    окружения LOG_LEVEL (по умолчанию INFO), поэтому debug-записи при выключенном уровне отбрасываются
+    до форматирования."""
+    logger = logging.getLogger(name)
+    logger.setLevel(level or LOG_LEVEL)
+    logger.propagate = False
+    _log_files[name] = log_file
+    if _queue_handler not in logger.handlers:
+        logger.addHandler(_queue_handler)
+    return logger
+
+
+def flush_logs() -> None:
+    """Функция дожидается записи всех накопленных в очереди записей и сбрасывает файлы на диск."""
+    with _lock:
+        writer = _current_writer()
+        if writer is None:
+            return
+        writer.listener.stop()
+        for handler in writer.router.file_handlers.values():
+            handler.flush()
+        writer.listener.start()
+
+
+def shutdown_logging() -> None:
+    """Функция останавливает поток-писатель, дописав очередь, и закрывает файлы логов."""
+    global _writer
+    with _lock:
+        writer = _current_writer()
+        if writer is None:
+            return
+        writer.listener.stop()
+        writer.router.close()
+        _writer = None
+
+
+atexit.register(shutdown_logging)
@@ -1,16 +1,79 @@
+import argparse
+import datetime
+import os
+import sys
+from typing import List, Optional
+
+from src import metrics
+from src.json_encoder import dumps
+from src.reports import spent_by_category
+from src.server import DEFAULT_HOST, DEFAULT_PORT, serve
+from src.services import investment_bank
 from src.utils import reading_excel
 from src.views import views
-from src.services import investment_bank
-from src.reports import spent_by_category
-import datetime
-import pandas as pd
+
+DEFAULT_FILE = "operations.xls"
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Функция возвращает разбор аргументов командной строки с подкомандами views, invest, spent и serve."""
+    parser = argparse.ArgumentParser(prog="python -m src.main", description="Анализ банковских транзакций.")
+    parser.add_argument(
+        "--metrics", metavar="DIR", help="собрать метрики и записать их в DIR/metrics.prom и DIR/metrics.json"
+    )
+    parser.add_argument("--trace-memory", action="store_true", help="вместе с --metrics измерять пик памяти")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    views_parser = subparsers.add_parser("views", help="главная страница: приветствие, карты, топ-5, курсы")
+    views_parser.add_argument("--date", help="дата и время '%%Y-%%m-%%d %%H:%%M:%%S' (по умолчанию - сейчас)")
+    views_parser.add_argument("--file", default=DEFAULT_FILE, help="файл выписки в каталоге data")
+
+    invest_parser = subparsers.add_parser("invest", help="сумма Инвесткопилки за месяц")
+    invest_parser.add_argument("--month", help="месяц '%%Y-%%m' (по умолчанию - текущий)")
+    invest_parser.add_argument("--limit", type=int, default=50, help="лимит округления (по умолчанию 50)")
+    invest_parser.add_argument("--file", default=DEFAULT_FILE, help="файл выписки в каталоге data")
+
+    spent_parser = subparsers.add_parser("spent", help="траты по категории за 3 месяца до даты")
+    spent_parser.add_argument("--category", required=True, help="категория (регулярное выражение)")
+    spent_parser.add_argument("--date", default="", help="дата '%%Y-%%m-%%d' (по умолчанию - сегодня)")
+    spent_parser.add_argument("--file", default=DEFAULT_FILE, help="файл выписки в каталоге data")
+
+    serve_parser = subparsers.add_parser("serve", help="HTTP-сервис с выписками и индексами в памяти")
+    serve_parser.add_argument("--host", default=DEFAULT_HOST, help=f"адрес (по умолчанию {DEFAULT_HOST})")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"порт (по умолчанию {DEFAULT_PORT})")
+    serve_parser.add_argument("--file", default=DEFAULT_FILE, help="выписка, загружаемая при старте")
+    serve_parser.add_argument(
+        "--refresh-quotes", action="store_true", help="обновлять котировки всех пользователей фоновым потоком"
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Функция разбирает аргументы командной строки, выполняет подкоманду и печатает результат (json).
+    Возвращает код завершения: 0 - успех, 1 - ошибка в данных."""
+    args = build_parser().parse_args(argv)
+    if args.metrics:
+        metrics.enable(trace_memory=args.trace_memory)
+    try:
+        if args.command == "views":
+            date = args.date or datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            print(views(date, reading_excel(args.file)))
+        elif args.command == "invest":
+            month = args.month or datetime.date.today().strftime("%Y-%m")
+            print(investment_bank(month, reading_excel(args.file), args.limit))
+        elif args.command == "serve":
+            serve(args.host, args.port, args.file, args.refresh_quotes)
+        else:
+            print(dumps(spent_by_category(reading_excel(args.file), args.category, args.date)))
+    except (ValueError, OSError) as error:
+        print(error, file=sys.stderr)
+        return 1
+    finally:
+        if args.metrics:
+            metrics.write_prometheus(os.path.join(args.metrics, "metrics.prom"))
+            metrics.write_snapshot(os.path.join(args.metrics, "metrics.json"))
+    return 0
+
 
 if __name__ == "__main__":
-    date = datetime.datetime.strftime(datetime.datetime.now(), "%Y-%m-%d %H:%M:%S")
-    print(views(date))
-    print("\n###################\n")
-    transactions_list = reading_excel("operations.xls")
-    print(investment_bank("2021-10", transactions_list.to_dict(orient="records"), 100))
-    print("\n###################\n")
-    transactions_df = pd.DataFrame(transactions_list)
-    print((spent_by_category(transactions_df, "Фастфуд", "2021-10-25")).head())
+    sys.exit(main())
@@ -0,0 +1,314 @@
+import bisect
+import json
+import os
+import threading
+import time
+import tracemalloc
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Sequence, TypeVar, cast
+
+from config import METRICS_JSON, METRICS_PROM
+
+# Инструментирование включается переменной окружения METRICS=1 или вызовом enable().
+METRICS = os.getenv("METRICS", "0") == "1"
+PREFIX = "bank"
+# Границы корзин гистограмм времени, секунды (последняя корзина - +Inf).
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+_enabled = False
+_trace_memory = False
+_lock = threading.Lock()
+_local = threading.local()
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами BUCKETS: количество наблюдений в корзинах, сумма и число."""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, share: float) -> Optional[float]:
+        """Оценка квантиля сверху: граница корзины, в которую он попадает (None - за последней границей)."""
+        rank = share * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if count and seen >= rank:
+                return bound
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative, seen = {}, 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            cumulative[str(bound)] = seen
+        cumulative["+Inf"] = self.count
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "mean": round(self.total / self.count, 6) if self.count else None,
+            "p50_le": self.quantile(0.5) if self.count else None,
+            "p99_le": self.quantile(0.99) if self.count else None,
+            "buckets": cumulative,
+        }
+
+
+class FunctionMetrics:
+    """Метрики одной функции: вызовы, ошибки, гистограммы реального и процессорного времени,
+    обработанные строки и наибольший пик выделенной памяти за вызов (только при трассировке памяти и только
+    по вызовам, которые шли без замеров в других потоках: tracemalloc считает пик на весь процесс)."""
+
+    __slots__ = ("calls", "errors", "wall", "cpu", "rows", "peak_bytes")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.wall = Histogram()
+        self.cpu = Histogram()
+        self.rows = 0
+        self.peak_bytes: Optional[int] = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "rows": self.rows,
+            "peak_bytes": self.peak_bytes,
+            "wall_seconds": self.wall.snapshot(),
+            "cpu_seconds": self.cpu.snapshot(),
+        }
+
+
+_registry: Dict[str, FunctionMetrics] = {}
+# Идущие замеры с трассировкой памяти во всех потоках процесса.
+_traced_calls: List["_Call"] = []
+
+
+def enable(trace_memory: bool = False) -> None:
+    """Функция включает сбор метрик. trace_memory=True дополнительно измеряет пик памяти через tracemalloc
+    (заметно замедляет выделение памяти, поэтому включается отдельно)."""
+    global _enabled, _trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _trace_memory = trace_memory
+    _enabled = True
+
+
+def disable() -> None:
+    """Функция выключает сбор метрик; накопленные значения сохраняются до reset()."""
+    global _enabled, _trace_memory
+    if _trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _enabled = _trace_memory = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    """Функция удаляет все накопленные метрики."""
+    with _lock:
+        _registry.clear()
+
+
+def count_rows(args: Sequence[Any], kwargs: Dict[str, Any]) -> int:
+    """Количество строк вызова - длина первого аргумента-коллекции (DataFrame, Transactions, список, массив)."""
+    for value in (*args, *kwargs.values()):
+        if hasattr(value, "__len__") and not isinstance(value, (str, bytes, dict)):
+            return len(value)
+    return 0
+
+
+class _Call:
+    """Замер одного вызова: время начала и, при трассировке памяти, уровень памяти на входе.
+    Пик tracemalloc общий для процесса, поэтому если замеры других потоков пересеклись с вызовом по времени
+    (shared), его пик памяти не записывается: он мог бы принадлежать другому вызову."""
+
+    __slots__ = ("name", "stack", "start_memory", "wall_start", "cpu_start", "thread", "shared")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.stack: Optional[List[int]] = None
+        self.thread = threading.get_ident()
+        self.shared = False
+        if _trace_memory and tracemalloc.is_tracing():
+            with _lock:
+                for call in _traced_calls:
+                    if call.thread != self.thread:
+                        call.shared = self.shared = True
+                _traced_calls.append(self)
+            # Стек пиков вложенных замеров потока: после вложенного замера пик сбрасывается, поэтому внешний
+            # забирает максимум вложенных себе.
+            self.stack = _local.__dict__.setdefault("peaks", [])
+            self.start_memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            self.stack.append(0)
+        self.wall_start, self.cpu_start = time.perf_counter(), time.thread_time()
+
+    def finish(self, rows: int, failed: bool) -> None:
+        wall, cpu = time.perf_counter() - self.wall_start, time.thread_time() - self.cpu_start
+        peak = None
+        if self.stack is not None:
+            peak = max(self.stack.pop(), tracemalloc.get_traced_memory()[1])
+            if self.stack:
+                self.stack[-1] = max(self.stack[-1], peak)
+            tracemalloc.reset_peak()
+            peak -= self.start_memory
+        with _lock:
+            if self.stack is not None:
+                _traced_calls.remove(self)
+                if self.shared:
+                    peak = None
+            metrics = _registry.get(self.name)
+            if metrics is None:
+                metrics = _registry[self.name] = FunctionMetrics()
+            metrics.calls += 1
+            metrics.errors += failed
+            metrics.wall.observe(wall)
+            metrics.cpu.observe(cpu)
+            metrics.rows += rows
+            if peak is not None:
+                metrics.peak_bytes = max(metrics.peak_bytes or 0, peak)
+
+
+def _observe(name: str, func: Callable, args: Sequence[Any], kwargs: Dict[str, Any]) -> Any:
+    call = _Call(name)
+    failed = True
+    try:
+        result = func(*args, **kwargs)
+        failed = False
+        return result
+    finally:
+        call.finish(count_rows(args, kwargs), failed)
+
+
+def instrumented(name: Optional[str] = None) -> Callable[[F], F]:
+    """Декоратор учитывает вызовы функции в метриках под именем name ('<модуль>.<функция>' по умолчанию).
+    Пока сбор выключен, обёртка только проверяет флаг и вызывает функцию."""
+
+    def decorator(func: F) -> F:
+        metric_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _enabled:
+                return func(*args, **kwargs)
+            return _observe(metric_name, func, args, kwargs)
+
+        return cast(F, wrapper)
+
+    return decorator
+
+
+class measure:
+    """Контекстный менеджер для участка кода, учитывается в метриках как вызов функции name:
+    with measure("views.sections") as section: ...; section.rows = len(result)."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.rows = 0
+        self._call: Optional[_Call] = None
+
+    def __enter__(self) -> "measure":
+        if _enabled:
+            self._call = _Call(self.name)
+        return self
+
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        if self._call is not None:
+            self._call.finish(self.rows, exc_type is not None)
+            self._call = None
+
+
+def snapshot() -> Dict[str, Any]:
+    """Функция возвращает снимок метрик в виде словаря для JSON: по функциям, отсортированным по имени."""
+    with _lock:
+        functions = {name: _registry[name].snapshot() for name in sorted(_registry)}
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "enabled": _enabled,
+        "trace_memory": _trace_memory,
+        "functions": functions,
+    }
+
+
+def _labels(name: str, **extra: str) -> str:
+    items = {"function": name, **extra}
+    return ",".join(f'{key}="{value}"' for key, value in items.items())
+
+
+def prometheus_text() -> str:
+    """Функция возвращает метрики в текстовом формате Prometheus (exposition format 0.0.4)."""
+    with _lock:
+        items = [(name, _registry[name]) for name in sorted(_registry)]
+    lines: List[str] = []
+
+    def family(metric: str, kind: str, description: str) -> None:
+        lines.append(f"# HELP {PREFIX}_{metric} {description}")
+        lines.append(f"# TYPE {PREFIX}_{metric} {kind}")
+
+    family("function_calls_total", "counter", "Number of calls.")
+    lines.extend(f"{PREFIX}_function_calls_total{{{_labels(name)}}} {m.calls}" for name, m in items)
+    family("function_errors_total", "counter", "Number of calls that raised an exception.")
+    lines.extend(f"{PREFIX}_function_errors_total{{{_labels(name)}}} {m.errors}" for name, m in items)
+    family("function_rows_total", "counter", "Rows (collection items) passed to the function.")
+    lines.extend(f"{PREFIX}_function_rows_total{{{_labels(name)}}} {m.rows}" for name, m in items)
+    for metric, attribute, description in (
+        ("function_wall_seconds", "wall", "Wall-clock time per call."),
+        ("function_cpu_seconds", "cpu", "CPU time of the calling thread per call."),
+    ):
+        family(metric, "histogram", description)
+        for name, metrics in items:
+            histogram: Histogram = getattr(metrics, attribute)
+            seen = 0
+            for bound, count in zip(BUCKETS, histogram.counts):
+                seen += count
+                lines.append(f"{PREFIX}_{metric}_bucket{{{_labels(name, le=str(bound))}}} {seen}")
+            lines.append(f"{PREFIX}_{metric}_bucket{{{_labels(name, le='+Inf')}}} {histogram.count}")
+            lines.append(f"{PREFIX}_{metric}_sum{{{_labels(name)}}} {histogram.total:.6f}")
+            lines.append(f"{PREFIX}_{metric}_count{{{_labels(name)}}} {histogram.count}")
+    family(
+        "function_peak_bytes",
+        "gauge",
+        "Largest peak of traced allocations during one call that did not overlap measured calls in other threads.",
+    )
+    for name, metrics in items:
+        if metrics.peak_bytes is not None:
+            lines.append(f"{PREFIX}_function_peak_bytes{{{_labels(name)}}} {metrics.peak_bytes}")
+    return "\n".join(lines) + "\n"
+
+
+def _write(path: str, text: str) -> str:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp_path, "w", encoding="utf-8") as file_out:
+        file_out.write(text)
+    os.replace(tmp_path, path)
+    return path
+
+
+def write_prometheus(path: str = METRICS_PROM) -> str:
+    """Функция атомарно записывает метрики в текстовый файл Prometheus (для node_exporter textfile) и
+    возвращает путь."""
+    return _write(path, prometheus_text())
+
+
+def write_snapshot(path: str = METRICS_JSON) -> str:
+    """Функция атомарно записывает JSON-снимок метрик и возвращает путь."""
+    return _write(path, json.dumps(snapshot(), ensure_ascii=False, indent=4))
+
+
+if METRICS:
+    enable()
@@ -0,0 +1,220 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import quote
+
+from config import CACHE_DIR, QUOTES_LOGS
+from src.logging_setup import get_logger
+
+logger = get_logger(__name__, QUOTES_LOGS)
+
+QUOTES_CACHE_DIR = os.path.join(CACHE_DIR, "quotes")
+
+
+class QuoteCache:
+    """Кэш котировок одного источника: LRU в памяти поверх файлов на диске (по json-файлу на котировку).
+    Свежие значения (моложе ttl) отдаются сразу. Устаревшие, но моложе max_stale, тоже отдаются сразу,
+    а обновление запускается в фоновом потоке (stale-while-revalidate). Остальные запрашиваются синхронно;
+    одновременные промахи по одному ключу ждут один общий запрос, а не отправляют свои.
+    Каждая котировка записывается в свой файл, поэтому процессы с общим cache_dir не затирают чужие записи."""
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        max_stale: float = 24 * 3600,
+        max_entries: int = 1024,
+        cache_dir: Optional[str] = QUOTES_CACHE_DIR,
+    ) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._memory: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._refreshing: Set[str] = set()
+        self._inflight: Dict[str, "Future[Any]"] = {}
+        self._lock = threading.RLock()
+
+    def disk_path(self, key: str) -> Optional[str]:
+        """Возвращает путь к файлу котировки key (None - кэш без дискового уровня)."""
+        if self.cache_dir is None:
+            return None
+        return os.path.join(self.cache_dir, self.name, f"{quote(key, safe='')}.json")
+
+    def refreshing(self) -> bool:
+        """Возвращает True, пока идёт хотя бы одно фоновое обновление."""
+        with self._lock:
+            return bool(self._refreshing)
+
+    def reset(self, cache_dir: Optional[str] = QUOTES_CACHE_DIR) -> None:
+        """Очищает память кэша и переключает дисковый уровень на cache_dir (None - без диска)."""
+        with self._lock:
+            self._memory.clear()
+            self._inflight.clear()
+            self.cache_dir = cache_dir
+
+    def _read_disk(self, key: str) -> Optional[Tuple[Any, float]]:
+        path = self.disk_path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as file_in:
+                item = json.load(file_in)
+            return item["value"], float(item["fetched_at"])
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.warning(f"Файл кэша {path} повреждён и будет перезаписан.")
+            return None
+
+    def _write_disk(self, entries: Dict[str, Tuple[Any, float]]) -> None:
+        for key, (value, fetched_at) in entries.items():
+            path = self.disk_path(key)
+            if path is None:
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+            with open(tmp_path, "w", encoding="utf-8") as file_out:
+                json.dump({"value": value, "fetched_at": fetched_at}, file_out, ensure_ascii=False)
+            os.replace(tmp_path, path)
+
+    def _lookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        entry = self._memory.get(key)
+        if entry is None:
+            entry = self._read_disk(key)
+            if entry is None:
+                return None
+            self._remember(key, entry)
+        else:
+            self._memory.move_to_end(key)
+        return entry
+
+    def _remember(self, key: str, entry: Tuple[Any, float]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def put(self, key: str, value: Any) -> None:
+        """Сохраняет значение в оба уровня кэша с текущим временем получения."""
+        self.put_many({key: value})
+
+    def put_many(self, values: Dict[str, Any]) -> None:
+        """Сохраняет значения в оба уровня кэша с текущим временем получения;
+        на диск записываются только файлы переданных котировок."""
+        fetched_at = time.time()
+        entries = {key: (value, fetched_at) for key, value in values.items()}
+        with self._lock:
+            for key, entry in entries.items():
+                self._remember(key, entry)
+        try:
+            self._write_disk(entries)
+        except OSError:
+            logger.warning(f"Не удалось записать кэш котировок {self.name} на диск.")
+
+    def _refresh(self, key: str, loader: Callable[[], Any]) -> None:
+        try:
+            self.put(key, loader())
+            logger.info(f"Котировка {self.name}:{key} обновлена в фоне.")
+        except Exception:
+            logger.error(f"Фоновое обновление котировки {self.name}:{key} не удалось, остаётся старое значение.")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Возвращает значение по ключу, при необходимости получая его через loader()."""
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                value, fetched_at = entry
+                age = time.time() - fetched_at
+                if age < self.ttl:
+                    return value
+                if age < self.ttl + self.max_stale:
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        threading.Thread(target=self._refresh, args=(key, loader), daemon=True).start()
+                    return value
+            waiting = self._inflight.get(key)
+            if waiting is None:
+                future: "Future[Any]" = Future()
+                self._inflight[key] = future
+        if waiting is not None:
+            return waiting.result()
+        try:
+            value = loader()
+            self.put(key, value)
+        except BaseException as error:
+            self._settle({key: future}, {}, error)
+            raise
+        self._settle({key: future}, {key: value})
+        return value
+
+    def _settle(
+        self, claimed: Dict[str, "Future[Any]"], values: Dict[str, Any], error: Optional[BaseException] = None
+    ) -> None:
+        """Снимает с ключей отметку 'запрашивается' и передаёт результат (или ошибку) ждущим потокам."""
+        with self._lock:
+            for key, future in claimed.items():
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+        for key, future in claimed.items():
+            if error is None:
+                future.set_result(values[key])
+            else:
+                future.set_exception(error)
+
+    def _refresh_many(self, keys: List[str], loader: Callable[[List[str]], Dict[str, Any]]) -> None:
+        try:
+            self.put_many(loader(keys))
+            logger.info(f"Котировки {self.name}:{','.join(keys)} обновлены в фоне одним запросом.")
+        except Exception:
+            logger.error(f"Фоновое обновление котировок {self.name} не удалось, остаются старые значения.")
+        finally:
+            with self._lock:
+                self._refreshing.difference_update(keys)
+
+    def get_many(self, keys: Iterable[str], loader: Callable[[List[str]], Dict[str, Any]]) -> Dict[str, Any]:
+        """Возвращает словарь значений по ключам. Все отсутствующие ключи получаются одним вызовом
+        loader(missing_keys), все устаревшие обновляются одним фоновым вызовом loader(stale_keys).
+        Ключи, которые уже запрашивает другой поток, не запрашиваются повторно: их значения берутся из его запроса."""
+        values: Dict[str, Any] = {}
+        claimed: Dict[str, "Future[Any]"] = {}
+        stale: List[str] = []
+        waiting: Dict[str, "Future[Any]"] = {}
+        with self._lock:
+            now = time.time()
+            for key in dict.fromkeys(keys):
+                entry = self._lookup(key)
+                if entry is None or now - entry[1] >= self.ttl + self.max_stale:
+                    if key in self._inflight:
+                        waiting[key] = self._inflight[key]
+                    else:
+                        claimed[key] = self._inflight[key] = Future()
+                    continue
+                values[key] = entry[0]
+                if now - entry[1] >= self.ttl and key not in self._refreshing:
+                    stale.append(key)
+            self._refreshing.update(stale)
+        if stale:
+            threading.Thread(target=self._refresh_many, args=(stale, loader), daemon=True).start()
+        if claimed:
+            missing = list(claimed)
+            try:
+                loaded = loader(missing)
+                fetched = {key: loaded[key] for key in missing}
+                self.put_many(fetched)
+                values.update(fetched)
+            except BaseException as error:
+                self._settle(claimed, {}, error)
+                raise
+            self._settle(claimed, loaded)
+        for key, future in waiting.items():
+            values[key] = future.result()
+        return values
@@ -1,37 +1,79 @@
+from __future__ import annotations
+
 import datetime
-import json
-import logging
 import os
 import re
 from functools import wraps
-from typing import Any, Callable, Dict, List
-
-import pandas as pd
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 from config import REPORTS_LOGS, ROOT_DIR
+from src.indexes import category_index, dataset_fingerprint, operation_dates, parse_dates, time_index
+from src.lazy import lazy_import
+from src.logging_setup import get_logger
+from src.metrics import instrumented
+from src.result_cache import ResultCache
+from src.result_writer import store_result
+from src.transactions import Transactions, as_frame
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+logger = get_logger(__name__, REPORTS_LOGS)
+
+# Кэш результатов spent_by_category; счётчики - spent_cache.stats(), бюджет - spent_cache.resize(...).
+spent_cache = ResultCache()
 
-logger = logging.getLogger(__file__)
-logger.setLevel(logging.DEBUG)
-file_handler = logging.FileHandler(REPORTS_LOGS, mode="w")
-file_formatter = logging.Formatter("%(asctime)s - %(filename)s - %(funcName)s - %(levelname)s - %(message)s")
-file_handler.setFormatter(file_formatter)
-logger.addHandler(file_handler)
+# Период отчёта о тратах: 12 недель до даты, границы - начало первого и конец последнего дня.
+SPENT_WINDOW = datetime.timedelta(weeks=12)
 
 
-def log(filename: str = "log_file.json") -> Any:
-    """Декоратор принимает функцию. Проводит запись результата (pd.DataFrame) её работы в json-файл.
-    Возвращает результат самой функции."""
-    logger.info("Декоратор начал свою работу.")
+def spent_log_options() -> Dict[str, Any]:
+    """Функция возвращает параметры записи результата spent_by_category: по умолчанию - log_file.json
+    с отступами, с переменной окружения RESULTS_NDJSON=1 - построчный log_file.ndjson, который пишет фоновый
+    поток (для больших результатов). Переменная читается при каждом вызове."""
+    if os.getenv("RESULTS_NDJSON", "0") == "1":
+        return {"filename": "log_file.ndjson", "fmt": "ndjson", "background": True}
+    return {}
+
+
+def log(
+    filename: str = "log_file.json",
+    fmt: str = "json",
+    compress: Optional[str] = None,
+    rotate: bool = False,
+    keep: Optional[int] = None,
+    background: bool = False,
+    options: Optional[Callable[[], Dict[str, Any]]] = None,
+) -> Any:
+    """Декоратор принимает функцию. Проводит запись результата (pd.DataFrame) её работы в файл.
+    Возвращает результат самой функции.
+    Параметры записи (см. src.result_writer.store_result): fmt - 'json' (по умолчанию) или построчный 'ndjson',
+    compress - 'gzip', rotate - новый файл на каждый вызов (keep - сколько файлов хранить),
+    background - запись фоновым потоком без ожидания в вызывающем коде.
+    options - функция, которая при каждом вызове возвращает словарь, заменяющий часть этих параметров."""
+    logger.debug("Декоратор начал свою работу.")
 
     def wrapper(func: Callable) -> Any:
         @wraps(func)
         def inner(*args: Any, **kwargs: Any) -> Any:
-            logger.info("Декоратор получает результат работы декорируемой функции.")
+            logger.debug("Декоратор получает результат работы декорируемой функции.")
             result = func(*args, **kwargs)
-            logger.info("Декоратор записывает полученный результат в файл.")
-            with open(os.path.join(ROOT_DIR, filename), "w", encoding="utf-8") as file:
-                json.dump(result.to_dict(orient="records"), file, ensure_ascii=False, indent=4)
-            logger.info("Декоратор успешно завершил свою работу.")
+            logger.debug("Декоратор записывает полученный результат в файл.")
+            overrides = options() if options is not None else {}
+            store_result(
+                os.path.join(ROOT_DIR, overrides.get("filename", filename)),
+                result,
+                overrides.get("fmt", fmt),
+                overrides.get("compress", compress),
+                overrides.get("rotate", rotate),
+                overrides.get("keep", keep),
+                overrides.get("background", background),
+            )
+            logger.debug("Декоратор успешно завершил свою работу.")
             return result
 
         return inner
@@ -39,82 +81,180 @@ def log(filename: str = "log_file.json") -> Any:
     return wrapper
 
 
-def filtered_by_category(category: str, transactions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Функция принимает список транзакций (словарей) и категорию.
-    Возвращает список транзакций (словарей), отфильтрованных по заданной категории."""
-    logger.info("Функция начала свою работу.")
-    pattern = rf"{category}"
-    logger.info("Функция обрабатывает полученные данные.")
-    filtered_list = [
-        transaction
-        for transaction in transactions
-        if re.findall(pattern, transaction["Категория"], flags=re.IGNORECASE)
-    ]
-    logger.info("Функция успешно завершила свою работу.")
+@instrumented()
+def filtered_by_category(
+    category: str, transactions: Union[pd.DataFrame, Transactions, List[Dict[str, Any]]], regex: bool = True
+) -> Union[pd.DataFrame, Transactions, List[Dict[str, Any]]]:
+    """Функция принимает категорию и транзакции (pd.DataFrame, Transactions или список словарей).
+    Возвращает транзакции того же типа, в категории которых без учёта регистра найдена переданная категория
+    (как регулярное выражение; при regex=False - как обычная подстрока).
+    Выражение проверяется один раз на каждую уникальную категорию, а не на каждую транзакцию."""
+    logger.debug("Функция начала свою работу.")
+    pattern = rf"{category}" if regex else re.escape(category)
+    logger.debug("Функция обрабатывает полученные данные.")
+    if isinstance(transactions, (pd.DataFrame, Transactions)):
+        index = category_index(as_frame(transactions))
+        positions = index.rows(index.search(pattern))
+        logger.debug("Функция успешно завершила свою работу.")
+        if isinstance(transactions, Transactions):
+            return transactions.take(positions)
+        return transactions.iloc[positions]
+    compiled = re.compile(pattern, flags=re.IGNORECASE)
+    matches: Dict[str, bool] = {}
+    filtered_list = []
+    for transaction in transactions:
+        transaction_category = transaction["Категория"]
+        if transaction_category not in matches:
+            matches[transaction_category] = compiled.search(transaction_category) is not None
+        if matches[transaction_category]:
+            filtered_list.append(transaction)
+    logger.debug("Функция успешно завершила свою работу.")
     return filtered_list
 
 
-def filtered_by_date(transactions: List[Dict], date: str = "") -> List[Dict[str, Any]]:
-    """Функция принимает список транзакций (словарей) и дату.
-    Возвращает список транзакций (словарей), отобранных за период в 3 месяца от заданной даты,
-    если дата не передана, то от настоящего числа."""
-    logger.info("Функция начала свою работу.")
+@instrumented()
+def date_window(date: str = "") -> Tuple[datetime.datetime, datetime.datetime]:
+    """Функция принимает дату ('%Y-%m-%d') и возвращает границы периода в 3 месяца (12 недель) до неё:
+    с 00:00:00 первого дня по 23:59:59 последнего. Если дата не передана, период отсчитывается от сегодня."""
     time_start = datetime.time(hour=00, minute=00, second=00)
     time_end = datetime.time(hour=23, minute=59, second=59)
     if not date:
         end_date = datetime.datetime.today()
-        start_date = end_date - datetime.timedelta(weeks=12)
-    if date:
+    else:
         end_date = datetime.datetime.strptime(date, "%Y-%m-%d")
-        start_date = end_date - datetime.timedelta(weeks=12)
-    filtered_list = []
-    logger.info("Функция обрабатывает полученные данные.")
-    for transaction in transactions:
-        transaction_date = datetime.datetime.strptime(transaction["Дата операции"], "%d.%m.%Y %H:%M:%S")
-        if (
-            datetime.datetime.combine(start_date, time_start)
-            <= transaction_date
-            <= datetime.datetime.combine(end_date, time_end)
-        ):
-            filtered_list.append(transaction)
-    logger.info("Функция успешно завершила свою работу.")
-    return filtered_list
+    start_date = end_date - SPENT_WINDOW
+    return datetime.datetime.combine(start_date, time_start), datetime.datetime.combine(end_date, time_end)
+
 
+@instrumented()
+def filtered_by_date(
+    transactions: Union[pd.DataFrame, Transactions, List[Dict]], date: str = ""
+) -> Union[pd.DataFrame, Transactions, List[Dict[str, Any]]]:
+    """Функция принимает транзакции (pd.DataFrame, Transactions или список словарей) и дату.
+    Возвращает транзакции того же типа, отобранные за период в 3 месяца от заданной даты,
+    если дата не передана, то от настоящего числа.
+    Для DataFrame окно ищется бинарным поиском по индексу времени (src.indexes.time_index)."""
+    logger.debug("Функция начала свою работу.")
+    start, end = date_window(date)
+    logger.debug("Функция обрабатывает полученные данные.")
+    if isinstance(transactions, (pd.DataFrame, Transactions)):
+        positions = time_index(as_frame(transactions)).window(start, end)
+        logger.debug("Функция успешно завершила свою работу.")
+        if isinstance(transactions, Transactions):
+            return transactions.take(positions)
+        return transactions.iloc[positions]
+    dates = parse_dates([transaction["Дата операции"] for transaction in transactions])
+    positions = np.flatnonzero((dates >= np.datetime64(start, "ns")) & (dates <= np.datetime64(end, "ns")))
+    logger.debug("Функция успешно завершила свою работу.")
+    return [transactions[position] for position in positions]
 
-@log()
-def spent_by_category(transactions: pd.DataFrame, category: str, date: str = "") -> pd.DataFrame:
-    """Функция принимает транзакции (pd.DataFrame), чистит от пустых значений в колонке 'Категория'.
-    Подготовленные данные передаёт для дальнейшей обработки своим подфункциям.
-    Возвращает pd.DataFrame транзакций, отобранных за определённый период по определённой категории."""
-    logger.info("Функция начала свою работу.")
-    not_null_category = transactions.loc[transactions["Категория"].notnull()]
-    logger.info("Функция проводит очистку от пустых значений в Категориях")
-    transaction_list = not_null_category.to_dict(orient="records")
-    logger.info("Функция передаёт очищенные данные для обработки своим подфункциям.")
-    filtered_by_date_list = filtered_by_date(transaction_list, date)
-    filtered_by_category_list = filtered_by_category(category, filtered_by_date_list)
-    result = pd.DataFrame(filtered_by_category_list)
-    logger.info("Функция успешно завершила свою работу.")
+
+def _spent_by_category(
+    transactions_df: pd.DataFrame, category: str, start: datetime.datetime, end: datetime.datetime
+) -> pd.DataFrame:
+    positions = time_index(transactions_df).window(start, end)
+    logger.debug("Функция отбирает транзакции по категории.")
+    index = category_index(transactions_df)
+    matched_codes = index.search(rf"{category}")
+    positions = positions[np.isin(index.codes[positions], matched_codes)]
+    return transactions_df.iloc[positions].reset_index(drop=True)
+
+
+@log(options=spent_log_options)
+@instrumented()
+def spent_by_category(
+    transactions: Union[pd.DataFrame, Transactions], category: str, date: str = ""
+) -> pd.DataFrame:
+    """Функция принимает транзакции (pd.DataFrame или Transactions), категорию и дату.
+    Возвращает pd.DataFrame транзакций, отобранных за определённый период по определённой категории.
+    Окно по датам берётся из индекса времени, категории сверяются по кодам индекса категорий,
+    транзакции с пустой категорией не попадают в результат.
+    Результаты кэшируются в spent_cache по отпечатку содержимого данных, категории и границам периода:
+    изменённые данные (в том числе на месте) дают новый отпечаток, а каждый вызов получает свою копию результата."""
+    logger.debug("Функция начала свою работу.")
+    transactions_df: pd.DataFrame = as_frame(transactions)
+    start, end = date_window(date)
+    key = (dataset_fingerprint(transactions_df), category, start, end)
+    result = spent_cache.get_or_compute(key, lambda: _spent_by_category(transactions_df, category, start, end))
+    logger.debug("Функция успешно завершила свою работу.")
     return result
 
 
-data_from_excel = pd.DataFrame(
-    [
-        {"Дата операции": "01.10.2023 17:53:24", "Сумма операции": -152, "Категория": "Фастфуд"},
-        {"Дата операции": "07.10.2023 17:53:24", "Сумма операции": -47.85, "Категория": "Каршеринг"},
-        {"Дата операции": "15.10.2023 17:53:24", "Сумма операции": -10385, "Категория": "Фастфуд"},
-        {"Дата операции": "07.10.2023 17:53:24", "Сумма операции": -101, "Категория": "Супермаркет"},
-        {"Дата операции": "17.10.2023 17:53:24", "Сумма операции": -52, "Категория": "Супермаркет"},
-        {"Дата операции": "27.10.2023 17:53:24", "Сумма операции": -887.65, "Категория": "Детские товары"},
-        {"Дата операции": "01.10.2023 17:53:24", "Сумма операции": -152, "Категория": "Фастфуд"},
-        {"Дата операции": "07.10.2023 17:53:24", "Сумма операции": -47.85, "Категория": "Каршеринг"},
-        {"Дата операции": "15.10.2023 17:53:24", "Сумма операции": -10385, "Категория": "Фастфуд"},
-        {"Дата операции": "07.10.2023 17:53:24", "Сумма операции": -101, "Категория": "Супермаркет"},
-        {"Дата операции": "17.10.2023 17:53:24", "Сумма операции": -52, "Категория": "Супермаркет"},
-        {"Дата операции": "27.10.2023 17:53:24", "Сумма операции": -887.65, "Категория": "Детские товары"},
-    ]
-)
+@instrumented()
+def category_spend_series(
+    transactions: Union[pd.DataFrame, Transactions], start: str, end: str, categories: Optional[Iterable[str]] = None
+) -> pd.DataFrame:
+    """Функция принимает транзакции (pd.DataFrame или Transactions), первый и последний день ('%Y-%m-%d')
+    и, по желанию, категории (регулярные выражения, как в spent_by_category).
+    Возвращает pd.DataFrame с колонками 'date', 'category', 'total', 'count': для каждой категории и каждого дня
+    сумма и количество операций за период date_window этого дня (транзакции с пустой категорией или датой
+    не учитываются). Для переданных категорий это то же, что spent_by_category(..., category, date).
+    По умолчанию (categories=None) строки идут по каждой категории выписки с точным совпадением названия,
+    а не с поиском: строка 'Дом' не включает траты 'Дом и ремонт', хотя spent_by_category(..., 'Дом') их включит.
+    Суммы по дням копятся в копейках по матрице (категория, день), окно для всех дней - разность
+    накопленных сумм: O(n + дней x категорий) вместо повторного отбора транзакций на каждый день."""
+    logger.debug("Функция начала свою работу.")
+    transactions_df: pd.DataFrame = as_frame(transactions)
+    first_day = np.datetime64(datetime.datetime.strptime(start, "%Y-%m-%d").date(), "D")
+    last_day = np.datetime64(datetime.datetime.strptime(end, "%Y-%m-%d").date(), "D")
+    if last_day < first_day:
+        raise ValueError("Последний день периода раньше первого!")
+    window_days = SPENT_WINDOW.days + 1
+    grid_start = first_day - np.timedelta64(window_days - 1, "D")
+    days = int((last_day - grid_start).astype(np.int64)) + 1
+    index = category_index(transactions_df)
+    dates = operation_dates(transactions_df)
+    day_offsets = (dates.astype("datetime64[D]") - grid_start).astype(np.int64)
+    valid = np.flatnonzero(~np.isnat(dates) & (index.codes >= 0) & (day_offsets >= 0) & (day_offsets < days))
+    amounts = np.nan_to_num(transactions_df["Сумма операции"].to_numpy(dtype=float)[valid])
+    cells = index.codes[valid] * days + day_offsets[valid]
+    size = len(index.categories) * days
+    shape = (len(index.categories), days)
+    kopecks = np.bincount(cells, weights=np.rint(amounts * 100), minlength=size).astype(np.int64).reshape(shape)
+    counts = np.bincount(cells, minlength=size).reshape(shape)
+    logger.debug("Функция считает накопленные суммы по дням.")
+    if categories is None:
+        labels = list(index.categories)
+        matrices = (kopecks, counts)
+    else:
+        labels = list(categories)
+        selection = np.zeros((len(labels), len(index.categories)), dtype=np.int64)
+        for row, category in enumerate(labels):
+            selection[row, index.search(rf"{category}")] = 1
+        matrices = (selection @ kopecks, selection @ counts)
+    windows = []
+    for matrix in matrices:
+        cumulative = np.zeros((len(labels), days + 1), dtype=np.int64)
+        np.cumsum(matrix, axis=1, out=cumulative[:, 1:])
+        windows.append(cumulative[:, window_days:] - cumulative[:, : days + 1 - window_days])
+    output_days = np.arange(first_day, last_day + np.timedelta64(1, "D")).astype(str)
+    result = pd.DataFrame(
+        {
+            "date": np.tile(output_days, len(labels)),
+            "category": np.repeat(np.array(labels, dtype=object), len(output_days)),
+            "total": (windows[0].ravel() / 100).round(2),
+            "count": windows[1].ravel(),
+        }
+    )
+    logger.debug("Функция успешно завершила свою работу.")
+    return result
 
 
 if __name__ == "__main__":
+    data_from_excel = pd.DataFrame(
+        [
+            {"Дата операции": "01.10.2023 17:53:24", "Сумма операции": -152, "Категория": "Фастфуд"},
+            {"Дата операции": "07.10.2023 17:53:24", "Сумма операции": -47.85, "Категория": "Каршеринг"},
+            {"Дата операции": "15.10.2023 17:53:24", "Сумма операции": -10385, "Категория": "Фастфуд"},
+            {"Дата операции": "07.10.2023 17:53:24", "Сумма операции": -101, "Категория": "Супермаркет"},
+            {"Дата операции": "17.10.2023 17:53:24", "Сумма операции": -52, "Категория": "Супермаркет"},
+            {"Дата операции": "27.10.2023 17:53:24", "Сумма операции": -887.65, "Категория": "Детские товары"},
+            {"Дата операции": "01.10.2023 17:53:24", "Сумма операции": -152, "Категория": "Фастфуд"},
+            {"Дата операции": "07.10.2023 17:53:24", "Сумма операции": -47.85, "Категория": "Каршеринг"},
+            {"Дата операции": "15.10.2023 17:53:24", "Сумма операции": -10385, "Категория": "Фастфуд"},
+            {"Дата операции": "07.10.2023 17:53:24", "Сумма операции": -101, "Категория": "Супермаркет"},
+            {"Дата операции": "17.10.2023 17:53:24", "Сумма операции": -52, "Категория": "Супермаркет"},
+            {"Дата операции": "27.10.2023 17:53:24", "Сумма операции": -887.65, "Категория": "Детские товары"},
+        ]
+    )
     print(spent_by_category(data_from_excel, "Фастфуд", "2023-10-15"))
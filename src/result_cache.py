@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Tuple
+
+from config import RESULT_CACHE_LOGS
+from src.logging_setup import get_logger
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = get_logger(__name__, RESULT_CACHE_LOGS)
+
+DEFAULT_MAX_BYTES = 64 * 2**20
+
+
+def result_size(result: Any) -> int:
+    """Функция возвращает оценку памяти результата в байтах (для DataFrame - с учётом строк)."""
+    memory_usage = getattr(result, "memory_usage", None)
+    if memory_usage is None:
+        return 0
+    return int(memory_usage(deep=True).sum())
+
+
+class ResultCache:
+    """LRU-кэш результатов отчётов с бюджетом памяти max_bytes.
+    Ключ - отпечаток выписки (см. src.indexes.dataset_fingerprint) и нормализованные аргументы,
+    поэтому при изменении данных старые записи просто перестают запрашиваться и вытесняются.
+    Вызывающий код получает копию результата и может изменять её, не затрагивая запись в кэше."""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """Возвращает копию результата по ключу из кэша или вычисляет его через compute и сохраняет.
+        Результат больше всего бюджета не кэшируется."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                cached = entry[0]
+            else:
+                cached = None
+                self.misses += 1
+        if cached is not None:
+            return cached.copy()
+        result = compute()
+        size = result_size(result)
+        if size > self.max_bytes:
+            logger.info(f"Результат {size} байт больше бюджета кэша {self.max_bytes} байт и не сохранён.")
+            return result
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (result, size)
+                self._bytes += size
+                self._evict()
+        return result.copy()
+
+    def _evict(self) -> None:
+        while self._bytes > self.max_bytes:
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+
+    def resize(self, max_bytes: int) -> None:
+        """Меняет бюджет памяти, при уменьшении вытесняя давно не использованные записи."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self) -> None:
+        """Удаляет все записи и обнуляет счётчики."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Возвращает счётчики попаданий, промахов и вытеснений, число записей и занятую память."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
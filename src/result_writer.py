@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import atexit
+import datetime
+import glob
+import gzip
+import itertools
+import os
+import queue
+import threading
+from typing import IO, TYPE_CHECKING, Any, Optional, Tuple
+
+from config import WRITER_LOGS
+from src.json_encoder import write_records_json
+from src.logging_setup import get_logger
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = get_logger(__name__, WRITER_LOGS)
+
+FORMATS = ("json", "ndjson")
+CHUNK_SIZE = 10_000
+
+_queue: "queue.Queue[Any]" = queue.Queue()
+_worker: Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+_counter = itertools.count()
+
+
+def rotated_path(path: str) -> str:
+    """Функция добавляет к имени файла метку времени, номер процесса и порядковый номер вызова в процессе:
+    'log_file.ndjson' -> 'log_file-20240706T104230-12345-000001.ndjson'."""
+    root, extension = os.path.splitext(path)
+    stamp = datetime.datetime.now().strftime("%Y%m%dT%H%M%S")
+    return f"{root}-{stamp}-{os.getpid()}-{next(_counter):06d}{extension}"
+
+
+def _written_at(path: str) -> Tuple[int, str]:
+    try:
+        return os.stat(path).st_mtime_ns, path
+    except FileNotFoundError:
+        return 0, path
+
+
+def _prune(path: str, keep: int) -> None:
+    # Порядок - по времени записи: номера вызовов в разных процессах независимы и по имени не сравниваются.
+    root, extension = os.path.splitext(path)
+    rotated = sorted(glob.glob(f"{glob.escape(root)}-*{extension}*"), key=_written_at)
+    for old_path in rotated[: max(0, len(rotated) - keep)]:
+        try:
+            os.remove(old_path)
+        except FileNotFoundError:
+            pass
+
+
+def _open(path: str, compress: Optional[str]) -> IO[str]:
+    if compress == "gzip":
+        return gzip.open(path, "wt", encoding="utf-8", compresslevel=1)
+    return open(path, "w", encoding="utf-8")
+
+
+def write_result(
+    path: str, result: pd.DataFrame, fmt: str = "json", compress: Optional[str] = None, chunk_size: int = CHUNK_SIZE
+) -> str:
+    """Функция записывает DataFrame в файл и возвращает итоговый путь.
+    fmt='json' - прежний формат (массив записей с отступами), fmt='ndjson' - по записи на строку.
+    DataFrame сериализуется колоночным кодировщиком (src.json_encoder) кусками по chunk_size строк,
+    пустые значения (NaN, NaT) записываются как null.
+    compress='gzip' сжимает файл и добавляет к пути '.gz'."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Неподдерживаемый формат записи: {fmt}!")
+    if compress not in (None, "gzip"):
+        raise ValueError(f"Неподдерживаемое сжатие: {compress}!")
+    if compress == "gzip":
+        path = f"{path}.gz"
+    tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with _open(tmp_path, compress) as file_out:
+        if fmt == "json":
+            write_records_json(result, file_out, indent=4, chunk_size=chunk_size)
+        else:
+            write_records_json(result, file_out, lines=True, chunk_size=chunk_size)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _write_job(
+    path: str, result: pd.DataFrame, fmt: str, compress: Optional[str], base_path: str, keep: Optional[int]
+) -> None:
+    written = write_result(path, result, fmt, compress)
+    logger.info(f"Результат записан в {written}.")
+    if keep is not None:
+        _prune(base_path, keep)
+
+
+def _run_worker() -> None:
+    while True:
+        job = _queue.get()
+        try:
+            _write_job(*job)
+        except Exception:
+            logger.exception(f"Не удалось записать результат в {job[0]}.")
+        finally:
+            _queue.task_done()
+
+
+def submit_result(
+    path: str,
+    result: pd.DataFrame,
+    fmt: str = "json",
+    compress: Optional[str] = None,
+    base_path: Optional[str] = None,
+    keep: Optional[int] = None,
+) -> None:
+    """Функция ставит запись DataFrame в очередь фонового потока-писателя и сразу возвращает управление.
+    DataFrame не копируется, поэтому его нельзя менять на месте до окончания записи (см. flush_results)."""
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_run_worker, name="result-writer", daemon=True)
+            _worker.start()
+    _queue.put((path, result, fmt, compress, base_path or path, keep))
+
+
+def flush_results() -> None:
+    """Функция дожидается записи всех результатов, поставленных в очередь."""
+    _queue.join()
+
+
+def store_result(
+    path: str,
+    result: pd.DataFrame,
+    fmt: str = "json",
+    compress: Optional[str] = None,
+    rotate: bool = False,
+    keep: Optional[int] = None,
+    background: bool = False,
+) -> None:
+    """Функция записывает результат синхронно или через фоновую очередь.
+    При rotate=True каждый вызов пишет в новый файл (см. rotated_path), keep ограничивает число хранимых файлов."""
+    target = rotated_path(path) if rotate else path
+    keep = keep if rotate else None
+    if background:
+        submit_result(target, result, fmt, compress, path, keep)
+    else:
+        _write_job(target, result, fmt, compress, path, keep)
+
+
+atexit.register(flush_results)
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import datetime
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from config import DATA_DIR, SERVER_LOGS
+from src.indexes import category_index, freeze, month_index, operation_dates, time_index
+from src.json_encoder import dumps
+from src.logging_setup import get_logger
+from src.metrics import prometheus_text, snapshot
+from src.reports import spent_by_category, spent_cache
+from src.services import investment_bank
+from src.settings_registry import settings_registry
+from src.utils import STOCK_QUOTE_TTL, reading_excel
+from src.views import refresh_quotes, views
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = get_logger(__name__, SERVER_LOGS)
+
+DEFAULT_FILE = "operations.xls"
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+QUOTE_REFRESH_INTERVAL = STOCK_QUOTE_TTL
+
+
+class StatementStore:
+    """Хранилище выписок, загруженных в память процесса: по файлу - DataFrame и построенные по нему индексы
+    (даты, месяцы, время, категории). Перед каждой выдачей сверяются размер и время изменения файла;
+    если файл изменился, выписка перечитывается (через колоночный кэш reading_excel) и индексы строятся заново.
+    Выписки отмечены src.indexes.freeze и отдаются только на чтение: их нельзя изменять на месте.
+    use_cache=False читает файлы без колоночного кэша (например, для временных каталогов)."""
+
+    def __init__(self, data_dir: str = DATA_DIR, use_cache: bool = True) -> None:
+        self.data_dir = data_dir
+        self.use_cache = use_cache
+        self.reloads = 0
+        self._entries: Dict[str, Tuple[Tuple[int, int], pd.DataFrame]] = {}
+        self._lock = threading.Lock()
+
+    def path(self, file_name: str) -> str:
+        """Возвращает путь к файлу выписки в каталоге данных; пути с каталогами не принимаются."""
+        if not file_name or os.path.basename(file_name) != file_name:
+            raise ValueError("Некорректное название файла!")
+        return os.path.join(self.data_dir, file_name)
+
+    def get(self, file_name: str) -> pd.DataFrame:
+        """Возвращает DataFrame выписки file_name, загружая его при первом обращении или после изменения файла.
+        Если файла нет, вызывает FileNotFoundError."""
+        path = self.path(file_name)
+        stat = os.stat(path)
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        entry = self._entries.get(file_name)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+        with self._lock:
+            entry = self._entries.get(file_name)
+            if entry is not None and entry[0] == stamp:
+                return entry[1]
+            transactions_df = freeze(reading_excel(path, use_cache=self.use_cache))
+            for build_index in (operation_dates, month_index, time_index, category_index):
+                build_index(transactions_df)
+            self._entries[file_name] = (stamp, transactions_df)
+            self.reloads += 1
+            logger.info(f"Выписка {file_name} загружена в память: {len(transactions_df)} транзакций.")
+            return transactions_df
+
+
+def _query(raw_query: str) -> Dict[str, str]:
+    return {key: values[-1] for key, values in parse_qs(raw_query, keep_blank_values=True).items()}
+
+
+def views_endpoint(store: StatementStore, query: Dict[str, str]) -> str:
+    date = query.get("date") or datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return views(date, store.get(query.get("file", DEFAULT_FILE)), user=query.get("user"))
+
+
+def invest_endpoint(store: StatementStore, query: Dict[str, str]) -> str:
+    month = query.get("month") or datetime.date.today().strftime("%Y-%m")
+    try:
+        limit = int(query.get("limit", "50"))
+    except ValueError:
+        raise ValueError("Лимит округления должен быть целым числом!")
+    return investment_bank(month, store.get(query.get("file", DEFAULT_FILE)), limit)
+
+
+def spent_endpoint(store: StatementStore, query: Dict[str, str]) -> str:
+    if "category" not in query:
+        raise ValueError("Не указана категория!")
+    transactions_df = store.get(query.get("file", DEFAULT_FILE))
+    return dumps(spent_by_category(transactions_df, query["category"], query.get("date", "")))
+
+
+def health_endpoint(store: StatementStore, query: Dict[str, str]) -> str:
+    return dumps({"status": "ok", "reloads": store.reloads, "spent_cache": spent_cache.stats()})
+
+
+def metrics_endpoint(store: StatementStore, query: Dict[str, str]) -> str:
+    return prometheus_text()
+
+
+def metrics_json_endpoint(store: StatementStore, query: Dict[str, str]) -> str:
+    return dumps(snapshot())
+
+
+ENDPOINTS: Dict[str, Callable[[StatementStore, Dict[str, str]], str]] = {
+    "/views": views_endpoint,
+    "/invest": invest_endpoint,
+    "/spent": spent_endpoint,
+    "/health": health_endpoint,
+    "/metrics": metrics_endpoint,
+    "/metrics.json": metrics_json_endpoint,
+}
+JSON_CONTENT_TYPE = "application/json; charset=utf-8"
+CONTENT_TYPES = {"/metrics": "text/plain; version=0.0.4; charset=utf-8"}
+
+
+class AnalyticsHandler(BaseHTTPRequestHandler):
+    """Обработчик GET-запросов: путь выбирает отчёт из ENDPOINTS, параметры передаются в строке запроса
+    (те же, что у подкоманд src.main). Ответ - JSON (/metrics - текст Prometheus);
+    ошибка в данных - 400, неизвестный путь или файл - 404."""
+
+    protocol_version = "HTTP/1.1"
+    server: "AnalyticsServer"
+
+    def do_GET(self) -> None:
+        parsed = urlparse(self.path)
+        endpoint = ENDPOINTS.get(parsed.path)
+        if endpoint is None:
+            self._send(404, dumps({"error": f"Неизвестный путь {parsed.path}!"}))
+            return
+        try:
+            body = endpoint(self.server.store, _query(parsed.query))
+        except FileNotFoundError as error:
+            self._send(404, dumps({"error": f"Файл не найден: {os.path.basename(str(error.filename))}!"}))
+        except ValueError as error:
+            self._send(400, dumps({"error": str(error)}))
+        except Exception:
+            logger.exception(f"Ошибка при обработке запроса {self.path}.")
+            self._send(500, dumps({"error": "Внутренняя ошибка сервера!"}))
+        else:
+            self._send(200, body, CONTENT_TYPES.get(parsed.path, JSON_CONTENT_TYPE))
+
+    def _send(self, status: int, body: str, content_type: str = JSON_CONTENT_TYPE) -> None:
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(format % args)
+
+
+class AnalyticsServer(ThreadingHTTPServer):
+    """HTTP-сервер, у которого все потоки-обработчики разделяют одно хранилище выписок."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], store: Optional[StatementStore] = None) -> None:
+        super().__init__(address, AnalyticsHandler)
+        self.store = store or StatementStore()
+
+
+def refresh_quotes_periodically(stop: threading.Event, interval: float = QUOTE_REFRESH_INTERVAL) -> None:
+    """Функция потока обновления: раз в interval секунд запрашивает котировки всех пользователей реестра
+    (каждый символ - один раз), пока не установлен stop."""
+    while True:
+        try:
+            refresh_quotes([None, *settings_registry.users()], deadline=interval)
+        except Exception:
+            logger.exception("Цикл обновления котировок не удался.")
+        if stop.wait(interval):
+            return
+
+
+def serve(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    preload: Optional[str] = DEFAULT_FILE,
+    background_refresh: bool = False,
+) -> None:
+    """Функция запускает сервис и обслуживает запросы до прерывания (Ctrl+C).
+    Выписка preload загружается заранее, чтобы первый запрос не ждал разбора файла.
+    По умолчанию котировки запрашиваются только по запросам /views (устаревшие обновляются в фоне);
+    background_refresh=True включает поток, который раз в QUOTE_REFRESH_INTERVAL секунд запрашивает котировки
+    всех пользователей, даже без запросов к сервису (расходует квоту платных API)."""
+    server = AnalyticsServer((host, port))
+    if preload:
+        try:
+            server.store.get(preload)
+        except (OSError, ValueError):
+            logger.warning(f"Не удалось заранее загрузить выписку {preload}.")
+    logger.info(f"Сервис слушает http://{host}:{server.server_address[1]}.")
+    stop = threading.Event()
+    if background_refresh:
+        threading.Thread(target=refresh_quotes_periodically, args=(stop,), daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
@@ -1,69 +1,140 @@
+from __future__ import annotations
+
 import datetime
-import logging
-from math import ceil, floor
-from typing import Any, Dict, List, Union
+from math import ceil, floor, fsum
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Union, cast
 import json
 
-
 from config import SERVICES_LOGS
+from src.indexes import month_index, parse_dates
+from src.lazy import lazy_import
+from src.logging_setup import get_logger
+from src.metrics import instrumented
+from src.transactions import Transactions, as_frame
 from src.utils import reading_excel
 
-logger = logging.getLogger(__file__)
-logger.setLevel(logging.DEBUG)
-file_handler = logging.FileHandler(SERVICES_LOGS, mode="w")
-file_formatter = logging.Formatter("%(asctime)s - %(filename)s - %(funcName)s - %(levelname)s - %(message)s")
-file_handler.setFormatter(file_formatter)
-logger.addHandler(file_handler)
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+logger = get_logger(__name__, SERVICES_LOGS)
 
 
+@instrumented()
 def limit_payment(limit: int, payment: Union[int, float]) -> int:
     """Функция принимает лимит округления (целое число) и сумму операции (вещественное число),
     возвращает сумму операции, округлённую в соответствии с переданным лимитом (целое число)."""
-    logger.info("Функция начала свою работу.")
+    logger.debug("Функция начала свою работу.")
     if payment < 0:
         payment_with_limit = floor(payment / limit) * limit
     elif payment > 0:
         payment_with_limit = ceil(payment / limit) * limit
-    logger.info("Функция успешно завершила свою работу.")
+    logger.debug("Функция успешно завершила свою работу.")
     return payment_with_limit
 
 
-def date_sorting(month: str, transactions: List[Dict[str, Any]]) -> List[Dict]:
-    """Функция принимает месяц сортировки (строка) и список транзакций (словарей),
-    возвращает отсортированный по переданному месяцу список транзакций (словарей)."""
-    logger.info("Функция начала свою работу.")
-    sorted_transactions_list = []
-    logger.info("Функция обрабатывает переданную дату.")
-    month_of_sorting = datetime.datetime.strptime(month, "%Y-%m").month
-    year_of_sorting = datetime.datetime.strptime(month, "%Y-%m").year
-    logger.info("Функция обрабатывает переданный список транзакций.")
-    for transaction in transactions:
-        month_of_operation = datetime.datetime.strptime(transaction["Дата операции"], "%d.%m.%Y %H:%M:%S").month
-        year_of_operation = datetime.datetime.strptime(transaction["Дата операции"], "%d.%m.%Y %H:%M:%S").year
-        if month_of_sorting == month_of_operation and year_of_sorting == year_of_operation:
-            sorted_transactions_list.append(transaction)
-    logger.info("Функция успешно завершила свою работу.")
-    return sorted_transactions_list
-
-
-def investment_bank(month: str, transactions: List[Dict[str, Any]], limit: int) -> float:
-    """Функция принимает месяц (строка), список транзакций (словарей) и лимит округления (целое число),
-    возвращает сумму (вещественное число), которую удалось бы отложить в Инвесткопилку
+@instrumented()
+def rounding_savings(limit: int, payments: np.ndarray) -> float:
+    """Функция принимает лимит округления и массив сумм операций.
+    Возвращает сумму, которую отложило бы округление всех операций (семантика limit_payment, нули дают 0).
+    Сумма считается через math.fsum, поэтому не зависит от порядка строк."""
+    return fsum(rounding_deltas(limit, np.asarray(payments, dtype=float)).tolist())
+
+
+@instrumented()
+def rounding_deltas(limit: int, payments: np.ndarray) -> np.ndarray:
+    """Функция возвращает массив сумм, которые округление по limit_payment добавило бы к каждой операции."""
+    rounded = np.where(payments < 0, np.floor(payments / limit), np.ceil(payments / limit)) * limit
+    return np.abs(rounded) - np.abs(payments)
+
+
+@instrumented()
+def date_sorting(
+    month: str, transactions: Union[pd.DataFrame, Transactions, List[Dict[str, Any]]]
+) -> Union[pd.DataFrame, Transactions, List[Dict]]:
+    """Функция принимает месяц сортировки (строка) и транзакции (pd.DataFrame, Transactions или список словарей),
+    возвращает отсортированные по переданному месяцу транзакции того же типа.
+    Для DataFrame используется индекс по месяцам (src.indexes.month_index), строки берутся из корзины месяца."""
+    logger.debug("Функция начала свою работу.")
+    logger.debug("Функция обрабатывает переданную дату.")
+    date_of_sorting = datetime.datetime.strptime(month, "%Y-%m")
+    logger.debug("Функция обрабатывает переданный список транзакций.")
+    if isinstance(transactions, (pd.DataFrame, Transactions)):
+        positions = month_index(as_frame(transactions)).lookup(date_of_sorting.year, date_of_sorting.month)
+        logger.debug("Функция успешно завершила свою работу.")
+        if isinstance(transactions, Transactions):
+            return transactions.take(positions)
+        return transactions.iloc[positions]
+    dates = parse_dates([transaction["Дата операции"] for transaction in transactions])
+    month_of_sorting = np.datetime64(date_of_sorting, "M")
+    positions = np.flatnonzero(dates.astype("datetime64[M]") == month_of_sorting)
+    logger.debug("Функция успешно завершила свою работу.")
+    return [transactions[position] for position in positions]
+
+
+@instrumented()
+def investment_bank(
+    month: str, transactions: Union[pd.DataFrame, Transactions, List[Dict[str, Any]]], limit: int
+) -> str:
+    """Функция принимает месяц (строка), транзакции (pd.DataFrame, Transactions или список словарей) и лимит округления
+    (целое число), возвращает JSON-строку с суммой (вещественное число), которую удалось бы отложить в Инвесткопилку
     за указанный месяц при учёте указанного лимита округления."""
-    logger.info("Функция начала свою работу.")
-    investment_result = 0
-    logger.info("Функция обрабатывает переданную дату.")
-    sorted_transactions_by_month = date_sorting(month, transactions)
-    logger.info("Функция обрабатывает переданный список транзакций.")
-    for transaction in sorted_transactions_by_month:
-        rounded_payment = limit_payment(limit, transaction["Сумма операции"])
-        investment_result += abs(rounded_payment) - abs(transaction["Сумма операции"])
-    logger.info("Функция успешно завершила свою работу.")
+    logger.debug("Функция начала свою работу.")
+    transactions = as_frame(transactions)
+    if not isinstance(transactions, pd.DataFrame):
+        transactions = pd.DataFrame(list(transactions), columns=["Дата операции", "Сумма операции"])
+    logger.debug("Функция обрабатывает переданную дату.")
+    sorted_transactions_by_month = cast(pd.DataFrame, date_sorting(month, transactions))
+    logger.debug("Функция обрабатывает переданный список транзакций.")
+    investment_result = rounding_savings(limit, sorted_transactions_by_month["Сумма операции"].to_numpy())
+    logger.debug("Функция успешно завершила свою работу.")
     result = round(float(investment_result), 2)
     result_json = json.dumps(result, ensure_ascii=False)
     return result_json
 
 
+@instrumented()
+def investment_bank_batch(
+    transactions: Union[pd.DataFrame, Transactions, List[Dict[str, Any]]],
+    limits: Iterable[int],
+    months: Optional[Iterable[str]] = None,
+) -> pd.DataFrame:
+    """Функция принимает транзакции (pd.DataFrame, Transactions или список словарей), набор лимитов округления
+    и набор месяцев ('%Y-%m'; по умолчанию - все месяцы, встречающиеся в данных).
+    Возвращает pd.DataFrame (строки - месяцы, колонки - лимиты) с суммами Инвесткопилки,
+    каждая ячейка равна результату investment_bank(month, transactions, limit).
+    Операции всех запрошенных месяцев округляются одним векторным проходом на каждый лимит."""
+    logger.debug("Функция начала свою работу.")
+    transactions = as_frame(transactions)
+    if not isinstance(transactions, pd.DataFrame):
+        transactions = pd.DataFrame(list(transactions), columns=["Дата операции", "Сумма операции"])
+    limits = list(limits)
+    index = month_index(transactions)
+    if months is None:
+        keys = sorted(index.buckets)
+        months = [str(np.datetime64(key, "M")) for key in keys]
+    else:
+        months = list(months)
+        keys = []
+        for month in months:
+            date_of_sorting = datetime.datetime.strptime(month, "%Y-%m")
+            keys.append(index.month_key(date_of_sorting.year, date_of_sorting.month))
+    logger.debug("Функция обрабатывает переданный список транзакций.")
+    ranges = [index.buckets.get(key, (0, 0)) for key in keys]
+    positions = np.concatenate([index.positions[start:stop] for start, stop in ranges] + [np.array([], dtype=int)])
+    payments = transactions["Сумма операции"].to_numpy(dtype=float)[positions]
+    bounds = np.cumsum([0] + [stop - start for start, stop in ranges])
+    result = pd.DataFrame(index=pd.Index(months, name="month"), columns=pd.Index(limits, name="limit"), dtype=float)
+    for limit in limits:
+        deltas = rounding_deltas(limit, payments)
+        result[limit] = [round(fsum(deltas[start:stop].tolist()), 2) for start, stop in zip(bounds[:-1], bounds[1:])]
+    logger.debug("Функция успешно завершила свою работу.")
+    return result
+
+
 if __name__ == "__main__":
     data_from_excel = reading_excel("operations.xls")
-    print(investment_bank("2021-10", data_from_excel.to_dict(orient="records"), 100))
+    print(investment_bank("2021-10", data_from_excel, 100))
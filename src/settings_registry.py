@@ -0,0 +1,100 @@
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config import ROOT_DIR, SETTINGS_LOGS, USERS_DIR
+from src.logging_setup import get_logger
+
+logger = get_logger(__name__, SETTINGS_LOGS)
+
+DEFAULT_SETTINGS = os.path.join(ROOT_DIR, "user_settings.json")
+
+Settings = Tuple[List[str], List[str]]
+
+
+def _symbols(value: Any) -> Tuple[str, ...]:
+    """Возвращает кортеж символов из значения настройки; если это не список строк, вызывает ValueError."""
+    if not isinstance(value, list) or not all(isinstance(symbol, str) for symbol in value):
+        raise ValueError("Ожидается список строк!")
+    return tuple(value)
+
+
+class SettingsRegistry:
+    """Реестр пользовательских настроек: профиль пользователя - файл <пользователь>.json в каталоге settings_dir
+    (формат user_settings.json: user_currencies и user_stocks), пользователь по умолчанию - default_file.
+    Разобранные профили хранятся в памяти и перечитываются, только когда у файла меняются размер или время
+    изменения, поэтому повторные views не читают диск. Профили хранятся кортежами, а каждый вызов получает
+    свои списки, поэтому изменения у вызывающего кода не попадают в реестр."""
+
+    def __init__(self, settings_dir: str = USERS_DIR, default_file: str = DEFAULT_SETTINGS) -> None:
+        self.settings_dir = settings_dir
+        self.default_file = default_file
+        self.loads = 0
+        self._entries: Dict[str, Tuple[Tuple[int, int], Tuple[Tuple[str, ...], Tuple[str, ...]]]] = {}
+        self._lock = threading.Lock()
+
+    def path(self, user: Optional[str] = None) -> str:
+        """Возвращает путь к профилю пользователя (None - пользователь по умолчанию)."""
+        if user is None:
+            return self.default_file
+        if not user or os.path.basename(user) != user or user.startswith("."):
+            raise ValueError("Некорректное имя пользователя!")
+        return os.path.join(self.settings_dir, f"{user}.json")
+
+    def load_file(self, path: str) -> Settings:
+        """Возвращает списки валют и акций из файла настроек, разбирая файл только после его изменения.
+        Если файла нет или он некорректен (user_currencies и user_stocks - не списки строк), вызывает ValueError."""
+        try:
+            stat = os.stat(path)
+            stamp = (stat.st_size, stat.st_mtime_ns)
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == stamp:
+                currencies, stocks = entry[1]
+                return list(currencies), list(stocks)
+            with open(path, "r", encoding="utf-8") as file_in:
+                data = json.load(file_in)
+            currencies, stocks = _symbols(data["user_currencies"]), _symbols(data["user_stocks"])
+        except Exception:
+            logger.error(f"Возникла ошибка при обработке файла пользовательских настроек {path}!")
+            raise ValueError("Возникла ошибка при обработке файла пользовательских настроек!")
+        with self._lock:
+            self._entries[path] = (stamp, (currencies, stocks))
+            self.loads += 1
+        return list(currencies), list(stocks)
+
+    def get(self, user: Optional[str] = None) -> Settings:
+        """Возвращает списки валют и акций пользователя."""
+        return self.load_file(self.path(user))
+
+    def users(self) -> List[str]:
+        """Возвращает имена пользователей, у которых есть профиль в settings_dir."""
+        try:
+            names = os.listdir(self.settings_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(name[: -len(".json")] for name in names if name.endswith(".json") and not name.startswith("."))
+
+    def symbols(self, users: Iterable[Optional[str]]) -> Settings:
+        """Возвращает объединение валют и акций пользователей (каждый символ один раз, в порядке появления).
+        Пользователи без корректного профиля пропускаются."""
+        currencies: Dict[str, None] = {}
+        stocks: Dict[str, None] = {}
+        for user in users:
+            try:
+                user_currencies, user_stocks = self.get(user)
+            except ValueError:
+                logger.warning(f"Профиль пользователя {user} пропущен.")
+                continue
+            currencies.update(dict.fromkeys(user_currencies))
+            stocks.update(dict.fromkeys(user_stocks))
+        return list(currencies), list(stocks)
+
+    def clear(self) -> None:
+        """Забывает все разобранные профили."""
+        with self._lock:
+            self._entries.clear()
+            self.loads = 0
+
+
+settings_registry = SettingsRegistry()
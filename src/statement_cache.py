@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from config import CACHE_DIR, CACHE_LOGS
+from src.lazy import lazy_import
+from src.logging_setup import get_logger
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+logger = get_logger(__name__, CACHE_LOGS)
+
+CACHE_VERSION = 1
+META_FILE = "meta.json"
+
+
+def file_fingerprint(file_path: str) -> Dict[str, Any]:
+    """Функция принимает путь к файлу выписки.
+    Возвращает словарь-ключ кэша: абсолютный путь, размер, время изменения и sha256 содержимого."""
+    stat = os.stat(file_path)
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file_in:
+        for chunk in iter(lambda: file_in.read(1 << 20), b""):
+            digest.update(chunk)
+    return {
+        "path": os.path.abspath(file_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": digest.hexdigest(),
+    }
+
+
+def cache_path(file_path: str, cache_dir: str = CACHE_DIR) -> str:
+    """Функция возвращает путь к каталогу кэша для переданного файла выписки."""
+    abs_path = os.path.abspath(file_path)
+    name = os.path.basename(abs_path)
+    path_hash = hashlib.sha1(abs_path.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{name}-{path_hash}")
+
+
+def _read_meta(entry_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(entry_dir, META_FILE), "r", encoding="utf-8") as file_in:
+            meta: Dict[str, Any] = json.load(file_in)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != CACHE_VERSION:
+        return None
+    return meta
+
+
+def prune_stale(cache_dir: str = CACHE_DIR) -> int:
+    """Функция удаляет из каталога кэша записи, файл-источник которых больше не существует
+    (например, выписки из удалённых временных каталогов). Возвращает число удалённых записей."""
+    try:
+        names = os.listdir(cache_dir)
+    except OSError:
+        return 0
+    removed = 0
+    for name in names:
+        entry_dir = os.path.join(cache_dir, name)
+        meta = _read_meta(entry_dir)
+        source_path = meta and meta.get("source", {}).get("path")
+        if not source_path or os.path.exists(source_path):
+            continue
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        removed += 1
+    if removed:
+        logger.info(f"Из кэша {cache_dir} удалено устаревших записей: {removed}.")
+    return removed
+
+
+def _is_string_column(column: pd.Series) -> bool:
+    values = column.dropna()
+    return all(isinstance(value, str) for value in values)
+
+
+def save_statement(df: pd.DataFrame, fingerprint: Dict[str, Any], cache_dir: str = CACHE_DIR) -> bool:
+    """Функция записывает DataFrame выписки в колоночный кэш (по .npy-файлу на колонку).
+    Строковые колонки хранятся словарным кодированием: коды int32 + список уникальных значений.
+    Возвращает True, если кэш записан, и False, если DataFrame не поддерживается форматом.
+    После записи удаляет записи кэша, чьих файлов-источников больше нет (см. prune_stale)."""
+    entry_dir = cache_path(fingerprint["path"], cache_dir)
+    tmp_dir = f"{entry_dir}.tmp-{os.getpid()}"
+    columns_meta: List[Dict[str, Any]] = []
+    os.makedirs(tmp_dir, exist_ok=True)
+    try:
+        for position, name in enumerate(df.columns):
+            column = df[name]
+            file_name = f"col_{position}.npy"
+            if column.dtype == object:
+                if not _is_string_column(column):
+                    logger.warning(f"Колонка {name} содержит нестроковые объекты, кэш не записан.")
+                    return False
+                codes, uniques = pd.factorize(column, use_na_sentinel=True)
+                np.save(os.path.join(tmp_dir, file_name), codes.astype(np.int32))
+                columns_meta.append(
+                    {"name": name, "kind": "dict", "file": file_name, "categories": [str(u) for u in uniques]}
+                )
+            else:
+                values = column.to_numpy()
+                if values.dtype == object:
+                    logger.warning(f"Колонка {name} не приводится к numpy-типу, кэш не записан.")
+                    return False
+                np.save(os.path.join(tmp_dir, file_name), values)
+                columns_meta.append({"name": name, "kind": "array", "file": file_name})
+        meta = {"version": CACHE_VERSION, "source": fingerprint, "rows": len(df), "columns": columns_meta}
+        with open(os.path.join(tmp_dir, META_FILE), "w", encoding="utf-8") as file_out:
+            json.dump(meta, file_out, ensure_ascii=False)
+        if os.path.exists(entry_dir):
+            shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(tmp_dir, entry_dir)
+        logger.info(f"Кэш выписки записан в {entry_dir}.")
+        prune_stale(cache_dir)
+        return True
+    finally:
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _load_entry(entry_dir: str, meta: Dict[str, Any]) -> pd.DataFrame:
+    data = {}
+    for column_meta in meta["columns"]:
+        values = np.load(os.path.join(entry_dir, column_meta["file"]), mmap_mode="r")
+        if column_meta["kind"] == "dict":
+            lookup = np.empty(len(column_meta["categories"]) + 1, dtype=object)
+            lookup[:-1] = column_meta["categories"]
+            lookup[-1] = np.nan
+            data[column_meta["name"]] = lookup[values]
+        else:
+            data[column_meta["name"]] = values
+    return pd.DataFrame(data, columns=[column_meta["name"] for column_meta in meta["columns"]])
+
+
+def load_statement(file_path: str, cache_dir: str = CACHE_DIR) -> Optional[pd.DataFrame]:
+    """Функция принимает путь к файлу выписки.
+    Возвращает DataFrame из кэша (колонки читаются через memory-map) или None, если кэша нет или он устарел.
+    Если у файла изменилось только время модификации, а содержимое то же, ключ кэша обновляется без перечитывания."""
+    entry_dir = cache_path(file_path, cache_dir)
+    meta = _read_meta(entry_dir)
+    if meta is None:
+        return None
+    fingerprint = file_fingerprint(file_path)
+    source = meta["source"]
+    if source["size"] != fingerprint["size"] or source["sha256"] != fingerprint["sha256"]:
+        logger.info(f"Кэш {entry_dir} устарел.")
+        return None
+    if source["mtime_ns"] != fingerprint["mtime_ns"]:
+        meta["source"] = fingerprint
+        with open(os.path.join(entry_dir, META_FILE), "w", encoding="utf-8") as file_out:
+            json.dump(meta, file_out, ensure_ascii=False)
+    try:
+        return _load_entry(entry_dir, meta)
+    except (OSError, ValueError, KeyError):
+        logger.warning(f"Кэш {entry_dir} повреждён.")
+        return None
+
+
+def read_statement(file_path: str, cache_dir: str = CACHE_DIR) -> pd.DataFrame:
+    """Функция принимает путь к файлу выписки (xls/xlsx).
+    Возвращает DataFrame из кэша, а при его отсутствии или устаревании разбирает файл и пересобирает кэш."""
+    cached = load_statement(file_path, cache_dir)
+    if cached is not None:
+        logger.info(f"Выписка {file_path} загружена из кэша.")
+        return cached
+    fingerprint = file_fingerprint(file_path)
+    transactions_df = pd.read_excel(file_path)
+    try:
+        save_statement(transactions_df, fingerprint, cache_dir)
+    except OSError:
+        logger.warning(f"Не удалось записать кэш для {file_path}.")
+    return transactions_df
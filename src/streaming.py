@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import json
+import os
+from math import fsum
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, cast
+
+from config import DATA_DIR, STREAMING_LOGS
+from src.indexes import parse_dates
+from src.lazy import lazy_import
+from src.logging_setup import get_logger
+from src.reports import date_window, filtered_by_category
+from src.services import rounding_deltas
+from src.utils import top_positions
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+logger = get_logger(__name__, STREAMING_LOGS)
+
+CHUNK_SIZE = 100_000
+
+
+def _excel_number(value: float) -> Any:
+    """Числа в Excel всегда вещественные; целые приводятся к int так же, как это делает pd.read_excel."""
+    return int(value) if value == int(value) else value
+
+
+def _iter_xls_rows(file_path: str) -> Iterator[List[Any]]:
+    import xlrd  # type: ignore[import-untyped]
+
+    book = xlrd.open_workbook(file_path, on_demand=True)
+    try:
+        sheet = book.sheet_by_index(0)
+        for row_number in range(sheet.nrows):
+            row = []
+            for cell in sheet.row(row_number):
+                if cell.ctype == xlrd.XL_CELL_NUMBER:
+                    row.append(_excel_number(cell.value))
+                elif cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK):
+                    row.append(np.nan)
+                elif cell.ctype == xlrd.XL_CELL_BOOLEAN:
+                    row.append(bool(cell.value))
+                else:
+                    row.append(cell.value)
+            yield row
+    finally:
+        book.release_resources()
+
+
+def _iter_xlsx_rows(file_path: str) -> Iterator[List[Any]]:
+    from openpyxl import load_workbook  # type: ignore[import-untyped]
+
+    book = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        for row in book.worksheets[0].iter_rows(values_only=True):
+            yield [np.nan if value is None else value for value in row]
+    finally:
+        book.close()
+
+
+def _chunk_rows(rows: Iterator[List[Any]], chunk_size: int) -> Iterator[pd.DataFrame]:
+    header = next(rows, None)
+    if header is None:
+        return
+    chunk: List[List[Any]] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield pd.DataFrame(chunk, columns=header)
+            chunk = []
+    if chunk:
+        yield pd.DataFrame(chunk, columns=header)
+
+
+def iter_statement_chunks(
+    file_name: str, chunk_size: int = CHUNK_SIZE, **read_csv_kwargs: Any
+) -> Iterator[pd.DataFrame]:
+    """Генератор принимает название файла выписки (xls, xlsx или csv) в каталоге data (или полный путь)
+    и размер порции. Возвращает DataFrame-порции не длиннее chunk_size строк.
+    Для xlsx и csv файл читается потоково (openpyxl read_only / pd.read_csv chunksize), пиковая память
+    ограничена одной порцией; xlrd разбирает лист .xls целиком, но строки DataFrame создаются порциями.
+    Типы колонок определяются по каждой порции отдельно; дополнительные параметры передаются в pd.read_csv."""
+    file_with_dir = os.path.join(DATA_DIR, file_name)
+    extension = os.path.splitext(file_name)[1].lower()
+    logger.debug("Функция начала свою работу.")
+    if extension == ".csv":
+        yield from pd.read_csv(file_with_dir, chunksize=chunk_size, **read_csv_kwargs)
+    elif extension == ".xls":
+        yield from _chunk_rows(_iter_xls_rows(file_with_dir), chunk_size)
+    elif extension == ".xlsx":
+        yield from _chunk_rows(_iter_xlsx_rows(file_with_dir), chunk_size)
+    else:
+        logger.error("Неподдерживаемый формат файла!")
+        raise ValueError("Неподдерживаемый формат файла!")
+    logger.debug("Функция успешно завершила свою работу.")
+
+
+def card_info_stream(chunks: Iterable[pd.DataFrame]) -> List[Dict]:
+    """Функция принимает порции транзакций и возвращает то же, что card_info для всей выписки:
+    суммы по картам накапливаются по порциям, карты идут в порядке первого появления."""
+    expenditure_by_card: Dict[str, float] = {}
+    for chunk in chunks:
+        totals = chunk.groupby("Номер карты", sort=False)["Сумма операции"].sum()
+        for card_num, total in zip(totals.index, totals.tolist()):
+            expenditure_by_card[card_num] = expenditure_by_card.get(card_num, 0) + total
+    return [
+        {"last_digits": card_num[1:], "total_spent": round(total, 2), "cashback": round(total / 100, 2)}
+        for card_num, total in expenditure_by_card.items()
+    ]
+
+
+def investment_bank_stream(month: str, chunks: Iterable[pd.DataFrame], limit: int) -> str:
+    """Функция принимает месяц ('%Y-%m'), порции транзакций и лимит округления.
+    Возвращает то же, что investment_bank для всей выписки; в памяти хранятся только округления операций месяца."""
+    month_of_sorting = np.datetime64(month, "M")
+    deltas: List[float] = []
+    for chunk in chunks:
+        dates = parse_dates(chunk["Дата операции"])
+        payments = chunk["Сумма операции"].to_numpy(dtype=float)[dates.astype("datetime64[M]") == month_of_sorting]
+        deltas.extend(rounding_deltas(limit, payments).tolist())
+    return json.dumps(round(fsum(deltas), 2), ensure_ascii=False)
+
+
+def top_transactions_stream(
+    chunks: Iterable[pd.DataFrame],
+    n: int = 5,
+    key: str = "Сумма операции",
+    by_abs: bool = True,
+    largest: bool = True,
+) -> List[Dict]:
+    """Функция принимает порции транзакций и возвращает то же, что top_transactions для всей выписки
+    (включая правило разрешения равенств по позиции строки). Между порциями хранится не более n кандидатов."""
+    if n <= 0:
+        return []
+    candidates: Optional[pd.DataFrame] = None
+    candidate_values = np.array([], dtype=float)
+    candidate_positions = np.array([], dtype=np.int64)
+    offset = 0
+    for chunk in chunks:
+        values = chunk[key].to_numpy(dtype=float)
+        if by_abs:
+            values = np.abs(values)
+        local = top_positions(values, n, largest)
+        merged = chunk.iloc[local] if candidates is None else pd.concat([candidates, chunk.iloc[local]])
+        merged_values = np.concatenate([candidate_values, values[local]])
+        merged_positions = np.concatenate([candidate_positions, local + offset])
+        order = np.lexsort((merged_positions, merged_values))
+        order = order[-n:] if largest else order[:n]
+        candidates = merged.iloc[order]
+        candidate_values, candidate_positions = merged_values[order], merged_positions[order]
+        offset += len(chunk)
+    return [] if candidates is None else candidates.to_dict(orient="records")
+
+
+def spent_by_category_stream(chunks: Iterable[pd.DataFrame], category: str, date: str = "") -> pd.DataFrame:
+    """Функция принимает порции транзакций, категорию и дату.
+    Возвращает те же строки, что spent_by_category для всей выписки; в памяти копится только результат."""
+    start, end = (np.datetime64(bound, "ns") for bound in date_window(date))
+    parts: List[pd.DataFrame] = []
+    columns = None
+    for chunk in chunks:
+        columns = chunk.columns
+        dates = parse_dates(chunk["Дата операции"])
+        window = chunk.loc[(dates >= start) & (dates <= end) & chunk["Категория"].notnull().to_numpy()]
+        if len(window):
+            parts.append(cast(pd.DataFrame, filtered_by_category(category, window)))
+    if not parts:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(parts).reset_index(drop=True)
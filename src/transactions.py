@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Union, cast
+
+from config import TRANSACTIONS_LOGS
+from src.indexes import freeze
+from src.lazy import lazy_import
+from src.logging_setup import get_logger
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+logger = get_logger(__name__, TRANSACTIONS_LOGS)
+
+
+def _is_string_column(column: pd.Series) -> bool:
+    return column.dtype == object and all(isinstance(value, str) for value in column.dropna())
+
+
+def compact_frame(transactions_df: pd.DataFrame) -> pd.DataFrame:
+    """Функция принимает DataFrame выписки и возвращает его компактную копию:
+    строковые колонки (карты, категории, валюты, описания, даты) хранятся как pd.Categorical -
+    коды int8/int16/int32 и по одной строке на уникальное значение; числовые колонки не меняются."""
+    data = {}
+    for name in transactions_df.columns:
+        column = transactions_df[name]
+        data[name] = column.astype("category") if _is_string_column(column) else column
+    return pd.DataFrame(data, columns=transactions_df.columns, index=pd.RangeIndex(len(transactions_df)))
+
+
+class TransactionRecord(Mapping):
+    """Представление одной транзакции в виде словаря только для чтения (ключи - названия колонок выписки).
+    Значения берутся из колонок Transactions при обращении, сами словари не создаются."""
+
+    __slots__ = ("_table", "_position")
+
+    def __init__(self, table: "Transactions", position: int) -> None:
+        self._table = table
+        self._position = position
+
+    def __getitem__(self, key: str) -> Any:
+        return self._table.value(key, self._position)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table.columns)
+
+    def __len__(self) -> int:
+        return len(self._table.columns)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class Transactions:
+    """Компактная выписка: колонки-массивы, строки словарно закодированы (pd.Categorical).
+    Принимается напрямую функциями src.utils, src.services и src.reports вместо DataFrame или списка словарей.
+    Для совместимости доступен вид 'список словарей': итерация и индексация дают TransactionRecord,
+    records() - обычные словари, как DataFrame.to_dict(orient='records').
+    Выписка неизменяема: frame отмечается src.indexes.freeze, поэтому индексы по нему строятся один раз."""
+
+    __slots__ = ("frame", "_columns")
+
+    def __init__(self, frame: pd.DataFrame) -> None:
+        self.frame = freeze(frame)
+        self._columns: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_frame(cls, transactions_df: pd.DataFrame) -> "Transactions":
+        """Создаёт компактную выписку из DataFrame (см. compact_frame)."""
+        transactions = cls(compact_frame(transactions_df))
+        logger.info(f"Компактная выписка: {len(transactions)} транзакций, {transactions.memory_usage()} байт.")
+        return transactions
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "Transactions":
+        """Создаёт компактную выписку из списка словарей-транзакций."""
+        return cls.from_frame(pd.DataFrame(list(records)))
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.frame.columns)
+
+    def _column_values(self) -> Dict[str, Any]:
+        if self._columns is None:
+            columns: Dict[str, Any] = {}
+            for name in self.frame.columns:
+                column = self.frame[name]
+                if isinstance(column.dtype, pd.CategoricalDtype):
+                    lookup = np.empty(len(column.cat.categories) + 1, dtype=object)
+                    lookup[:-1] = column.cat.categories.to_numpy(dtype=object)
+                    lookup[-1] = np.nan
+                    columns[name] = (column.cat.codes.to_numpy(), lookup)
+                else:
+                    columns[name] = (column.to_numpy(), None)
+            self._columns = columns
+        return self._columns
+
+    def value(self, column: str, position: int) -> Any:
+        """Возвращает значение колонки column в строке position (строка, число Python или nan)."""
+        values, lookup = self._column_values()[column]
+        if lookup is not None:
+            return lookup[values[position]]
+        value = values[position]
+        return value.item() if isinstance(value, np.generic) else value
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[TransactionRecord, "Transactions"]:
+        if isinstance(key, slice):
+            return self.take(np.arange(len(self))[key])
+        position = key + len(self) if key < 0 else key
+        if not 0 <= position < len(self):
+            raise IndexError("Номер транзакции вне диапазона!")
+        return TransactionRecord(self, position)
+
+    def __iter__(self) -> Iterator[TransactionRecord]:
+        for position in range(len(self)):
+            yield TransactionRecord(self, position)
+
+    def take(self, positions: Any) -> "Transactions":
+        """Возвращает компактную выписку из строк с переданными позициями."""
+        return Transactions(self.frame.iloc[positions].reset_index(drop=True))
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Возвращает транзакции списком обычных словарей."""
+        # Колонки выписки - строки, поэтому ключи записей тоже строки.
+        return cast(List[Dict[str, Any]], self.frame.to_dict(orient="records"))
+
+    def memory_usage(self) -> int:
+        """Возвращает объём памяти колонок в байтах (включая строки словарей категорий)."""
+        return int(self.frame.memory_usage(deep=True, index=False).sum())
+
+
+def as_frame(transactions: Any) -> Any:
+    """Функция возвращает DataFrame компактной выписки, остальные типы транзакций - без изменений."""
+    return transactions.frame if isinstance(transactions, Transactions) else transactions
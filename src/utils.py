@@ -1,30 +1,43 @@
+from __future__ import annotations
+
 import datetime
-import json
-import logging
+import heapq
 import os
-from collections import defaultdict
-from typing import Any, Dict, List, Tuple
-
-import pandas as pd
-import requests
-from dotenv import load_dotenv
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple, Union, cast
 
 from config import DATA_DIR, ROOT_DIR, UTILS_LOGS
+from src.indexes import freeze
+from src.lazy import lazy_import
+from src.logging_setup import get_logger
+from src.metrics import instrumented
+from src.quote_cache import QuoteCache
+from src.settings_registry import settings_registry
+from src.statement_cache import read_statement
+from src.transactions import Transactions, as_frame
 
-logger = logging.getLogger(__file__)
-logger.setLevel(logging.DEBUG)
-file_handler = logging.FileHandler(UTILS_LOGS, mode="w")
-file_formatter = logging.Formatter("%(asctime)s - %(filename)s - %(funcName)s - %(levelname)s - %(message)s")
-file_handler.setFormatter(file_formatter)
-logger.addHandler(file_handler)
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+    import requests
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+    requests = lazy_import("requests")
 
+logger = get_logger(__name__, UTILS_LOGS)
 
+
+@instrumented()
 def greetings(date_string: str) -> str:
     """Функция принимает время в строке в формате '%Y-%m-%d %H:%M:%S',
     возвращает приветствие в зависимости от времени суток."""
-    logger.info("Функция начала свою работу.")
+    logger.debug("Функция начала свою работу.")
     try:
-        logger.info("Функция начала обработку введённых данных.")
+        logger.debug("Функция начала обработку введённых данных.")
         date_object = datetime.datetime.strptime(date_string, "%Y-%m-%d %H:%M:%S")
         time_for_greeting = date_object.time()
         greetings_dict = {
@@ -39,118 +52,313 @@ def greetings(date_string: str) -> str:
             time_start = datetime.datetime.strptime(start, "%H:%M:%S").time()
             time_end = datetime.datetime.strptime(end, "%H:%M:%S").time()
             if time_start <= time_for_greeting <= time_end:
-                logger.info("Функция успешно завершила свою работу.")
+                logger.debug("Функция успешно завершила свою работу.")
                 return greetings_dict[greeting][0]
     except Exception:
         logger.error("Введены некорректные данные!")
         raise ValueError("Введены некорректные данные!")
 
 
-def reading_excel(file_name: str) -> List[Dict]:
-    """Функция название файла excel, возвращает DataFrame."""
-    logger.info("Функция начала свою работу.")
+@instrumented()
+def reading_excel(file_name: str, use_cache: bool = True) -> pd.DataFrame:
+    """Функция название файла excel, возвращает DataFrame.
+    По умолчанию разобранная выписка кэшируется в колоночном виде (см. src.statement_cache)
+    и при повторных вызовах читается из кэша, пока файл не изменится.
+    Возвращаемый DataFrame отмечен src.indexes.freeze (индексы и отпечаток по нему считаются один раз),
+    поэтому изменять его на месте нельзя: для изменений нужна копия (.copy())."""
+    logger.debug("Функция начала свою работу.")
     if file_name.endswith("xls") or file_name.endswith("xlsx"):
-        logger.info("Функция начала обработку введённого файла.")
+        logger.debug("Функция начала обработку введённого файла.")
         file_with_dir = os.path.join(DATA_DIR, file_name)
-        transactions_df = pd.read_excel(file_with_dir)
+        if use_cache and os.path.isfile(file_with_dir):
+            transactions_df = read_statement(file_with_dir)
+        else:
+            transactions_df = pd.read_excel(file_with_dir)
         # result = transactions_df.to_dict(orient="records")
-        logger.info("Функция успешно завершила свою работу.")
+        logger.debug("Функция успешно завершила свою работу.")
         # return result
-        return transactions_df
+        return freeze(transactions_df)
     else:
         logger.error("Неподдерживаемый формат файла!")
         raise ValueError("Неподдерживаемый формат файла!")
 
 
-def card_info(transactions: List[Dict]) -> List[Dict]:
-    """Функция принимает список транзакций(словарей).
+@instrumented()
+def card_info(transactions: Union[pd.DataFrame, Transactions, List[Dict]]) -> List[Dict]:
+    """Функция принимает транзакции (pd.DataFrame, Transactions или список словарей).
     Возвращает список словарей с информацией по каждой карте: последние 4 цифры номера карты,
-    общая сумма расходов, кэшбек (1 рубль на каждые 100 рублей)."""
-    logger.info("Функция начала свою работу.")
-    unique_card_nums = list(set([transaction["Номер карты"] for transaction in transactions]))
-    expenditure_by_card = defaultdict(int)
-    logger.info("Функция обрабатывает данные транзакций.")
-    for card_num in unique_card_nums:
-        for transaction in transactions:
-            if transaction["Номер карты"] == card_num:
-                expenditure_by_card[card_num] += transaction["Сумма операции"]
+    общая сумма расходов, кэшбек (1 рубль на каждые 100 рублей).
+    Суммы по картам считаются одной группировкой по колонке 'Номер карты',
+    карты идут в порядке первого появления, транзакции без номера карты пропускаются."""
+    logger.debug("Функция начала свою работу.")
+    transactions = as_frame(transactions)
+    if not isinstance(transactions, pd.DataFrame):
+        transactions = pd.DataFrame(list(transactions), columns=["Номер карты", "Сумма операции"])
+    logger.debug("Функция обрабатывает данные транзакций.")
+    expenditure_by_card = transactions.groupby("Номер карты", sort=False, observed=True)["Сумма операции"].sum()
     result_transaction_list = []
-    logger.info("Функция формирует итоговый результат.")
-    for item in expenditure_by_card:
+    logger.debug("Функция формирует итоговый результат.")
+    for card_num, total in zip(expenditure_by_card.index, expenditure_by_card.tolist()):
         result_transaction_list.append(
             {
-                "last_digits": item[1:],
-                "total_spent": round(expenditure_by_card[item], 2),
-                "cashback": round(expenditure_by_card[item] / 100, 2),
+                "last_digits": card_num[1:],
+                "total_spent": round(total, 2),
+                "cashback": round(total / 100, 2),
             }
         )
-    logger.info("Функция успешно завершила свою работу.")
+    logger.debug("Функция успешно завершила свою работу.")
     return result_transaction_list
 
 
-def top_five_transactions(transactions: List[Dict]) -> List[Dict]:
-    """Функция принимает список транзакций(словарей).
-    Возвращает список словарей с топ-пятью транзакциями по сумме операции."""
-    logger.info("Функция начала свою работу.")
-    sorted_transactions_list = sorted(transactions, key=lambda x: abs(x["Сумма операции"]))
-    logger.info("Функция успешно завершила свою работу.")
-    return sorted_transactions_list[-5:]
+@instrumented()
+def top_positions(values: np.ndarray, n: int, largest: bool) -> np.ndarray:
+    """Функция возвращает позиции n лучших значений массива в порядке стабильной сортировки по возрастанию.
+    Для largest=True это хвост стабильной сортировки, для largest=False - её начало."""
+    positions = np.flatnonzero(~np.isnan(values))
+    values = values[positions]
+    if n < len(values):
+        kth = len(values) - n if largest else n - 1
+        threshold = np.partition(values, kth)[kth]
+        if largest:
+            strict = np.flatnonzero(values > threshold)
+            ties = np.flatnonzero(values == threshold)[len(strict) - n :]
+        else:
+            strict = np.flatnonzero(values < threshold)
+            ties = np.flatnonzero(values == threshold)[: n - len(strict)]
+        selected = np.concatenate([strict, ties])
+        positions, values = positions[selected], values[selected]
+    order = np.lexsort((positions, values))
+    return positions[order]
+
+
+def sort_value(value: Any) -> Optional[float]:
+    """Функция приводит значение колонки сортировки к float так же, как pd.to_numeric(..., errors="coerce").
+    Для пустых и нечисловых значений (None, NaN, pd.NA, NaT, 'abc') возвращает None."""
+    if value is None:
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if number != number else number
+
+
+@instrumented()
+def top_transactions(
+    transactions: Union[pd.DataFrame, Transactions, Iterable[Dict]],
+    n: int = 5,
+    key: str = "Сумма операции",
+    by_abs: bool = True,
+    largest: bool = True,
+) -> List[Dict]:
+    """Функция принимает транзакции (pd.DataFrame, Transactions или любой итерируемый объект словарей,
+    в т.ч. генератор), количество n, колонку сортировки key, флаг сравнения по модулю by_abs и направление largest.
+    Возвращает список из n транзакций (словарей) с наибольшими (или наименьшими) значениями key.
+    Результат совпадает со срезом стабильной сортировки по возрастанию: при равных значениях
+    среди наибольших побеждают более поздние строки, среди наименьших - более ранние.
+    Транзакции с пустым или нечисловым значением key не учитываются.
+    Отбор частичный: np.partition для DataFrame (O(n)) и куча на n элементов для потока (O(n log N))."""
+    logger.debug("Функция начала свою работу.")
+    if n <= 0:
+        return []
+    transactions = as_frame(transactions)
+    if isinstance(transactions, pd.DataFrame):
+        values = pd.to_numeric(transactions[key], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        if by_abs:
+            values = np.abs(values)
+        positions = top_positions(values, n, largest)
+        logger.debug("Функция успешно завершила свою работу.")
+        return cast(List[Dict], transactions.iloc[positions].to_dict(orient="records"))
+    candidates: List[Tuple[Tuple[float, int], Any]] = []
+    for position, transaction in enumerate(transactions):
+        value = sort_value(transaction[key])
+        if value is None:
+            continue
+        value = abs(value) if by_abs else value
+        candidates_key = (value, position) if largest else (-value, -position)
+        if len(candidates) < n:
+            heapq.heappush(candidates, (candidates_key, transaction))
+        elif candidates_key > candidates[0][0]:
+            heapq.heapreplace(candidates, (candidates_key, transaction))
+    candidates.sort(key=lambda item: item[0], reverse=not largest)
+    logger.debug("Функция успешно завершила свою работу.")
+    return [transaction for _, transaction in candidates]
 
 
+@instrumented()
+def top_five_transactions(transactions: Union[pd.DataFrame, Transactions, Iterable[Dict]]) -> List[Dict]:
+    """Функция принимает транзакции (pd.DataFrame, Transactions или список словарей).
+    Возвращает список словарей с топ-пятью транзакциями по модулю суммы операции (по возрастанию)."""
+    return top_transactions(transactions, 5)
+
+
+@instrumented()
 def json_loader(file_name: str = "user_settings.json") -> Tuple[Any, Any]:
     """Функция может принимать название json-файла пользовательских настроек
     (по-умолчанию задано 'user_settings.json'), который расположен в корне проекта.
     Обрабатывает json-файл пользовательских настроек.
-    Возвращает кортеж списков валют и акций."""
-    logger.info("Функция начала свою работу.")
+    Возвращает кортеж списков валют и акций.
+    Файл разбирается через settings_registry и перечитывается, только когда он изменился."""
+    logger.debug("Функция начала свою работу.")
     file_with_dir = os.path.join(ROOT_DIR, file_name)
     try:
-        with open(file_with_dir, "r", encoding="utf-8") as file_in:
-            data = json.load(file_in)
-            logger.info("Функция успешно завершила свою работу.")
-            return data["user_currencies"], data["user_stocks"]
-    except Exception:
+        settings = settings_registry.load_file(file_with_dir)
+    except ValueError:
         logger.error("Возникла ошибка при обработке файла пользовательских настроек!")
-        raise ValueError("Возникла ошибка при обработке файла пользовательских настроек!")
+        raise
+    logger.debug("Функция успешно завершила свою работу.")
+    return settings
+
+
+CURRENCY_API_URL = "https://api.apilayer.com/exchangerates_data"
+STOCK_API_URL = "https://www.alphavantage.co/query"
+HTTP_POOL_SIZE = 10
+HTTP_MAX_WORKERS = 5
+HTTP_TIMEOUT = 5
+CURRENCY_QUOTE_TTL = 3600
+STOCK_QUOTE_TTL = 300
+
+currency_cache = QuoteCache("currency", ttl=CURRENCY_QUOTE_TTL)
+stock_cache = QuoteCache("stock", ttl=STOCK_QUOTE_TTL)
+
+_session = None
+_session_lock = threading.Lock()
+
 
+@lru_cache(maxsize=None)
+def load_environment() -> None:
+    """Функция один раз за процесс загружает переменные окружения из .env."""
+    from dotenv import load_dotenv
 
-def currency_rates(users_currencies: List) -> List[Dict[str, Any]]:
-    """Функция принимает список валют. Возвращает курс валют, полученный через API."""
-    logger.info("Функция начала свою работу.")
+    load_dotenv()
+
+
+def get_session() -> requests.Session:
+    """Функция возвращает общую для модуля requests.Session с пулом keep-alive соединений
+    (до HTTP_POOL_SIZE соединений на хост). Сессия создаётся при первом обращении."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def fetch_concurrently(
+    fetch: Callable[[Any], Any], symbols: List, max_workers: int = HTTP_MAX_WORKERS, deadline: Optional[float] = None
+) -> List[Any]:
+    """Функция принимает функцию запроса по одному символу, список символов, лимит параллельных запросов
+    и общий дедлайн в секундах. Выполняет запросы параллельно и возвращает результаты в порядке символов.
+    Если дедлайн истёк или какой-либо запрос упал, выбрасывается исключение, незапущенные запросы отменяются."""
+    symbols = list(symbols)
+    if not symbols:
+        return []
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(symbols))))
     try:
-        result_currency_list = []
-        load_dotenv()
+        futures = [executor.submit(fetch, symbol) for symbol in symbols]
+        done, not_done = wait(futures, timeout=deadline, return_when=FIRST_EXCEPTION)
+        if not_done:
+            for future in done:
+                future.result()
+            raise TimeoutError("Истёк общий дедлайн запросов!")
+        return [future.result() for future in futures]
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+@instrumented()
+def currency_rates(
+    users_currencies: List,
+    max_workers: int = HTTP_MAX_WORKERS,
+    timeout: float = HTTP_TIMEOUT,
+    deadline: Optional[float] = None,
+    batch: bool = False,
+) -> List[Dict[str, Any]]:
+    """Функция принимает список валют, лимит параллельных запросов, таймаут одного запроса
+    и общий дедлайн (секунды). Возвращает курс валют, полученный через API.
+    При batch=True все курсы запрашиваются одним вызовом '/latest' (база RUB) и пересчитываются локально,
+    при ошибке этого вызова - по одному запросу '/convert' на валюту в пределах оставшегося дедлайна.
+    Курсы кэшируются в currency_cache на CURRENCY_QUOTE_TTL секунд, устаревшие обновляются в фоне."""
+    logger.debug("Функция начала свою работу.")
+    try:
+        load_environment()
         api_key = os.getenv("API_KEY_CURRENCY")
-        logger.info("Функция получает данные курсов валют.")
-        for currency in users_currencies:
-            url = f"https://api.apilayer.com/exchangerates_data/convert?to={"RUB"}&from={currency}&amount={1}"
+        session = get_session()
+
+        def load(currency: str) -> float:
+            url = f"{CURRENCY_API_URL}/convert?to={"RUB"}&from={currency}&amount={1}"
             headers = {"apikey": api_key}
-            response = requests.get(url, headers=headers, timeout=5, allow_redirects=False)
+            response = session.get(url, headers=headers, timeout=timeout, allow_redirects=False)
             result = response.json()
-            logger.info(f"{result}")
-            result_currency_list.append({"currency": currency, "rate": round(float(result["result"]), 2)})
-        logger.info("Функция успешно завершила свою работу.")
+            logger.debug("Ответ API: %s", result)
+            return round(float(result["result"]), 2)
+
+        def load_latest(currencies: List[str]) -> Dict[str, float]:
+            url = f"{CURRENCY_API_URL}/latest?base=RUB&symbols={",".join(currencies)}"
+            request_timeout = timeout if deadline is None else min(timeout, deadline)
+            response = session.get(url, headers={"apikey": api_key}, timeout=request_timeout, allow_redirects=False)
+            rates = response.json()["rates"]
+            return {currency: round(1 / float(rates[currency]), 2) for currency in currencies}
+
+        def load_many(currencies: List[str]) -> Dict[str, float]:
+            started = time.monotonic()
+            try:
+                return cast(Dict[str, float], fetch_concurrently(load_latest, [currencies], 1, deadline)[0])
+            except TimeoutError:
+                raise
+            except Exception:
+                logger.warning("Групповой запрос курсов не удался, курсы запрашиваются по одному.")
+            remaining = None if deadline is None else max(0.0, deadline - (time.monotonic() - started))
+            return dict(zip(currencies, fetch_concurrently(load, currencies, max_workers, remaining)))
+
+        def fetch(currency: str) -> Dict[str, Any]:
+            return {"currency": currency, "rate": currency_cache.get(currency, lambda: load(currency))}
+
+        logger.debug("Функция получает данные курсов валют.")
+        if batch:
+            rates = currency_cache.get_many(users_currencies, load_many)
+            result_currency_list = [{"currency": currency, "rate": rates[currency]} for currency in users_currencies]
+        else:
+            result_currency_list = fetch_concurrently(fetch, users_currencies, max_workers, deadline)
+        logger.debug("Функция успешно завершила свою работу.")
         return result_currency_list
     except Exception:
         logger.error("При работе функции произошла ошибка!")
         raise Exception("При работе функции произошла ошибка!")
 
 
-def stock_rates(users_stocks: List) -> List[Dict[str, Any]]:
-    """Функция принимает список акций. Возвращает котировки, полученные через API."""
-    logger.info("Функция начала свою работу.")
+@instrumented()
+def stock_rates(
+    users_stocks: List,
+    max_workers: int = HTTP_MAX_WORKERS,
+    timeout: float = HTTP_TIMEOUT,
+    deadline: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """Функция принимает список акций, лимит параллельных запросов, таймаут одного запроса
+    и общий дедлайн (секунды). Возвращает котировки, полученные через API.
+    Котировки кэшируются в stock_cache на STOCK_QUOTE_TTL секунд, устаревшие обновляются в фоне."""
+    logger.debug("Функция начала свою работу.")
     try:
-        result_stocks_list = []
-        load_dotenv()
+        load_environment()
         api_key = os.getenv("API_KEY_STOCK")
-        logger.info("Функция получает данные по котировкам.")
-        for stock in users_stocks:
-            url = f"https://www.alphavantage.co/query?function=GLOBAL_QUOTE&symbol={stock}&apikey={api_key}"
-            response = requests.get(url, timeout=5, allow_redirects=False)
+        session = get_session()
+
+        def load(stock: str) -> float:
+            url = f"{STOCK_API_URL}?function=GLOBAL_QUOTE&symbol={stock}&apikey={api_key}"
+            response = session.get(url, timeout=timeout, allow_redirects=False)
             result = response.json()
-            logger.info(f"{result}")
-            result_stocks_list.append({"stock": stock, "price": round(float(result["Global Quote"]["05. price"]), 2)})
-        logger.info("Функция успешно завершила свою работу.")
+            logger.debug("Ответ API: %s", result)
+            return round(float(result["Global Quote"]["05. price"]), 2)
+
+        def fetch(stock: str) -> Dict[str, Any]:
+            return {"stock": stock, "price": stock_cache.get(stock, lambda: load(stock))}
+
+        logger.debug("Функция получает данные по котировкам.")
+        result_stocks_list = fetch_concurrently(fetch, users_stocks, max_workers, deadline)
+        logger.debug("Функция успешно завершила свою работу.")
         return result_stocks_list
     except Exception:
         logger.error("При работе функции произошла ошибка!")
@@ -1,7 +1,15 @@
-import json
-import logging
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 from config import VIEWS_LOGS
+from src.json_encoder import dumps
+from src.logging_setup import get_logger
+from src.metrics import instrumented
+from src.settings_registry import settings_registry
 from src.utils import (
     card_info,
     currency_rates,
@@ -12,47 +20,114 @@ from src.utils import (
     top_five_transactions,
 )
 
-logger = logging.getLogger(__file__)
-logger.setLevel(logging.DEBUG)
-file_handler = logging.FileHandler(VIEWS_LOGS, mode="w")
-file_formatter = logging.Formatter("%(asctime)s - %(filename)s - %(funcName)s - %(levelname)s - %(message)s")
-file_handler.setFormatter(file_formatter)
-logger.addHandler(file_handler)
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = get_logger(__name__, VIEWS_LOGS)
+
+
+SECTION_DEADLINES = {"cards": 5.0, "top_transactions": 5.0, "currency_rates": 8.0, "stock_prices": 8.0}
+SECTION_WORKERS = 4
+
+
+def collect_sections(
+    sections: Dict[str, Callable[[], Any]], deadlines: Dict[str, float]
+) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Функция принимает словарь независимых разделов ответа (имя -> функция без аргументов) и дедлайны (секунды).
+    Запускает все разделы одновременно в пуле потоков и ждёт каждый не дольше его дедлайна от общего старта.
+    Возвращает значения разделов (None для неуспешных) и статусы: 'ok', 'timeout' или 'error'."""
+    executor = ThreadPoolExecutor(max_workers=max(1, min(SECTION_WORKERS, len(sections))))
+    started = time.monotonic()
+    try:
+        futures = {name: executor.submit(section) for name, section in sections.items()}
+        values: Dict[str, Any] = {}
+        statuses: Dict[str, str] = {}
+        for name, future in futures.items():
+            remaining = max(0.0, started + deadlines[name] - time.monotonic())
+            try:
+                values[name] = future.result(timeout=remaining)
+                statuses[name] = "ok"
+            except FutureTimeoutError:
+                logger.error(f"Раздел {name} не уложился в {deadlines[name]} с.")
+                values[name], statuses[name] = None, "timeout"
+            except Exception:
+                logger.exception(f"Раздел {name} завершился с ошибкой.")
+                values[name], statuses[name] = None, "error"
+        return values, statuses
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
-def views(date: str, transactions_df) -> str:
-    """Функция принимает дату (строка) и DataFrame с данными по транзакциям.
+@instrumented()
+def views(
+    date: str, transactions_df: pd.DataFrame, deadlines: Optional[Dict[str, float]] = None, user: Optional[str] = None
+) -> str:
+    """Функция принимает дату (строка), DataFrame с данными по транзакциям и, по желанию, имя пользователя,
+    чьи валюты и акции показывать (профиль из settings_registry; по умолчанию - user_settings.json).
     Возвращает ответ с приветствием, информацией по картам,
-    топ-5 транзакций стоимость валюты и акций в виде json-строки."""
+    топ-5 транзакций стоимость валюты и акций в виде json-строки (пустые значения транзакций - null).
+    Разделы считаются параллельно, каждый со своим дедлайном (SECTION_DEADLINES, можно переопределить deadlines).
+    Если какой-то раздел не успел или упал, он равен null, а в ответ добавляется 'sections_status'."""
     try:
-        logger.info("Функция начала свою работу.")
-        transactions = transactions_df.to_dict(orient="records")
-        logger.info("Функция собирает результаты работ своих подфункций.")
+        logger.debug("Функция начала свою работу.")
         greeting = greetings(date)
-        logger.info("Функция приветствия завершила свою работу.")
-        info_about_cards = card_info(transactions)
-        logger.info("Функция по сбору информации по картам завершила свою работу.")
-        five_transactions = top_five_transactions((transactions))
-        logger.info("Функция топ-5 транзакций завершила свою работу.")
-        users_settings = json_loader()
-        currensy = currency_rates(users_settings[0])
-        logger.info("Функция курса валют завершила свою работу.")
-        stock = stock_rates(users_settings[1])
-        logger.info("Функция котировок акций завершила свою работу.")
-        logger.info("Функция формирует общий результат результат.")
-        result_dict = {
-            "greeting": greeting,
-            "cards": info_about_cards,
-            "top_transactions": five_transactions,
-            "currency_rates": currensy,
-            "stock_prices": stock,
-        }
-        result_json = json.dumps(result_dict, ensure_ascii=False)
-        logger.info("Функция успешно завершила свою работу.")
-        return result_json
     except Exception:
         logger.error("При работе функции произошла ошибка.")
         raise ValueError("При работе функции произошла ошибка.")
+    deadlines = {**SECTION_DEADLINES, **(deadlines or {})}
+    settings: List[Tuple[Any, Any]] = []
+
+    def users_settings() -> Tuple[Any, Any]:
+        if not settings:
+            settings.append(json_loader() if user is None else settings_registry.get(user))
+        return settings[0]
+
+    logger.debug("Функция собирает результаты работ своих подфункций.")
+    values, statuses = collect_sections(
+        {
+            "cards": lambda: card_info(transactions_df),
+            "top_transactions": lambda: top_five_transactions(transactions_df),
+            "currency_rates": lambda: currency_rates(
+                users_settings()[0], batch=True, deadline=deadlines["currency_rates"]
+            ),
+            "stock_prices": lambda: stock_rates(users_settings()[1], deadline=deadlines["stock_prices"]),
+        },
+        deadlines,
+    )
+    logger.debug("Функция формирует общий результат результат.")
+    result_dict = {"greeting": greeting, **values}
+    if any(status != "ok" for status in statuses.values()):
+        result_dict["sections_status"] = statuses
+    result_json = dumps(result_dict)
+    logger.debug("Функция успешно завершила свою работу.")
+    return result_json
+
+
+@instrumented()
+def refresh_quotes(
+    users: Iterable[Optional[str]], deadline: Optional[float] = None
+) -> Dict[Optional[str], Dict[str, List]]:
+    """Функция принимает имена пользователей (None - пользователь по умолчанию) и общий дедлайн (секунды).
+    Запрашивает котировки объединения их валют и акций: каждый символ - один раз за цикл обновления
+    (все валюты - одним групповым запросом), и раздаёт результат подписчикам.
+    Возвращает словарь {пользователь: {'currency_rates': [...], 'stock_prices': [...]}} в формате разделов views;
+    последующие views этих пользователей берут котировки из прогретого кэша без запросов к API."""
+    users = list(dict.fromkeys(users))
+    currencies, stocks = settings_registry.symbols(users)
+    logger.info(f"Обновление котировок: {len(users)} пользователей, {len(currencies)} валют, {len(stocks)} акций.")
+    rates = {item["currency"]: item for item in currency_rates(currencies, batch=True, deadline=deadline)}
+    prices = {item["stock"]: item for item in stock_rates(stocks, deadline=deadline)}
+    result: Dict[Optional[str], Dict[str, List]] = {}
+    for user in users:
+        try:
+            user_currencies, user_stocks = settings_registry.get(user)
+        except ValueError:
+            continue
+        result[user] = {
+            "currency_rates": [rates[currency] for currency in user_currencies],
+            "stock_prices": [prices[stock] for stock in user_stocks],
+        }
+    return result
 
 
 if __name__ == "__main__":
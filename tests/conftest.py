@@ -0,0 +1,87 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+class QuoteStubHandler(BaseHTTPRequestHandler):
+    """Заглушка apilayer и Alpha Vantage: отвечает после задержки server.latency секунд."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self.server.requests.append(self.path)
+        time.sleep(self.server.latency)
+        parsed = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        if parsed.path.endswith("/convert"):
+            body = {"query": query, "result": self.server.rates[query["from"]], "success": True}
+        elif parsed.path.endswith("/latest"):
+            symbols = query["symbols"].split(",")
+            if self.server.fail_latest or any(symbol not in self.server.rates for symbol in symbols):
+                body = {"success": False, "error": {"code": 500}}
+            else:
+                body = {"base": "RUB", "rates": {symbol: 1 / self.server.rates[symbol] for symbol in symbols}}
+        else:
+            body = {"Global Quote": {"01. symbol": query["symbol"], "05. price": self.server.prices[query["symbol"]]}}
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def quote_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), QuoteStubHandler)
+    server.daemon_threads = True
+    server.latency = 0.0
+    server.requests = []
+    server.fail_latest = False
+    server.rates = {"USD": 90.0, "EUR": 100.0, "CNY": 12.5, "GBP": 115.0, "JPY": 0.6}
+    server.prices = {"AAPL": 210.0, "AMZN": 180.0, "GOOGL": 170.0, "MSFT": 420.0, "TSLA": 250.0}
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def isolated_quote_cache(tmp_path):
+    """Каждый тест работает с пустым кэшем котировок в собственном каталоге."""
+    from src.utils import currency_cache, stock_cache
+
+    for cache in (currency_cache, stock_cache):
+        cache.reset(str(tmp_path / "quotes"))
+    yield
+    for cache in (currency_cache, stock_cache):
+        cache.reset(str(tmp_path / "quotes"))
+
+
+@pytest.fixture(autouse=True)
+def empty_spent_cache():
+    """Каждый тест начинает с пустого кэша результатов spent_by_category."""
+    from src.reports import spent_cache
+
+    spent_cache.clear()
+    yield
+    spent_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def empty_settings_registry():
+    """Каждый тест заново разбирает файлы пользовательских настроек."""
+    from src.settings_registry import settings_registry
+
+    settings_registry.clear()
+    yield
+    settings_registry.clear()
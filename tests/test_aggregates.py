@@ -0,0 +1,127 @@
+import json
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.aggregates import AggregateStore, to_kopecks
+from src.reports import spent_by_category
+from src.services import investment_bank
+from src.utils import card_info
+
+CATEGORIES = ["Фастфуд", "Супермаркеты", "Каршеринг", "Переводы", None]
+CARDS = ["*7197", "*5091", "*4556", None]
+
+
+def random_statement(seed: int, rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = np.datetime64("2021-06-01") + rng.integers(0, 200 * 24 * 3600, size=rows).astype("timedelta64[s]")
+    return pd.DataFrame(
+        {
+            "Дата операции": pd.Series(dates).dt.strftime("%d.%m.%Y %H:%M:%S"),
+            "Номер карты": rng.choice(np.array(CARDS, dtype=object), size=rows),
+            "Сумма операции": rng.integers(-500000, 200000, size=rows) / 100,
+            "Категория": rng.choice(np.array(CATEGORIES, dtype=object), size=rows),
+        }
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_equals_full_recompute(seed, tmp_path):
+    statement = random_statement(seed, 400)
+    bounds = sorted(np.random.default_rng(seed).choice(np.arange(1, len(statement)), size=6, replace=False))
+    path = str(tmp_path / "aggregates.json")
+    for number, (start, stop) in enumerate(zip([0] + bounds, bounds + [len(statement)])):
+        store = AggregateStore.load(path)
+        store.append(statement.iloc[start:stop], batch_id=f"batch-{number}")
+    store = AggregateStore.load(path)
+    full = AggregateStore()
+    full.append(statement)
+
+    assert store.rows == full.rows == len(statement)
+    assert store.cards == full.cards
+    assert store.savings == full.savings
+    assert store.categories == full.categories
+    assert store.card_info() == card_info(statement)
+    for month in ("2021-06", "2021-09", "2021-12", "2022-05"):
+        for limit in (10, 50, 100):
+            assert store.investment_bank(month, limit) == investment_bank(month, statement, limit)
+    for category in ("фаст", "Супермаркеты", "р"):
+        for date in ("2021-08-15", "2021-12-31"):
+            expected = spent_by_category(statement, category, date)
+            result = store.category_spend(category, date)
+            assert result["count"] == len(expected)
+            assert result["total"] == round(expected["Сумма операции"].sum(), 2)
+
+
+def test_append_same_batch_once(tmp_path):
+    statement = random_statement(0, 10)
+    store = AggregateStore(str(tmp_path / "aggregates.json"))
+    assert store.append(statement, batch_id="2021-06-01")
+    assert not store.append(statement, batch_id="2021-06-01")
+    assert store.rows == 10
+
+
+def test_investment_bank_unknown_limit():
+    store = AggregateStore(limits=[100])
+    with pytest.raises(ValueError):
+        store.investment_bank("2021-10", 10)
+    assert json.loads(store.investment_bank("2021-10", 100)) == 0.0
+
+
+def test_append_writes_only_journal_line(tmp_path):
+    path = str(tmp_path / "aggregates.json")
+    store = AggregateStore(path)
+    store.append(random_statement(0, 50), batch_id="first")
+    snapshot_size = os.path.getsize(path)
+    store.append(random_statement(1, 50), batch_id="second")
+    store.append(random_statement(2, 50), batch_id="third")
+    assert os.path.getsize(path) == snapshot_size
+    with open(store.journal_path, "r", encoding="utf-8") as file_in:
+        entries = [json.loads(line) for line in file_in]
+    assert [(entry["sequence"], entry["batches"], entry["rows"]) for entry in entries] == [
+        (2, ["second"], 50),
+        (3, ["third"], 50),
+    ]
+    loaded = AggregateStore.load(path)
+    assert (loaded.rows, loaded.batches, loaded.cards) == (150, {"first", "second", "third"}, store.cards)
+
+
+def test_journal_compaction(tmp_path):
+    path = str(tmp_path / "aggregates.json")
+    with patch("src.aggregates.COMPACT_EVERY", 3):
+        store = AggregateStore(path)
+        for number in range(4):
+            store.append(random_statement(number, 20), batch_id=str(number))
+        assert not os.path.exists(store.journal_path)
+        store.append(random_statement(4, 20), batch_id="4")
+    loaded = AggregateStore.load(path)
+    assert (loaded.rows, loaded.categories) == (100, store.categories)
+
+
+def test_journal_truncated_or_already_compacted(tmp_path):
+    path = str(tmp_path / "aggregates.json")
+    store = AggregateStore(path)
+    store.append(random_statement(0, 20), batch_id="first")
+    store.append(random_statement(1, 20), batch_id="second")
+    with open(store.journal_path, "r", encoding="utf-8") as file_in:
+        journal = file_in.read()
+    store.save()
+    with open(store.journal_path, "w", encoding="utf-8") as file_out:
+        file_out.write(journal + journal[: len(journal) // 2])
+    loaded = AggregateStore.load(path)
+    assert (loaded.rows, loaded.cards) == (40, store.cards)
+    assert not os.path.exists(loaded.journal_path)
+
+
+def test_append_rejects_nan_amounts():
+    statement = random_statement(0, 10)
+    statement.loc[3, "Сумма операции"] = np.nan
+    store = AggregateStore()
+    with pytest.raises(ValueError):
+        store.append(statement, batch_id="broken")
+    assert (store.rows, store.batches, store.cards) == (0, set(), {})
+    with pytest.raises(ValueError):
+        to_kopecks([1.0, None])
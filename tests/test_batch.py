@@ -0,0 +1,97 @@
+import json
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generator import generate_statement
+from src.batch import PartialAggregates, process_statements
+from src.reports import spent_by_category
+from src.services import investment_bank
+from src.utils import card_info, top_transactions
+
+
+@pytest.fixture(scope="module")
+def statement_files(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("statements")
+    statements, file_names = [], []
+    for number in range(4):
+        statement = generate_statement(300, seed=number)
+        # Одинаковые суммы в разных файлах проверяют порядок разрешения равенств в топе.
+        statement.loc[number, "Сумма операции"] = -99999.0
+        file_name = str(directory / f"account_{number}.xlsx")
+        statement.to_excel(file_name, index=False)
+        statements.append(pd.read_excel(file_name))
+        file_names.append(file_name)
+    return file_names, pd.concat(statements, ignore_index=True)
+
+
+def assert_matches_single_statement(result, statement):
+    assert result.rows == len(statement)
+    assert result.card_info() == card_info(statement)
+    assert json.dumps(result.top_transactions(), default=str) == json.dumps(
+        top_transactions(statement, 5), default=str
+    )
+    for month in ["2018-01", "2020-02", "2021-12"]:
+        for limit in [10, 50, 100]:
+            assert result.investment_bank(month, limit) == investment_bank(month, statement, limit)
+    for category in ["Супермаркеты", "фаст", "Переводы|Связь"]:
+        expected = spent_by_category(statement, category, "2021-12-31")
+        spend = result.category_spend(category, "2021-12-31")
+        assert spend["count"] == len(expected)
+        assert spend["total"] == round(expected["Сумма операции"].sum(), 2)
+
+
+def test_single_process_matches_concatenated_statement(statement_files):
+    file_names, statement = statement_files
+    assert_matches_single_statement(process_statements(file_names, processes=1, use_cache=False), statement)
+
+
+def test_process_pool_matches_single_process(statement_files):
+    file_names, statement = statement_files
+    result = process_statements(file_names, processes=2, use_cache=False, min_pool_bytes=0)
+    assert_matches_single_statement(result, statement)
+    single = process_statements(file_names, processes=1, use_cache=False)
+    assert result.store.cards == single.store.cards
+    assert result.store.savings == single.store.savings
+    assert result.store.categories == single.store.categories
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_merge_is_associative(seed):
+    rng = np.random.default_rng(seed)
+    statements = [generate_statement(int(rng.integers(1, 200)), seed=seed * 10 + number) for number in range(3)]
+    parts = [PartialAggregates.from_statement(statement, number) for number, statement in enumerate(statements)]
+    again = [PartialAggregates.from_statement(statement, number) for number, statement in enumerate(statements)]
+    left = PartialAggregates().merge(parts[0]).merge(parts[1]).merge(parts[2])
+    right = PartialAggregates().merge(again[0]).merge(again[1].merge(again[2]))
+    assert left.store.cards == right.store.cards
+    assert list(left.store.cards) == list(right.store.cards)
+    assert left.store.savings == right.store.savings
+    assert left.store.categories == right.store.categories
+    assert [candidate[:3] for candidate in left.top] == [candidate[:3] for candidate in right.top]
+
+
+def test_merge_rejects_different_limits():
+    with pytest.raises(ValueError):
+        PartialAggregates(limits=[10]).merge(PartialAggregates(limits=[50]))
+
+
+def test_top_n_zero():
+    partial = PartialAggregates.from_statement(generate_statement(50), top_n=0)
+    assert partial.merge(PartialAggregates(top_n=0)).top_transactions() == []
+
+
+@patch("src.batch.ProcessPoolExecutor")
+def test_single_file_does_not_start_pool(mock_executor, statement_files):
+    file_names, _ = statement_files
+    assert process_statements(file_names[:1], processes=8, use_cache=False).rows == 300
+    mock_executor.assert_not_called()
+
+
+@patch("src.batch.ProcessPoolExecutor")
+def test_small_statements_do_not_start_pool(mock_executor, statement_files):
+    file_names, statement = statement_files
+    assert process_statements(file_names, processes=2, use_cache=False).rows == len(statement)
+    mock_executor.assert_not_called()
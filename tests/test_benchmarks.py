@@ -0,0 +1,67 @@
+import json
+
+import pandas as pd
+import pytest
+
+from benchmarks.bench_suite import compare, main, parse_size
+from benchmarks.generator import COLUMNS, generate_statement
+from src.reports import spent_by_category
+from src.services import investment_bank
+from src.utils import card_info
+
+
+def test_generate_statement_format():
+    statement = generate_statement(1000, seed=1)
+    assert list(statement.columns) == COLUMNS
+    assert len(statement) == 1000
+    dates = pd.to_datetime(statement["Дата операции"], format="%d.%m.%Y %H:%M:%S")
+    assert dates.is_monotonic_decreasing
+    assert statement["Номер карты"].dropna().str.match(r"^\*\d{4}$").all()
+    assert statement["Сумма операции"].dtype == float
+
+
+def test_generate_statement_is_deterministic():
+    pd.testing.assert_frame_equal(generate_statement(500, seed=7), generate_statement(500, seed=7))
+    assert not generate_statement(500, seed=7).equals(generate_statement(500, seed=8))
+
+
+def test_generated_statement_works_with_public_functions():
+    statement = generate_statement(2000)
+    cards = {card["last_digits"] for card in card_info(statement)}
+    assert cards <= {"7197", "4556", "5091", "5441", "1112", "5507", "6002"}
+    assert float(investment_bank("2021-12", statement, 50)) > 0
+    assert len(spent_by_category(statement, "Супермаркеты", "2021-12-31")) > 0
+
+
+@pytest.mark.parametrize("text, expected", [("10k", 10_000), ("1M", 1_000_000), ("2.5m", 2_500_000), ("300", 300)])
+def test_parse_size(text, expected):
+    assert parse_size(text) == expected
+
+
+def test_compare():
+    baseline = {
+        "results": {"a@10": {"seconds": 1.0, "peak_bytes": 100}, "b@10": {"seconds": 0.001, "peak_bytes": 10}}
+    }
+    current = {
+        "results": {
+            "a@10": {"seconds": 1.5, "peak_bytes": 300},
+            "b@10": {"seconds": 0.003, "peak_bytes": 10},
+            "c@10": {"seconds": 9.0, "peak_bytes": 10},
+        }
+    }
+    assert [line.split(":")[0] for line in compare(baseline, current, 0.25)] == ["a@10"]
+    assert compare(baseline, current, 0.6) == []
+    assert len(compare(baseline, current, 0.6, memory_threshold=1.0)) == 1
+
+
+def test_main_fails_on_regression(tmp_path):
+    output = tmp_path / "baseline.json"
+    arguments = ["--sizes", "200", "--repeat", "1", "--only", "card_info"]
+    assert main(arguments + ["--output", str(output)]) == 0
+    data = json.loads(output.read_text(encoding="utf-8"))
+    assert list(data["results"]) == ["utils.card_info@200"]
+    data["results"]["utils.card_info@200"]["seconds"] = 1e-9
+    baseline = tmp_path / "fast_baseline.json"
+    baseline.write_text(json.dumps(data), encoding="utf-8")
+    assert main(arguments + ["--compare", str(baseline), "--min-seconds", "0"]) == 1
+    assert main(arguments + ["--compare", str(output), "--threshold", "1000"]) == 0
@@ -0,0 +1,106 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.indexes import (
+    CategoryIndex,
+    TimeIndex,
+    category_index,
+    freeze,
+    is_frozen,
+    month_index,
+    operation_dates,
+    parse_dates,
+    time_index,
+)
+
+transactions_df = pd.DataFrame(
+    {
+        "Дата операции": [
+            "01.10.2021 17:53:24",
+            "07.10.2022 17:53:24",
+            "15.10.2022 17:53:24",
+            "abcd",
+            "17.10.2021 17:53:24",
+            "27.11.2022 17:53:24",
+        ],
+        "Сумма операции": [-152, -47.85, -10385, -1, -52, -887.65],
+    }
+)
+freeze(transactions_df)
+
+
+def test_parse_dates():
+    dates = parse_dates(["01.10.2021 17:53:24", "abcd"])
+    assert dates[0] == np.datetime64("2021-10-01T17:53:24")
+    assert np.isnat(dates[1])
+
+
+def test_operation_dates_cached():
+    assert operation_dates(transactions_df) is operation_dates(transactions_df)
+
+
+def test_month_index_lookup():
+    index = month_index(transactions_df)
+    assert index is month_index(transactions_df)
+    assert list(index.lookup(2021, 10)) == [0, 4]
+    assert list(index.lookup(2022, 10)) == [1, 2]
+    assert list(index.lookup(2022, 11)) == [5]
+    assert list(index.lookup(2023, 1)) == []
+
+
+def test_month_index_empty():
+    assert list(month_index(pd.DataFrame({"Дата операции": []})).lookup(2021, 10)) == []
+
+
+def test_time_index_window():
+    index = time_index(transactions_df)
+    assert index is time_index(transactions_df)
+    window = index.window(datetime.datetime(2021, 10, 1, 17, 53, 24), datetime.datetime(2022, 10, 7, 17, 53, 24))
+    assert list(window) == [0, 1, 4]
+    assert list(index.window(datetime.datetime(2023, 1, 1), datetime.datetime(2024, 1, 1))) == []
+
+
+@pytest.mark.parametrize("order", ["ascending", "descending", "shuffled"])
+def test_time_index_window_keeps_row_order(order):
+    dates = pd.date_range("2021-01-01", periods=200, freq="6h").repeat(2).to_numpy()
+    if order == "descending":
+        dates = dates[::-1]
+    elif order == "shuffled":
+        dates = np.random.default_rng(0).permutation(dates)
+    index = TimeIndex(dates)
+    start, end = np.datetime64("2021-01-10T06:00:00"), np.datetime64("2021-02-01")
+    expected = np.flatnonzero((dates >= start) & (dates <= end))
+    assert list(index.window(start, end)) == list(expected)
+
+
+def test_category_index():
+    index = CategoryIndex(["Фастфуд", "Супермаркеты", None, "фастфуд", "Фастфуд", "Каршеринг"])
+    assert list(index.rows(index.exact("Фастфуд"))) == [0, 4]
+    assert list(index.rows(index.exact("ФАСТФУД", ignore_case=True))) == [0, 3, 4]
+    assert list(index.rows(index.search("фаст|карш"))) == [0, 3, 4, 5]
+    assert list(index.rows(index.search("."))) == [0, 1, 3, 4, 5]
+    assert list(index.rows(index.exact("Яблоки"))) == []
+
+
+def test_category_index_cached():
+    df = freeze(pd.DataFrame({"Категория": ["Фастфуд", "Каршеринг"]}))
+    assert category_index(df) is category_index(df)
+
+
+def test_index_of_mutable_frame_follows_changes():
+    df = pd.DataFrame({"Категория": ["Фастфуд", "Каршеринг"], "Дата операции": ["01.10.2021 17:53:24"] * 2})
+    assert not is_frozen(df)
+    assert category_index(df) is not category_index(df)
+    df.loc[1, "Категория"] = "Фастфуд"
+    df.loc[0, "Дата операции"] = "01.11.2021 17:53:24"
+    assert list(category_index(df).codes) == [0, 0]
+    assert list(month_index(df).lookup(2021, 10)) == [1]
+
+
+def test_freeze_is_per_object():
+    df = freeze(pd.DataFrame({"Категория": ["Фастфуд"]}))
+    assert is_frozen(df)
+    assert not is_frozen(df.copy())
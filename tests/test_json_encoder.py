@@ -0,0 +1,93 @@
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generator import generate_statement
+from src.json_encoder import dumps, encode_column, iter_records_json, write_records_json
+from src.result_writer import write_result
+from src.transactions import Transactions
+
+
+@pytest.fixture(scope="module")
+def statement():
+    return generate_statement(2500, seed=4)
+
+
+def reference(transactions_df, indent=None):
+    records = transactions_df.to_dict(orient="records")
+    return json.dumps(records, ensure_ascii=False, indent=indent).replace("NaN", "null")
+
+
+@pytest.mark.parametrize("indent", [None, 4])
+@pytest.mark.parametrize("chunk_size", [1, 700, 10_000])
+def test_records_match_json_dumps(statement, indent, chunk_size):
+    assert "".join(iter_records_json(statement, indent, chunk_size=chunk_size)) == reference(statement, indent)
+
+
+def test_compact_frame_matches(statement):
+    compact = Transactions.from_frame(statement).frame
+    assert "".join(iter_records_json(compact, 4, chunk_size=999)) == reference(statement, 4)
+
+
+def test_ndjson(statement):
+    buffer = io.StringIO()
+    write_records_json(statement, buffer, lines=True, chunk_size=1000)
+    lines = buffer.getvalue().splitlines()
+    assert buffer.getvalue().endswith("\n")
+    assert [json.loads(line) for line in lines] == json.loads(reference(statement))
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (float("nan"), "null"),
+        (float("inf"), "null"),
+        (None, "null"),
+        (pd.NaT, "null"),
+        (np.float64(0.1), "0.1"),
+        (np.int64(7), "7"),
+        (True, "true"),
+        (pd.Timestamp("2021-12-31 16:44:00"), '"2021-12-31 16:44:00"'),
+        ({"Сумма": [1.5, float("nan")], "ok": False}, '{"Сумма": [1.5, null], "ok": false}'),
+    ],
+)
+def test_dumps_values(value, expected):
+    assert dumps(value) == expected
+
+
+def test_encode_column_types():
+    frame = pd.DataFrame(
+        {
+            "dates": pd.to_datetime(["2021-01-01 10:00:05", None]),
+            "flags": [True, False],
+            "ints": [1, -2],
+            "floats": [1e16, np.nan],
+            "mixed": ["a", 1],
+            "lists": [[1], None],
+        }
+    )
+    assert encode_column(frame["dates"]).tolist() == ['"2021-01-01 10:00:05"', "null"]
+    assert encode_column(frame["flags"]).tolist() == ["true", "false"]
+    assert encode_column(frame["ints"]).tolist() == ["1", "-2"]
+    assert encode_column(frame["floats"]).tolist() == ["1e+16", "null"]
+    assert encode_column(frame["mixed"]).tolist() == ['"a"', "1"]
+    assert encode_column(frame["lists"]).tolist() == ["[1]", "null"]
+
+
+def test_special_keys_and_empty_frame():
+    frame = pd.DataFrame({'100% "кэшбэк"': [1.0]})
+    assert json.loads(dumps(frame)) == [{'100% "кэшбэк"': 1.0}]
+    assert dumps(frame.iloc[:0]) == "[]"
+    assert "".join(iter_records_json(frame.iloc[:0], lines=True)) == ""
+
+
+def test_write_result_produces_valid_json(tmp_path):
+    frame = pd.DataFrame({"Кэшбэк": [np.nan, 70.0], "Категория": ["Фастфуд", None]})
+    path = write_result(str(tmp_path / "result.json"), frame)
+    with open(path, encoding="utf-8") as file_in:
+        text = file_in.read()
+    expected = [{"Кэшбэк": None, "Категория": "Фастфуд"}, {"Кэшбэк": 70.0, "Категория": None}]
+    assert text == json.dumps(expected, ensure_ascii=False, indent=4)
@@ -0,0 +1,25 @@
+import sys
+from unittest.mock import patch
+
+from src.lazy import LazyModule, lazy_import
+
+
+def test_lazy_import_returns_loaded_module():
+    assert lazy_import("json") is sys.modules["json"]
+
+
+def test_lazy_module_imports_on_first_use():
+    module = lazy_import("colorsys")
+    assert isinstance(module, LazyModule) or module is sys.modules["colorsys"]
+    assert module.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert "colorsys" in sys.modules
+
+
+def test_lazy_module_sees_patches():
+    module = LazyModule("json")
+    with patch("json.dumps", return_value="patched"):
+        assert module.dumps({}) == "patched"
+    assert module.dumps({}) == "{}"
+    with patch.object(module, "dumps", return_value="local"):
+        assert module.dumps({}) == "local"
+    assert module.dumps({}) == "{}"
@@ -0,0 +1,77 @@
+import os
+from unittest.mock import patch
+
+from src.logging_setup import flush_logs, get_logger, process_log_path
+
+
+def read_lines(log_file):
+    with open(process_log_path(log_file), "r", encoding="utf-8") as file:
+        return file.read().splitlines()
+
+
+def test_get_logger_writes_in_background(tmp_path):
+    log_file = str(tmp_path / "module.log")
+    logger = get_logger("tests.background", log_file, "INFO")
+    logger.info("Запись %s", "один")
+    logger.debug("Отброшенная запись")
+    flush_logs()
+    lines = read_lines(log_file)
+    assert process_log_path(log_file) == str(tmp_path / f"module.{os.getpid()}.log")
+    assert len(lines) == 1
+    assert f" - {os.getpid()} - " in lines[0]
+    assert lines[0].endswith("INFO - Запись один")
+
+
+def test_message_is_formatted_at_call_time(tmp_path):
+    log_file = str(tmp_path / "prepared.log")
+    logger = get_logger("tests.prepared", log_file, "INFO")
+    values = ["до"]
+    logger.info("Значения %s", values)
+    values[0] = "после"
+    try:
+        raise ValueError("ошибка")
+    except ValueError:
+        logger.exception("Сбой")
+    flush_logs()
+    lines = read_lines(log_file)
+    assert lines[0].endswith("Значения ['до']")
+    assert lines[1].endswith("ERROR - Сбой")
+    assert lines[-1] == "ValueError: ошибка"
+
+
+def test_get_logger_skips_disabled_level(tmp_path):
+    logger = get_logger("tests.disabled", str(tmp_path / "disabled.log"), "INFO")
+    assert not logger.isEnabledFor(10)
+    assert logger.isEnabledFor(20)
+
+
+def test_log_file_rollover(tmp_path):
+    log_file = str(tmp_path / "rollover.log")
+    logger = get_logger("tests.rollover", log_file, "INFO")
+    with patch("src.logging_setup.LOG_MAX_BYTES", 1000):
+        for number in range(40):
+            logger.info("Запись номер %d", number)
+        flush_logs()
+    process_file = process_log_path(log_file)
+    name = os.path.basename(process_file)
+    assert sorted(os.listdir(tmp_path)) == [name, f"{name}.1"]
+    assert os.path.getsize(process_file) <= 1000 + 200
+    assert read_lines(log_file)[-1].endswith("Запись номер 39")
+
+
+def test_old_process_files_are_pruned(tmp_path):
+    log_file = str(tmp_path / "pruned.log")
+    for number, pid in enumerate([101, 102, 103], start=1):
+        old_file = process_log_path(log_file, pid)
+        with open(old_file, "w", encoding="utf-8") as file:
+            file.write("старая запись\n")
+        os.utime(old_file, ns=(number * 10**9, number * 10**9))
+    (tmp_path / "pruned.101.log.1").write_text("копия\n", encoding="utf-8")
+    (tmp_path / "other.101.log").write_text("другой модуль\n", encoding="utf-8")
+    logger = get_logger("tests.pruned", log_file, "INFO")
+    with patch("src.logging_setup.LOG_KEEP_FILES", 2):
+        logger.info("Новая запись")
+        flush_logs()
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        ["other.101.log", "pruned.103.log", os.path.basename(process_log_path(log_file))]
+    )
@@ -0,0 +1,122 @@
+import json
+import subprocess
+import sys
+import textwrap
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from config import ROOT_DIR
+from src import metrics
+from src.main import main
+
+# Бюджет холодного импорта модулей команд (без запуска интерпретатора), секунды.
+IMPORT_BUDGET = 0.25
+HEAVY_MODULES = ["pandas", "numpy", "requests", "dotenv"]
+
+transactions = pd.DataFrame(
+    {
+        "Дата операции": ["01.10.2021 17:53:24", "07.10.2021 17:53:24", "15.10.2021 17:53:24"],
+        "Номер карты": ["*7197", "*7197", "*4556"],
+        "Сумма операции": [-152.0, -47.85, -1038.5],
+        "Категория": ["Фастфуд", "Такси", "Фастфуд"],
+    }
+)
+
+
+def run_python(code):
+    completed = subprocess.run(
+        [sys.executable, "-c", textwrap.dedent(code)], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout)
+
+
+def test_import_is_lazy_and_within_budget():
+    result = run_python(
+        f"""
+        import json, os, sys, time
+        created = []
+        os.makedirs = lambda *args, **kwargs: created.append(args)
+        started = time.perf_counter()
+        import src.main, src.utils, src.services, src.reports, src.views
+        elapsed = time.perf_counter() - started
+        src.utils.greetings("2024-07-06 10:42:30")
+        src.utils.json_loader()
+        print(json.dumps({{"elapsed": elapsed, "heavy": [m for m in {HEAVY_MODULES!r} if m in sys.modules],
+                          "created": created}}))
+        """
+    )
+    assert result["heavy"] == []
+    assert result["created"] == []
+    assert result["elapsed"] < IMPORT_BUDGET
+
+
+def test_help_does_not_import_heavy_modules():
+    result = run_python(
+        f"""
+        import contextlib, io, json, sys
+        import src.aggregates, src.batch, src.main, src.streaming
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                src.main.main(["--help"])
+            except SystemExit:
+                pass
+        print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))
+        """
+    )
+    assert result == []
+
+
+@patch("src.main.reading_excel", return_value=transactions)
+def test_invest(mock_reading_excel, capsys):
+    assert main(["invest", "--month", "2021-10", "--limit", "50", "--file", "test.xls"]) == 0
+    assert capsys.readouterr().out.strip() == "61.65"
+    mock_reading_excel.assert_called_once_with("test.xls")
+
+
+@patch("src.main.reading_excel", return_value=transactions)
+def test_spent(mock_reading_excel, capsys):
+    assert main(["spent", "--category", "фаст", "--date", "2021-10-20"]) == 0
+    result = json.loads(capsys.readouterr().out)
+    assert [row["Сумма операции"] for row in result] == [-152.0, -1038.5]
+    mock_reading_excel.assert_called_once_with("operations.xls")
+
+
+@patch("src.main.views", return_value='{"greeting": "Доброе утро!"}')
+@patch("src.main.reading_excel", return_value=transactions)
+def test_views(mock_reading_excel, mock_views, capsys):
+    assert main(["views", "--date", "2024-07-06 10:42:30"]) == 0
+    assert capsys.readouterr().out.strip() == '{"greeting": "Доброе утро!"}'
+    mock_views.assert_called_once_with("2024-07-06 10:42:30", transactions)
+
+
+@patch("src.main.reading_excel", return_value=transactions)
+def test_invalid_month(mock_reading_excel, capsys):
+    assert main(["invest", "--month", "2021-13"]) == 1
+    assert capsys.readouterr().err
+
+
+def test_command_is_required():
+    with pytest.raises(SystemExit):
+        main([])
+
+
+def test_module_entry_point():
+    completed = subprocess.run(
+        [sys.executable, "-m", "src.main", "--help"], cwd=ROOT_DIR, capture_output=True, text=True
+    )
+    assert completed.returncode == 0
+    assert all(command in completed.stdout for command in ["views", "invest", "spent"])
+
+
+@patch("src.main.reading_excel", return_value=transactions)
+def test_metrics_export(mock_reading_excel, tmp_path, capsys):
+    try:
+        assert main(["--metrics", str(tmp_path), "invest", "--month", "2021-10"]) == 0
+    finally:
+        metrics.disable()
+        metrics.reset()
+    with open(tmp_path / "metrics.json", encoding="utf-8") as file_in:
+        assert json.load(file_in)["functions"]["services.investment_bank"]["calls"] == 1
+    assert (tmp_path / "metrics.prom").read_text(encoding="utf-8").startswith("# HELP")
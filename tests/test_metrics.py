@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from src import metrics
+from src.services import investment_bank
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset()
+    yield
+    metrics.disable()
+    metrics.reset()
+
+
+@metrics.instrumented("test.allocate")
+def allocate(size, fail=False):
+    data = bytearray(size)
+    if fail:
+        raise ValueError("ошибка")
+    return len(data)
+
+
+@metrics.instrumented("test.outer")
+def outer(size):
+    allocate(size)
+    return [0] * 10
+
+
+def test_disabled_records_nothing():
+    assert allocate(10) == 10
+    assert metrics.snapshot()["functions"] == {}
+
+
+def test_calls_errors_and_rows():
+    metrics.enable()
+    allocate([1, 2, 3])
+    with pytest.raises(ValueError):
+        allocate(5, fail=True)
+    result = metrics.snapshot()["functions"]["test.allocate"]
+    assert (result["calls"], result["errors"], result["rows"], result["peak_bytes"]) == (2, 1, 3, None)
+    assert result["wall_seconds"]["count"] == result["cpu_seconds"]["count"] == 2
+    assert result["wall_seconds"]["buckets"]["+Inf"] == 2
+
+
+def test_peak_memory_of_nested_calls():
+    metrics.enable(trace_memory=True)
+    outer(5 * 2**20)
+    functions = metrics.snapshot()["functions"]
+    assert functions["test.allocate"]["peak_bytes"] >= 5 * 2**20
+    assert functions["test.outer"]["peak_bytes"] >= functions["test.allocate"]["peak_bytes"]
+
+
+@metrics.instrumented("test.concurrent")
+def allocate_together(barrier, size):
+    data = bytearray(size)
+    barrier.wait(timeout=5)
+    return len(data)
+
+
+def test_peak_memory_skipped_for_concurrent_calls():
+    metrics.enable(trace_memory=True)
+    barrier = threading.Barrier(2)
+    threads = [threading.Thread(target=allocate_together, args=(barrier, 2**20)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert metrics.snapshot()["functions"]["test.concurrent"]["peak_bytes"] is None
+    allocate_together(threading.Barrier(1), 2**20)
+    assert metrics.snapshot()["functions"]["test.concurrent"]["peak_bytes"] >= 2**20
+
+
+def test_measure():
+    with metrics.measure("test.block") as block:
+        block.rows = 7
+    assert metrics.snapshot()["functions"] == {}
+    metrics.enable()
+    with metrics.measure("test.block") as block:
+        block.rows = 7
+    assert metrics.snapshot()["functions"]["test.block"]["rows"] == 7
+
+
+@pytest.mark.parametrize(
+    "values, p50, p99",
+    [([0.00005] * 99 + [0.2], 0.0001, 0.0001), ([0.003] * 50 + [0.7] * 50, 0.005, 1.0), ([20.0], None, None)],
+)
+def test_histogram_quantiles(values, p50, p99):
+    histogram = metrics.Histogram()
+    for value in values:
+        histogram.observe(value)
+    assert (histogram.quantile(0.5), histogram.quantile(0.99)) == (p50, p99)
+
+
+def test_prometheus_text():
+    metrics.enable(trace_memory=True)
+    allocate(100)
+    text = metrics.prometheus_text()
+    assert "# TYPE bank_function_wall_seconds histogram" in text
+    assert 'bank_function_calls_total{function="test.allocate"} 1' in text
+    assert 'bank_function_wall_seconds_bucket{function="test.allocate",le="+Inf"} 1' in text
+    lines = [line for line in text.splitlines() if line.startswith("bank_function_cpu_seconds_bucket")]
+    buckets = [int(line.rsplit(" ", 1)[1]) for line in lines]
+    assert buckets == sorted(buckets) and len(buckets) == len(metrics.BUCKETS) + 1
+    assert 'bank_function_peak_bytes{function="test.allocate"}' in text
+
+
+def test_export_files(tmp_path):
+    metrics.enable()
+    allocate(1)
+    prom_path = metrics.write_prometheus(str(tmp_path / "out" / "metrics.prom"))
+    json_path = metrics.write_snapshot(str(tmp_path / "out" / "metrics.json"))
+    with open(prom_path, encoding="utf-8") as file_in:
+        assert file_in.read() == metrics.prometheus_text()
+    with open(json_path, encoding="utf-8") as file_in:
+        assert json.load(file_in)["functions"]["test.allocate"]["calls"] == 1
+    assert sorted(os.listdir(tmp_path / "out")) == ["metrics.json", "metrics.prom"]
+
+
+def test_public_functions_are_instrumented():
+    transactions = pd.DataFrame(
+        {"Дата операции": ["01.10.2021 17:53:24", "07.10.2021 17:53:24"], "Сумма операции": [-152.0, -47.85]}
+    )
+    metrics.enable()
+    investment_bank("2021-10", transactions, 50)
+    functions = metrics.snapshot()["functions"]
+    assert functions["services.investment_bank"]["rows"] == 2
+    assert functions["services.rounding_savings"]["calls"] == 1
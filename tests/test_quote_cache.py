@@ -0,0 +1,134 @@
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.quote_cache import QuoteCache
+
+
+def test_quote_cache_fresh_hit(tmp_path):
+    cache = QuoteCache("test", ttl=60, cache_dir=str(tmp_path))
+    loader = Mock(return_value=90.0)
+    assert cache.get("USD", loader) == 90.0
+    assert cache.get("USD", loader) == 90.0
+    loader.assert_called_once()
+
+
+def test_quote_cache_disk_tier(tmp_path):
+    QuoteCache("test", ttl=60, cache_dir=str(tmp_path)).put("USD", 90.0)
+    loader = Mock(return_value=91.0)
+    assert QuoteCache("test", ttl=60, cache_dir=str(tmp_path)).get("USD", loader) == 90.0
+    loader.assert_not_called()
+
+
+def test_quote_cache_shared_disk_keeps_other_writers(tmp_path):
+    first = QuoteCache("test", ttl=60, cache_dir=str(tmp_path))
+    second = QuoteCache("test", ttl=60, cache_dir=str(tmp_path))
+    assert first.get("CNY", Mock(return_value=12.5)) == 12.5
+    second.put("EUR", 100.0)
+    first.put_many({"USD": 90.0, "GBP": 115.0})
+    loader = Mock()
+    result = QuoteCache("test", ttl=60, cache_dir=str(tmp_path)).get_many(["USD", "EUR", "CNY", "GBP"], loader)
+    assert result == {"USD": 90.0, "EUR": 100.0, "CNY": 12.5, "GBP": 115.0}
+    loader.assert_not_called()
+
+
+def test_quote_cache_corrupted_disk_entry(tmp_path):
+    cache = QuoteCache("test", ttl=60, cache_dir=str(tmp_path))
+    cache.put("USD", 90.0)
+    with open(cache.disk_path("USD"), "w", encoding="utf-8") as file_out:
+        file_out.write("{")
+    assert QuoteCache("test", ttl=60, cache_dir=str(tmp_path)).get("USD", Mock(return_value=91.0)) == 91.0
+
+
+def test_quote_cache_stale_while_revalidate(tmp_path):
+    cache = QuoteCache("test", ttl=60, cache_dir=str(tmp_path))
+    with patch("src.quote_cache.time.time", return_value=1000.0):
+        cache.put("USD", 90.0)
+    release = threading.Event()
+
+    def loader():
+        release.wait(2)
+        return 95.0
+
+    with patch("src.quote_cache.time.time", return_value=1100.0):
+        assert cache.get("USD", loader) == 90.0
+        assert cache.get("USD", loader) == 90.0
+    release.set()
+    deadline = time.monotonic() + 2
+    while cache.refreshing() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.get("USD", Mock()) == 95.0
+
+
+def test_quote_cache_too_stale_is_reloaded(tmp_path):
+    cache = QuoteCache("test", ttl=60, max_stale=60, cache_dir=str(tmp_path))
+    with patch("src.quote_cache.time.time", return_value=1000.0):
+        cache.put("USD", 90.0)
+    assert cache.get("USD", Mock(return_value=95.0)) == 95.0
+
+
+def test_quote_cache_lru_eviction():
+    cache = QuoteCache("test", ttl=60, max_entries=2, cache_dir=None)
+    for key in ("USD", "EUR", "CNY"):
+        cache.put(key, 1.0)
+    loader = Mock(return_value=2.0)
+    assert cache.get("USD", loader) == 2.0
+    assert cache.get("CNY", loader) == 1.0
+    loader.assert_called_once()
+
+
+def test_quote_cache_get_many(tmp_path):
+    cache = QuoteCache("test", ttl=60, cache_dir=str(tmp_path))
+    cache.put("USD", 90.0)
+    loader = Mock(return_value={"EUR": 100.0, "CNY": 12.5})
+    assert cache.get_many(["USD", "EUR", "CNY"], loader) == {"USD": 90.0, "EUR": 100.0, "CNY": 12.5}
+    loader.assert_called_once_with(["EUR", "CNY"])
+
+
+def test_quote_cache_concurrent_misses_share_one_request():
+    cache = QuoteCache("test", ttl=60, cache_dir=None)
+    release = threading.Event()
+    loader = Mock(side_effect=lambda: release.wait(2) and 90.0)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("USD", loader))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == [90.0] * 5
+    loader.assert_called_once()
+
+
+def test_quote_cache_get_many_waits_for_requests_in_flight():
+    cache = QuoteCache("test", ttl=60, cache_dir=None)
+    release = threading.Event()
+    calls = []
+
+    def loader(keys):
+        calls.append(keys)
+        release.wait(2)
+        return {key: 1.0 for key in keys}
+
+    first = threading.Thread(target=cache.get_many, args=(["USD", "EUR"], loader))
+    first.start()
+    time.sleep(0.1)
+    second = {}
+    thread = threading.Thread(target=lambda: second.update(cache.get_many(["EUR", "CNY"], loader)))
+    thread.start()
+    time.sleep(0.1)
+    release.set()
+    first.join()
+    thread.join()
+    assert second == {"EUR": 1.0, "CNY": 1.0}
+    assert calls == [["USD", "EUR"], ["CNY"]]
+
+
+def test_quote_cache_error_is_shared_and_not_cached():
+    cache = QuoteCache("test", ttl=60, cache_dir=None)
+    with pytest.raises(RuntimeError):
+        cache.get("USD", Mock(side_effect=RuntimeError("API недоступен")))
+    assert cache.get("USD", Mock(return_value=90.0)) == 90.0
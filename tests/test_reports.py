@@ -1,11 +1,22 @@
+import datetime
+import gzip
 import json
 import os
+from unittest.mock import patch
 
 import pandas as pd
 import pytest
 
 from config import ROOT_DIR
-from src.reports import filtered_by_category, filtered_by_date, log, spent_by_category
+from src.reports import (
+    category_spend_series,
+    filtered_by_category,
+    filtered_by_date,
+    log,
+    spent_by_category,
+    spent_cache,
+)
+from src.result_writer import _prune, flush_results, write_result
 
 test_data = [
     {"Дата операции": "01.10.2023 17:53:24", "Сумма операции": -152, "Категория": "Фастфуд"},
@@ -45,6 +56,23 @@ result_category_2 = [
 )
 def test_filtered_by_category(data, category, expected):
     assert filtered_by_category(category, data) == expected
+    assert filtered_by_category(category, pd.DataFrame(data)).to_dict(orient="records") == expected
+
+
+def test_filtered_by_dataframe_changed_in_place():
+    data = test_data_df.copy()
+    assert len(filtered_by_category("Каршеринг", data)) == 2
+    assert len(filtered_by_date(data, "2023-10-10")) == 5
+    data.loc[0, "Категория"] = "Каршеринг"
+    data.loc[1, "Дата операции"] = "01.01.2000 00:00:00"
+    assert filtered_by_category("Каршеринг", data).index.tolist() == [0, 1, 7]
+    assert 1 not in filtered_by_date(data, "2023-10-10").index
+
+
+def test_filtered_by_category_without_regex():
+    data = [{"Категория": "Фастфуд"}, {"Категория": "Фаст.фуд"}]
+    assert filtered_by_category("фаст.", data) == data
+    assert filtered_by_category("фаст.", data, regex=False) == [{"Категория": "Фаст.фуд"}]
 
 
 result_date_1 = [
@@ -82,6 +110,7 @@ result_date_2 = [
 )
 def test_filtered_by_date(data, date, expected):
     assert filtered_by_date(data, date) == expected
+    assert filtered_by_date(pd.DataFrame(data), date).to_dict(orient="records") == expected
 
 
 test_data_df = pd.DataFrame(
@@ -157,3 +186,146 @@ def test_func(data, expected):
         result_file = json.load(file)
     assert result.equals(expected)
     assert result_file == expected.to_dict(orient="records")
+
+
+@log("log_file.ndjson", fmt="ndjson", compress="gzip", rotate=True, keep=2, background=True)
+def func_streamed(data):
+    return pd.DataFrame(data)
+
+
+def test_log_streamed(tmp_path):
+    with patch("src.reports.ROOT_DIR", str(tmp_path)):
+        for _ in range(3):
+            result = func_streamed(test_data_for_log)
+    flush_results()
+    written = sorted(tmp_path.glob("log_file-*.ndjson.gz"))
+    assert len(written) == 2
+    with gzip.open(written[-1], "rt", encoding="utf-8") as file:
+        records = [json.loads(line) for line in file]
+    assert result.equals(test_data_for_log)
+    assert records == test_data_for_log.to_dict(orient="records")
+
+
+@pytest.mark.parametrize(
+    "ndjson, expected", [(None, ("log_file.json", "json", False)), ("1", ("log_file.ndjson", "ndjson", True))]
+)
+def test_spent_by_category_log_format(monkeypatch, ndjson, expected):
+    if ndjson is None:
+        monkeypatch.delenv("RESULTS_NDJSON", raising=False)
+    else:
+        monkeypatch.setenv("RESULTS_NDJSON", ndjson)
+    with patch("src.reports.store_result") as mock_store_result:
+        spent_by_category(test_data_df, "Каршеринг", "2023-10-30")
+    path, _, fmt, _, _, _, background = mock_store_result.call_args.args
+    assert (os.path.basename(path), fmt, background) == expected
+
+
+def test_prune_keeps_latest_written(tmp_path):
+    base = str(tmp_path / "log_file.ndjson")
+    names = ["log_file-20240706T104230-200-000001.ndjson", "log_file-20240706T104230-100-000002.ndjson"]
+    for mtime, name in enumerate(names, start=1):
+        (tmp_path / name).write_text("{}")
+        os.utime(tmp_path / name, ns=(mtime * 10**9, mtime * 10**9))
+    _prune(base, 1)
+    assert [path.name for path in tmp_path.iterdir()] == [names[1]]
+
+
+def test_write_result_ndjson_chunks(tmp_path):
+    path = write_result(str(tmp_path / "result.ndjson"), test_data_for_log, fmt="ndjson", chunk_size=5)
+    with open(path, "r", encoding="utf-8") as file:
+        lines = file.read().splitlines()
+    assert [json.loads(line) for line in lines] == test_data_for_log.to_dict(orient="records")
+
+
+def test_spent_by_category_cache():
+    data = test_data_df.copy()
+    with patch("src.reports.store_result") as mock_store_result:
+        first = spent_by_category(data, "Каршеринг", "2023-10-30")
+        second = spent_by_category(data.copy(), "Каршеринг", "2023-10-30")
+        other = spent_by_category(data, "Фастфуд", "2023-10-30")
+    assert second.equals(first) and second is not first
+    assert other.equals(spent_by_category(data, "Фастфуд", "2023-10-30"))
+    assert spent_cache.stats()["hits"] == 2
+    assert spent_cache.stats()["misses"] == 2
+    assert mock_store_result.call_count == 3
+
+
+def test_spent_by_category_cache_invalidation():
+    data = test_data_df.copy()
+    assert spent_by_category(data, "Каршеринг", "2023-10-30")["Сумма операции"].tolist() == [-47.85, -47.85]
+    changed = data.copy()
+    changed.loc[1, "Сумма операции"] = -50.0
+    assert spent_by_category(changed, "Каршеринг", "2023-10-30")["Сумма операции"].tolist() == [-50.0, -47.85]
+    assert spent_cache.stats()["misses"] == 2
+
+
+def test_spent_by_category_cache_changed_in_place():
+    data = test_data_df.copy()
+    first = spent_by_category(data, "Каршеринг", "2023-10-30")
+    data.loc[1, "Сумма операции"] = -999.0
+    data.loc[0, "Категория"] = "Каршеринг"
+    second = spent_by_category(data, "Каршеринг", "2023-10-30")
+    assert first["Сумма операции"].tolist() == [-47.85, -47.85]
+    assert second["Сумма операции"].tolist() == [-152.25, -999.0, -47.85]
+
+
+def test_spent_by_category_result_can_be_changed():
+    first = spent_by_category(test_data_df, "Каршеринг", "2023-10-30")
+    first.loc[0, "Сумма операции"] = 0.0
+    assert spent_by_category(test_data_df, "Каршеринг", "2023-10-30")["Сумма операции"].tolist() == [-47.85, -47.85]
+
+
+def test_spent_by_category_cache_date_normalization():
+    today = datetime.date.today().strftime("%Y-%m-%d")
+    spent_by_category(test_data_df, "Фастфуд")
+    spent_by_category(test_data_df, "Фастфуд", today)
+    assert spent_cache.stats()["hits"] == 1
+
+
+series_data = pd.DataFrame(
+    [
+        {"Дата операции": "07.10.2023 23:59:59", "Сумма операции": -0.1, "Категория": "Фастфуд"},
+        {"Дата операции": "07.10.2023 00:00:00", "Сумма операции": -0.2, "Категория": "Фастфуд"},
+        {"Дата операции": "15.07.2023 00:00:00", "Сумма операции": -10, "Категория": "Фастфуд"},
+        {"Дата операции": "14.07.2023 23:59:59", "Сумма операции": -1000, "Категория": "Фастфуд"},
+        {"Дата операции": "01.10.2023 12:00:00", "Сумма операции": -52, "Категория": "Супермаркеты"},
+        {"Дата операции": "02.10.2023 12:00:00", "Сумма операции": -99, "Категория": None},
+        {"Дата операции": "не дата", "Сумма операции": -99, "Категория": "Фастфуд"},
+    ]
+)
+
+
+@pytest.mark.parametrize("categories", [None, ["фаст", "Фастфуд|Супер", "Такси"]])
+def test_category_spend_series_matches_spent_by_category(categories):
+    result = category_spend_series(series_data, "2023-09-30", "2023-10-08", categories)
+    assert len(result) == 9 * (2 if categories is None else 3)
+    for date, category, total, count in result.itertuples(index=False):
+        expected = spent_by_category(series_data, category, date)
+        assert count == len(expected)
+        assert total == round(expected["Сумма операции"].sum(), 2)
+
+
+def test_category_spend_series_default_is_exact_category():
+    data = pd.DataFrame(
+        [
+            {"Дата операции": "01.10.2023 12:00:00", "Сумма операции": -10, "Категория": "Дом"},
+            {"Дата операции": "01.10.2023 12:00:00", "Сумма операции": -5, "Категория": "Дом и ремонт"},
+        ]
+    )
+    result = category_spend_series(data, "2023-10-01", "2023-10-01")
+    assert result[["category", "total"]].values.tolist() == [["Дом", -10.0], ["Дом и ремонт", -5.0]]
+    assert category_spend_series(data, "2023-10-01", "2023-10-01", ["Дом"])["total"].tolist() == [-15.0]
+
+
+@pytest.mark.parametrize(
+    "date, total, count",
+    [("2023-10-06", -1010.0, 2), ("2023-10-07", -10.3, 3), ("2023-10-08", -0.3, 2), ("2023-07-14", -1000.0, 1)],
+)
+def test_category_spend_series_window_bounds(date, total, count):
+    result = category_spend_series(series_data, date, date, ["Фастфуд"])
+    assert result.to_dict(orient="records") == [{"date": date, "category": "Фастфуд", "total": total, "count": count}]
+
+
+def test_category_spend_series_invalid_period():
+    with pytest.raises(ValueError):
+        category_spend_series(series_data, "2023-10-08", "2023-10-01")
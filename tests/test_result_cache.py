@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+from src.result_cache import ResultCache, result_size
+
+
+def frame(rows):
+    return pd.DataFrame({"Категория": ["Фастфуд"] * rows, "Сумма операции": [-1.0] * rows})
+
+
+def test_hit_and_miss():
+    cache = ResultCache()
+    calls = []
+    first = cache.get_or_compute("a", lambda: calls.append(1) or frame(2))
+    second = cache.get_or_compute("a", lambda: calls.append(1) or frame(2))
+    assert first.equals(second) and first is not second
+    assert calls == [1]
+    assert cache.stats() == {
+        "hits": 1,
+        "misses": 1,
+        "evictions": 0,
+        "entries": 1,
+        "bytes": result_size(first),
+        "max_bytes": cache.max_bytes,
+    }
+
+
+def test_lru_eviction():
+    size = result_size(frame(10))
+    cache = ResultCache(max_bytes=2 * size)
+    cache.get_or_compute("a", lambda: frame(10))
+    cache.get_or_compute("b", lambda: frame(10))
+    cache.get_or_compute("a", lambda: frame(10))
+    cache.get_or_compute("c", lambda: frame(10))
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"], stats["bytes"]) == (2, 1, 2 * size)
+    cache.get_or_compute("a", lambda: frame(10))
+    cache.get_or_compute("b", lambda: frame(10))
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 4
+
+
+@pytest.mark.parametrize("max_bytes, entries", [(0, 0), (10**9, 1)])
+def test_budget(max_bytes, entries):
+    cache = ResultCache(max_bytes=max_bytes)
+    cache.get_or_compute("a", lambda: frame(100))
+    assert cache.stats()["entries"] == entries
+
+
+def test_resize_and_clear():
+    cache = ResultCache()
+    for key in "abc":
+        cache.get_or_compute(key, lambda: frame(10))
+    cache.resize(result_size(frame(10)))
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["evictions"] == 2
+    cache.clear()
+    assert cache.stats()["entries"] == cache.stats()["hits"] == cache.stats()["misses"] == 0
+
+
+def test_errors_are_not_cached():
+    cache = ResultCache()
+    with pytest.raises(ValueError):
+        cache.get_or_compute("a", lambda: (_ for _ in ()).throw(ValueError("ошибка")))
+    assert cache.get_or_compute("a", lambda: frame(1)).shape == (1, 2)
+
+
+def test_callers_get_copies():
+    cache = ResultCache()
+    first = cache.get_or_compute("a", lambda: frame(2))
+    first.loc[0, "Сумма операции"] = -999.0
+    assert cache.get_or_compute("a", lambda: frame(2))["Сумма операции"].tolist() == [-1.0, -1.0]
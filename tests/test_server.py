@@ -0,0 +1,157 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+import pandas as pd
+import pytest
+
+from src.reports import spent_by_category
+from src.server import AnalyticsServer, StatementStore, refresh_quotes_periodically, serve
+from src.services import investment_bank
+
+transactions = pd.DataFrame(
+    {
+        "Дата операции": ["01.10.2021 17:53:24", "07.10.2021 17:53:24", "15.10.2021 17:53:24"],
+        "Номер карты": ["*7197", "*7197", "*4556"],
+        "Сумма операции": [-152.0, -47.85, -1038.5],
+        "Категория": ["Фастфуд", "Такси", "Фастфуд"],
+    }
+)
+
+
+@pytest.fixture
+def server(tmp_path):
+    transactions.to_excel(tmp_path / "test.xlsx", index=False)
+    server = AnalyticsServer(("127.0.0.1", 0), StatementStore(str(tmp_path), use_cache=False))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get(server, path, **query):
+    url = f"http://127.0.0.1:{server.server_address[1]}{path}?{urlencode({'file': 'test.xlsx', **query})}"
+    try:
+        with urlopen(url, timeout=10) as response:
+            return response.status, json.loads(response.read().decode("utf-8"))
+    except HTTPError as error:
+        return error.code, json.loads(error.read().decode("utf-8"))
+
+
+def test_invest(server):
+    status, body = get(server, "/invest", month="2021-10", limit="50")
+    assert status == 200
+    assert body == json.loads(investment_bank("2021-10", transactions, 50)) == 61.65
+
+
+def test_spent(server):
+    status, body = get(server, "/spent", category="фаст", date="2021-10-20")
+    assert status == 200
+    expected = spent_by_category(transactions, "фаст", "2021-10-20")
+    assert [row["Сумма операции"] for row in body] == expected["Сумма операции"].tolist() == [-152.0, -1038.5]
+
+
+@patch("src.server.views", return_value='{"greeting": "Доброе утро!"}')
+def test_views(mock_views, server):
+    assert get(server, "/views", date="2024-07-06 10:42:30") == (200, {"greeting": "Доброе утро!"})
+    date, transactions_df = mock_views.call_args.args
+    assert date == "2024-07-06 10:42:30"
+    assert transactions_df["Сумма операции"].tolist() == transactions["Сумма операции"].tolist()
+
+
+@pytest.mark.parametrize(
+    "path, query, expected_status",
+    [
+        ("/invest", {"month": "2021-13"}, 400),
+        ("/invest", {"month": "2021-10", "limit": "много"}, 400),
+        ("/spent", {}, 400),
+        ("/invest", {"month": "2021-10", "file": "../test.xlsx"}, 400),
+        ("/invest", {"month": "2021-10", "file": "missing.xlsx"}, 404),
+        ("/unknown", {}, 404),
+    ],
+)
+def test_errors(server, path, query, expected_status):
+    status, body = get(server, path, **query)
+    assert status == expected_status
+    assert body["error"]
+
+
+def test_statement_is_loaded_once(server):
+    def read(path, use_cache):
+        return pd.read_excel(path)
+
+    with patch("src.server.reading_excel", side_effect=read) as mock_reading_excel:
+        for _ in range(3):
+            assert get(server, "/invest", month="2021-10")[0] == 200
+    mock_reading_excel.assert_called_once()
+    status, body = get(server, "/health")
+    assert (status, body["status"], body["reloads"]) == (200, "ok", 1)
+    assert set(body["spent_cache"]) == {"hits", "misses", "evictions", "entries", "bytes", "max_bytes"}
+
+
+def test_reload_on_file_change(server, tmp_path):
+    assert get(server, "/invest", month="2021-10", limit="50")[1] == 61.65
+    changed = transactions.assign(**{"Сумма операции": [-151.0, -47.85, -1038.5]})
+    changed.to_excel(tmp_path / "test.xlsx", index=False)
+    stat = os.stat(tmp_path / "test.xlsx")
+    os.utime(tmp_path / "test.xlsx", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert get(server, "/invest", month="2021-10", limit="50")[1] == 62.65
+    assert server.store.reloads == 2
+
+
+def test_concurrent_requests(server):
+    queries = [{"month": "2021-10", "limit": str(limit)} for limit in (10, 50, 100, 1000)] * 10
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda query: get(server, "/invest", **query), queries))
+    assert all(status == 200 for status, _ in results)
+    assert [body for _, body in results[:4]] == [
+        json.loads(investment_bank("2021-10", transactions, limit)) for limit in (10, 50, 100, 1000)
+    ]
+    assert server.store.reloads == 1
+
+
+def test_metrics_endpoints(server):
+    url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+    with urlopen(url, timeout=10) as response:
+        assert response.headers["Content-Type"].startswith("text/plain")
+        assert "# TYPE bank_function_calls_total counter" in response.read().decode("utf-8")
+    status, body = get(server, "/metrics.json")
+    assert status == 200
+    assert set(body) == {"created", "enabled", "trace_memory", "functions"}
+
+
+@patch("src.server.views", return_value='{"greeting": "Доброе утро!"}')
+def test_views_for_user(mock_views, server):
+    assert get(server, "/views", date="2024-07-06 10:42:30", user="alice")[0] == 200
+    assert mock_views.call_args.kwargs == {"user": "alice"}
+
+
+def test_refresh_quotes_periodically():
+    stop = threading.Event()
+    with patch("src.server.refresh_quotes", side_effect=[RuntimeError("API недоступен"), {}, {}]) as mock_refresh:
+        with patch("src.server.settings_registry.users", return_value=["alice"]):
+            thread = threading.Thread(target=refresh_quotes_periodically, args=(stop, 0.05))
+            thread.start()
+            time.sleep(0.12)
+            stop.set()
+            thread.join(1)
+    assert not thread.is_alive()
+    assert mock_refresh.call_count >= 2
+    assert mock_refresh.call_args.args == ([None, "alice"],)
+
+
+@pytest.mark.parametrize("background_refresh, threads", [(False, 0), (True, 1)])
+def test_serve_refreshes_quotes_only_on_request(background_refresh, threads):
+    with patch("src.server.AnalyticsServer") as mock_server, patch("src.server.threading.Thread") as mock_thread:
+        mock_server.return_value.server_address = ("127.0.0.1", 8000)
+        mock_server.return_value.serve_forever.side_effect = KeyboardInterrupt
+        serve(preload=None, background_refresh=background_refresh)
+    assert mock_thread.call_count == threads
+    mock_server.return_value.server_close.assert_called_once()
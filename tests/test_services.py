@@ -1,7 +1,9 @@
 import pytest
 import json
 
-from src.services import date_sorting, investment_bank, limit_payment
+import pandas as pd
+
+from src.services import date_sorting, investment_bank, investment_bank_batch, limit_payment
 
 
 @pytest.mark.parametrize("limit, summa, expected", [(100, -97, -100), (50, 173.4, 200), (10, 236.75, 240)])
@@ -64,3 +66,36 @@ def test_investment_bank(month, transaction, limit, expected):
     result = investment_bank(month, transaction, limit)
     result_to_assert = json.loads(result)
     assert result_to_assert == expected
+
+
+def test_date_sorting_dataframe():
+    result = date_sorting("2022-10", pd.DataFrame(data_for_test))
+    assert result.to_dict(orient="records") == expected_for_test_2
+
+
+def test_date_sorting_dataframe_changed_in_place():
+    transactions_df = pd.DataFrame(data_for_test)
+    assert len(date_sorting("2022-10", transactions_df)) == 4
+    transactions_df.loc[1, "Дата операции"] = "01.01.2000 00:00:00"
+    assert date_sorting("2022-10", transactions_df).to_dict(orient="records") == expected_for_test_2[1:]
+
+
+@pytest.mark.parametrize("limit, expected", [(100, 96.0), (10, 16.0), (50, 96.0)])
+def test_investment_bank_dataframe(limit, expected):
+    assert json.loads(investment_bank("2021-10", pd.DataFrame(data_for_test_1), limit)) == expected
+
+
+def test_investment_bank_batch():
+    months = ["2021-10", "2022-10", "2023-10"]
+    limits = [10, 50, 100]
+    result = investment_bank_batch(data_for_test_1, limits, months)
+    assert list(result.index) == months
+    assert list(result.columns) == limits
+    for month in months:
+        for limit in limits:
+            assert result.loc[month, limit] == json.loads(investment_bank(month, data_for_test_1, limit))
+
+
+def test_investment_bank_batch_all_months():
+    result = investment_bank_batch(pd.DataFrame(data_for_test_1), [100])
+    assert result[100].to_dict() == {"2021-10": 96.0, "2022-10": 178.5}
@@ -0,0 +1,72 @@
+import json
+import os
+
+import pytest
+
+from src.settings_registry import SettingsRegistry
+
+
+def write_profile(directory, user, currencies, stocks):
+    path = directory / f"{user}.json"
+    path.write_text(json.dumps({"user_currencies": currencies, "user_stocks": stocks}), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def registry(tmp_path):
+    write_profile(tmp_path, "alice", ["USD", "EUR"], ["AAPL", "MSFT"])
+    write_profile(tmp_path, "bob", ["EUR", "CNY"], ["MSFT", "TSLA"])
+    default_file = write_profile(tmp_path, "default", ["USD"], ["AAPL"])
+    return SettingsRegistry(str(tmp_path), str(default_file))
+
+
+def test_get_is_cached(registry):
+    assert registry.get("alice") == (["USD", "EUR"], ["AAPL", "MSFT"])
+    assert registry.get("alice") == (["USD", "EUR"], ["AAPL", "MSFT"])
+    assert registry.get() == (["USD"], ["AAPL"])
+    assert registry.loads == 2
+
+
+def test_reload_on_file_change(registry, tmp_path):
+    assert registry.get("bob") == (["EUR", "CNY"], ["MSFT", "TSLA"])
+    path = write_profile(tmp_path, "bob", ["GBP"], ["TSLA"])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert registry.get("bob") == (["GBP"], ["TSLA"])
+    assert registry.loads == 2
+
+
+@pytest.mark.parametrize("user", ["", "../alice", ".hidden", "carol"])
+def test_invalid_user(registry, user):
+    with pytest.raises(ValueError):
+        registry.get(user)
+
+
+def test_invalid_profile(registry, tmp_path):
+    (tmp_path / "broken.json").write_text("{", encoding="utf-8")
+    with pytest.raises(ValueError):
+        registry.get("broken")
+
+
+@pytest.mark.parametrize("currencies", ["USD", ["USD", 1], {"USD": 1}])
+def test_profile_values_must_be_lists_of_strings(registry, tmp_path, currencies):
+    write_profile(tmp_path, "carol", currencies, ["AAPL"])
+    with pytest.raises(ValueError):
+        registry.get("carol")
+
+
+def test_callers_get_own_lists(registry):
+    currencies, stocks = registry.get("alice")
+    currencies.append("GBP")
+    stocks.clear()
+    assert registry.get("alice") == (["USD", "EUR"], ["AAPL", "MSFT"])
+
+
+def test_users_and_symbols(registry, tmp_path):
+    (tmp_path / "broken.json").write_text("{", encoding="utf-8")
+    assert registry.users() == ["alice", "bob", "broken", "default"]
+    assert registry.symbols(["alice", "bob", "broken", None]) == (["USD", "EUR", "CNY"], ["AAPL", "MSFT", "TSLA"])
+
+
+def test_missing_directory(tmp_path):
+    assert SettingsRegistry(str(tmp_path / "missing")).users() == []
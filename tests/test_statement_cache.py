@@ -0,0 +1,83 @@
+import os
+import shutil
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import DATA_DIR
+from src.statement_cache import cache_path, load_statement, prune_stale, read_statement
+
+statement_df = pd.DataFrame(
+    [
+        {"Дата операции": "28.03.2018 09:24:15", "Номер карты": "*7197", "Сумма операции": -150.0, "Бонусы": 3},
+        {"Дата операции": "28.03.2018 08:23:56", "Номер карты": np.nan, "Сумма операции": -197.7, "Бонусы": 3},
+    ]
+)
+
+
+@pytest.fixture
+def statement_file(tmp_path):
+    file_path = tmp_path / "statement.xls"
+    file_path.write_bytes(b"first version")
+    return str(file_path)
+
+
+@patch("src.statement_cache.pd.read_excel")
+def test_read_statement_uses_cache(mock_read_excel, statement_file, tmp_path):
+    mock_read_excel.return_value = statement_df
+    cache_dir = str(tmp_path / "cache")
+    first = read_statement(statement_file, cache_dir)
+    second = read_statement(statement_file, cache_dir)
+    assert mock_read_excel.call_count == 1
+    pd.testing.assert_frame_equal(first, statement_df)
+    pd.testing.assert_frame_equal(second, statement_df)
+
+
+@patch("src.statement_cache.pd.read_excel")
+def test_read_statement_rebuilds_stale_cache(mock_read_excel, statement_file, tmp_path):
+    mock_read_excel.return_value = statement_df
+    cache_dir = str(tmp_path / "cache")
+    read_statement(statement_file, cache_dir)
+    with open(statement_file, "wb") as file_out:
+        file_out.write(b"second version!")
+    assert load_statement(statement_file, cache_dir) is None
+    read_statement(statement_file, cache_dir)
+    assert mock_read_excel.call_count == 2
+
+
+@patch("src.statement_cache.pd.read_excel")
+def test_read_statement_prunes_missing_sources(mock_read_excel, statement_file, tmp_path):
+    mock_read_excel.return_value = statement_df
+    cache_dir = str(tmp_path / "cache")
+    removed_file = str(tmp_path / "removed.xls")
+    shutil.copy(statement_file, removed_file)
+    read_statement(removed_file, cache_dir)
+    os.remove(removed_file)
+    read_statement(statement_file, cache_dir)
+    assert os.listdir(cache_dir) == [os.path.basename(cache_path(statement_file, cache_dir))]
+    assert prune_stale(cache_dir) == 0
+
+
+@patch("src.statement_cache.pd.read_excel")
+def test_read_statement_touched_file(mock_read_excel, statement_file, tmp_path):
+    mock_read_excel.return_value = statement_df
+    cache_dir = str(tmp_path / "cache")
+    read_statement(statement_file, cache_dir)
+    stat = os.stat(statement_file)
+    os.utime(statement_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    pd.testing.assert_frame_equal(load_statement(statement_file, cache_dir), statement_df)
+    assert mock_read_excel.call_count == 1
+
+
+def test_read_statement_real_file(tmp_path):
+    source = os.path.join(DATA_DIR, "operations.xls")
+    file_path = str(tmp_path / "operations.xls")
+    shutil.copyfile(source, file_path)
+    cache_dir = str(tmp_path / "cache")
+    cold = read_statement(file_path, cache_dir)
+    assert os.path.isdir(cache_path(file_path, cache_dir))
+    warm = read_statement(file_path, cache_dir)
+    pd.testing.assert_frame_equal(cold, pd.read_excel(source))
+    pd.testing.assert_frame_equal(warm, cold)
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import DATA_DIR
+from src.reports import spent_by_category
+from src.services import investment_bank
+from src.streaming import (
+    card_info_stream,
+    investment_bank_stream,
+    iter_statement_chunks,
+    spent_by_category_stream,
+    top_transactions_stream,
+)
+from src.utils import card_info, top_transactions
+
+statement_df = pd.DataFrame(
+    {
+        "Дата операции": [
+            "01.10.2021 17:53:24",
+            "07.10.2021 17:53:24",
+            "15.10.2021 17:53:24",
+            "07.11.2021 17:53:24",
+            "17.10.2021 17:53:24",
+            "27.10.2021 17:53:24",
+            "30.10.2021 17:53:24",
+        ],
+        "Номер карты": ["*7197", "*5091", "*7197", "*4556", "*5091", "*7197", "*7197"],
+        "Сумма операции": [-152.0, -47.85, -10385.0, 101.0, -52.0, -52.0, 887.65],
+        "Категория": ["Фастфуд", np.nan, "Фастфуд", "Переводы", "Каршеринг", "Фастфуд", "Фастфуд"],
+    }
+)
+
+
+@pytest.fixture(params=["csv", "xlsx"])
+def statement_file(request, tmp_path):
+    file_path = str(tmp_path / f"statement.{request.param}")
+    if request.param == "csv":
+        statement_df.to_csv(file_path, index=False)
+    else:
+        statement_df.to_excel(file_path, index=False)
+    return file_path
+
+
+def test_iter_statement_chunks(statement_file):
+    chunks = list(iter_statement_chunks(statement_file, chunk_size=3))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    pd.testing.assert_frame_equal(pd.concat(chunks).reset_index(drop=True), statement_df)
+
+
+def test_iter_statement_chunks_xls():
+    chunks = list(iter_statement_chunks("operations.xls", chunk_size=1000))
+    assert max(len(chunk) for chunk in chunks) == 1000
+    expected = pd.read_excel(os.path.join(DATA_DIR, "operations.xls"))
+    pd.testing.assert_frame_equal(pd.concat(chunks).reset_index(drop=True), expected)
+
+
+def test_iter_statement_chunks_wrong_format():
+    with pytest.raises(ValueError):
+        list(iter_statement_chunks("statement.txt"))
+
+
+def test_streaming_matches_in_memory(statement_file):
+    def chunks():
+        return iter_statement_chunks(statement_file, chunk_size=2)
+
+    assert card_info_stream(chunks()) == card_info(statement_df)
+    for limit in (10, 50, 100):
+        assert investment_bank_stream("2021-10", chunks(), limit) == investment_bank("2021-10", statement_df, limit)
+    for n in (1, 3, 10):
+        for largest in (True, False):
+            pd.testing.assert_frame_equal(
+                pd.DataFrame(top_transactions_stream(chunks(), n, largest=largest)),
+                pd.DataFrame(top_transactions(statement_df, n, largest=largest)),
+            )
+    expected = spent_by_category(statement_df, "фаст", "2021-10-30")
+    pd.testing.assert_frame_equal(spent_by_category_stream(chunks(), "фаст", "2021-10-30"), expected)
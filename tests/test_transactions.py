@@ -0,0 +1,95 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.generator import generate_statement
+from src.reports import filtered_by_category, filtered_by_date, spent_by_category
+from src.services import date_sorting, investment_bank, investment_bank_batch
+from src.transactions import TransactionRecord, Transactions, compact_frame
+from src.utils import card_info, top_five_transactions, top_transactions
+
+
+@pytest.fixture(scope="module")
+def statement():
+    statement = generate_statement(3000, seed=3)
+    statement.loc[5, "Дата операции"] = "не дата"
+    return statement
+
+
+def as_json(records):
+    return json.dumps(records, ensure_ascii=False, default=str)
+
+
+def test_compact_frame_keeps_values(statement):
+    compact = compact_frame(statement)
+    assert isinstance(compact["Категория"].dtype, pd.CategoricalDtype)
+    assert compact["Сумма операции"].dtype == float
+    assert as_json(compact.to_dict(orient="records")) == as_json(statement.to_dict(orient="records"))
+
+
+def test_compact_frame_uses_less_memory(statement):
+    assert Transactions.from_frame(statement).memory_usage() < statement.memory_usage(deep=True).sum() / 2
+
+
+def test_functions_accept_transactions(statement):
+    transactions = Transactions.from_frame(statement)
+    assert card_info(transactions) == card_info(statement)
+    assert as_json(top_five_transactions(transactions)) == as_json(top_five_transactions(statement))
+    assert as_json(top_transactions(transactions, 7, by_abs=False, largest=False)) == as_json(
+        top_transactions(statement, 7, by_abs=False, largest=False)
+    )
+    for month in ["2019-03", "2021-12"]:
+        assert investment_bank(month, transactions, 50) == investment_bank(month, statement, 50)
+        assert as_json(date_sorting(month, transactions).records()) == as_json(
+            date_sorting(month, statement).to_dict(orient="records")
+        )
+    pd.testing.assert_frame_equal(
+        investment_bank_batch(transactions, [10, 100]), investment_bank_batch(statement, [10, 100])
+    )
+    assert as_json(filtered_by_category("фаст", transactions).records()) == as_json(
+        filtered_by_category("фаст", statement).to_dict(orient="records")
+    )
+    assert as_json(filtered_by_date(transactions, "2021-06-30").records()) == as_json(
+        filtered_by_date(statement, "2021-06-30").to_dict(orient="records")
+    )
+    assert as_json(spent_by_category(transactions, "Супермаркеты", "2021-12-31").to_dict(orient="records")) == as_json(
+        spent_by_category(statement, "Супермаркеты", "2021-12-31").to_dict(orient="records")
+    )
+
+
+def test_record_view(statement):
+    transactions = Transactions.from_frame(statement)
+    records = statement.to_dict(orient="records")
+    assert len(transactions) == len(records)
+    record = transactions[1]
+    assert isinstance(record, TransactionRecord)
+    assert as_json(dict(record)) == as_json(records[1])
+    assert transactions[-1]["Описание"] == records[-1]["Описание"]
+    assert isinstance(transactions[0]["Бонусы (включая кэшбэк)"], int)
+    missing_card = int(np.flatnonzero(statement["Номер карты"].isna())[0])
+    assert transactions[missing_card]["Номер карты"] != transactions[missing_card]["Номер карты"]
+    assert as_json(list(map(dict, transactions[10:13]))) == as_json(records[10:13])
+    assert as_json(transactions.records()) == as_json(records)
+    with pytest.raises(IndexError):
+        transactions[len(records)]
+
+
+def test_record_view_works_with_list_functions(statement):
+    head = statement.iloc[:200]
+    records = list(Transactions.from_frame(head))
+    expected = filtered_by_date(head, "2021-12-31").to_dict(orient="records")
+    assert as_json(list(map(dict, filtered_by_date(records, "2021-12-31")))) == as_json(expected)
+    assert as_json(list(map(dict, top_transactions(iter(records), 3)))) == as_json(top_transactions(head, 3))
+
+
+def test_from_records():
+    records = [
+        {"Дата операции": "01.10.2023 17:53:24", "Сумма операции": -152.0, "Категория": "Фастфуд"},
+        {"Дата операции": "07.10.2023 17:53:24", "Сумма операции": -47.85, "Категория": None},
+    ]
+    transactions = Transactions.from_records(records)
+    assert transactions[0]["Категория"] == "Фастфуд"
+    assert transactions[1]["Сумма операции"] == -47.85
+    assert len(filtered_by_category("фаст", transactions)) == 1
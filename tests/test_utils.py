@@ -1,9 +1,13 @@
 import os
+import time
 from unittest.mock import patch
 
+import numpy as np
 import pandas as pd
 import pytest
 
+import src.indexes
+from src.indexes import dataset_fingerprint, is_frozen, month_index, time_index
 from src.utils import (
     card_info,
     currency_rates,
@@ -11,6 +15,7 @@ from src.utils import (
     json_loader,
     reading_excel,
     top_five_transactions,
+    top_transactions,
     stock_rates,
 )
 
@@ -66,6 +71,20 @@ def test_reading_excel(mock_read_excel):
     )
 
 
+@patch("pandas.read_excel")
+def test_reading_excel_shares_indexes(mock_read_excel):
+    mock_read_excel.return_value = pd.DataFrame(
+        {"Дата операции": ["01.10.2021 17:53:24", "02.10.2021 10:00:00"], "Сумма операции": [-1.0, -2.0]}
+    )
+    result = reading_excel("test_file.xls", use_cache=False)
+    assert is_frozen(result)
+    assert month_index(result) is month_index(result)
+    assert time_index(result) is time_index(result)
+    with patch.object(src.indexes, "_fingerprint", wraps=src.indexes._fingerprint) as mock_fingerprint:
+        assert dataset_fingerprint(result) == dataset_fingerprint(result)
+    assert mock_fingerprint.call_count == 1
+
+
 @pytest.mark.parametrize(
     "transactions, expected",
     [
@@ -112,6 +131,20 @@ def test_reading_excel(mock_read_excel):
 )
 def test_card_info(transactions, expected):
     assert card_info(transactions) == expected
+    assert card_info(pd.DataFrame(transactions)) == expected
+
+
+def test_card_info_several_cards():
+    transactions_df = pd.DataFrame(
+        {
+            "Номер карты": ["*7197", "*5091", "*7197", None, "*5091"],
+            "Сумма операции": [-100.5, -20.0, -49.5, -1000.0, 10.0],
+        }
+    )
+    assert card_info(transactions_df) == [
+        {"last_digits": "7197", "total_spent": -150.0, "cashback": -1.5},
+        {"last_digits": "5091", "total_spent": -10.0, "cashback": -0.1},
+    ]
 
 
 @pytest.mark.parametrize(
@@ -140,6 +173,46 @@ def test_card_info(transactions, expected):
 )
 def test_top_five_transactions(transactions, expected):
     assert top_five_transactions(transactions) == expected
+    assert top_five_transactions(pd.DataFrame(transactions)) == expected
+    assert top_five_transactions(iter(transactions)) == expected
+
+
+@pytest.mark.parametrize("n", [1, 3, 7, 40])
+@pytest.mark.parametrize("by_abs", [True, False])
+@pytest.mark.parametrize("largest", [True, False])
+def test_top_transactions_matches_stable_sort(n, by_abs, largest):
+    amounts = [float(value) for value in np.random.default_rng(n).integers(-6, 7, size=30)]
+    transactions = [{"Сумма операции": amount, "id": position} for position, amount in enumerate(amounts)]
+    ordered = sorted(transactions, key=lambda x: abs(x["Сумма операции"]) if by_abs else x["Сумма операции"])
+    expected = ordered[-n:] if largest else ordered[:n]
+    assert top_transactions(transactions, n, by_abs=by_abs, largest=largest) == expected
+    assert top_transactions(pd.DataFrame(transactions), n, by_abs=by_abs, largest=largest) == expected
+
+
+def test_top_transactions_skips_nan():
+    transactions = [{"Сумма операции": float("nan")}, {"Сумма операции": -3.0}, {"Сумма операции": 2.0}]
+    assert top_transactions(transactions, 2) == [{"Сумма операции": 2.0}, {"Сумма операции": -3.0}]
+    assert top_transactions(pd.DataFrame(transactions), 2) == [{"Сумма операции": 2.0}, {"Сумма операции": -3.0}]
+
+
+def test_top_transactions_skips_missing_in_stream():
+    amounts = [None, -3.0, pd.NA, 2]
+    transactions = [{"Сумма операции": amount} for amount in amounts]
+    expected = [{"Сумма операции": 2}, {"Сумма операции": -3.0}]
+    assert top_transactions(iter(transactions), 3) == expected
+    assert top_transactions(transactions, 3, by_abs=False, largest=False) == [
+        {"Сумма операции": -3.0},
+        {"Сумма операции": 2},
+    ]
+
+
+@pytest.mark.parametrize("largest, expected", [(True, [-3.0, "-7.5"]), (False, [2, -3.0])])
+def test_top_transactions_skips_not_numbers_in_both_paths(largest, expected):
+    amounts = [None, -3.0, pd.NA, "abc", 2, "-7.5"]
+    transactions = [{"Сумма операции": amount} for amount in amounts]
+    stream = top_transactions(iter(transactions), 2, largest=largest)
+    assert stream == top_transactions(pd.DataFrame(transactions), 2, largest=largest)
+    assert [transaction["Сумма операции"] for transaction in stream] == expected
 
 
 users_settings = {"user_currencies": "USD"}
@@ -160,7 +233,7 @@ def test_json_loader_with_wrong_file_name():
 request_to_return_currency = {"query": {"amount": 1, "from": "USD", "to": "RUB"}, "result": 90.00, "success": True}
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 @patch.dict(os.environ, {"API_KEY_CURRENCY": "my_api_key"})
 def test_currency_rates(mock_request):
     mock_request.return_value.json.return_value = request_to_return_currency
@@ -182,7 +255,7 @@ def test_currency_rates_with_wrong_data():
 request_to_return_stock = {"Global Quote": {"01. symbol": "IBM", "05. price": 10.00}}
 
 
-@patch("requests.get")
+@patch("requests.Session.get")
 @patch.dict(os.environ, {"API_KEY_STOCK": "my_api_key"})
 def test_stock_rates(mock_request):
     mock_request.return_value.json.return_value = request_to_return_stock
@@ -198,3 +271,88 @@ def test_stock_rates_with_wrong_data():
     with pytest.raises(Exception) as exc_info:
         stock_rates("ABC")
         assert str(exc_info.value) == "При работе функции произошла ошибка!"
+
+
+@patch.dict(os.environ, {"API_KEY_CURRENCY": "my_api_key", "API_KEY_STOCK": "my_api_key"})
+def test_rates_run_concurrently(quote_server):
+    quote_server.latency = 0.3
+    with patch("src.utils.CURRENCY_API_URL", quote_server.url), patch("src.utils.STOCK_API_URL", quote_server.url):
+        start = time.perf_counter()
+        currencies = currency_rates(["USD", "EUR", "CNY", "GBP", "JPY"])
+        stocks = stock_rates(["AAPL", "AMZN", "GOOGL", "MSFT", "TSLA"])
+        elapsed = time.perf_counter() - start
+    assert currencies[0] == {"currency": "USD", "rate": 90.0}
+    assert [item["currency"] for item in currencies] == ["USD", "EUR", "CNY", "GBP", "JPY"]
+    assert stocks[-1] == {"stock": "TSLA", "price": 250.0}
+    assert len(quote_server.requests) == 10
+    assert elapsed < 2 * 0.3 + 0.4
+
+
+@patch.dict(os.environ, {"API_KEY_STOCK": "my_api_key"})
+def test_stock_rates_overall_deadline(quote_server):
+    quote_server.latency = 1.0
+    with patch("src.utils.STOCK_API_URL", quote_server.url):
+        start = time.perf_counter()
+        with pytest.raises(Exception):
+            stock_rates(["AAPL", "AMZN"], deadline=0.2)
+        assert time.perf_counter() - start < 0.8
+
+
+@patch.dict(os.environ, {"API_KEY_STOCK": "my_api_key"})
+def test_stock_rates_request_timeout(quote_server):
+    quote_server.latency = 1.0
+    with patch("src.utils.STOCK_API_URL", quote_server.url):
+        with pytest.raises(Exception):
+            stock_rates(["AAPL"], timeout=0.2)
+
+
+@patch.dict(os.environ, {"API_KEY_CURRENCY": "my_api_key"})
+def test_currency_rates_cached(quote_server):
+    with patch("src.utils.CURRENCY_API_URL", quote_server.url):
+        first = currency_rates(["USD", "EUR"])
+        second = currency_rates(["USD", "EUR"])
+    assert first == second == [{"currency": "USD", "rate": 90.0}, {"currency": "EUR", "rate": 100.0}]
+    assert len(quote_server.requests) == 2
+
+
+@patch.dict(os.environ, {"API_KEY_CURRENCY": "my_api_key"})
+def test_currency_rates_batch(quote_server):
+    with patch("src.utils.CURRENCY_API_URL", quote_server.url):
+        result = currency_rates(["USD", "EUR", "CNY", "GBP", "JPY"], batch=True)
+    assert result == [
+        {"currency": "USD", "rate": 90.0},
+        {"currency": "EUR", "rate": 100.0},
+        {"currency": "CNY", "rate": 12.5},
+        {"currency": "GBP", "rate": 115.0},
+        {"currency": "JPY", "rate": 0.6},
+    ]
+    assert quote_server.requests == ["/latest?base=RUB&symbols=USD,EUR,CNY,GBP,JPY"]
+
+
+@patch.dict(os.environ, {"API_KEY_CURRENCY": "my_api_key"})
+def test_currency_rates_batch_fallback(quote_server):
+    quote_server.fail_latest = True
+    with patch("src.utils.CURRENCY_API_URL", quote_server.url):
+        result = currency_rates(["USD", "EUR"], batch=True)
+    assert result == [{"currency": "USD", "rate": 90.0}, {"currency": "EUR", "rate": 100.0}]
+    assert len(quote_server.requests) == 3
+    assert quote_server.requests[0].startswith("/latest")
+
+
+@patch.dict(os.environ, {"API_KEY_CURRENCY": "my_api_key"})
+def test_currency_rates_batch_overall_deadline(quote_server):
+    quote_server.latency = 1.0
+    with patch("src.utils.CURRENCY_API_URL", quote_server.url):
+        start = time.perf_counter()
+        with pytest.raises(Exception):
+            currency_rates(["USD", "EUR"], batch=True, deadline=0.2)
+        assert time.perf_counter() - start < 0.8
+    assert quote_server.requests == ["/latest?base=RUB&symbols=USD,EUR"]
+
+
+@patch.dict(os.environ, {"API_KEY_CURRENCY": "my_api_key"})
+def test_currency_rates_batch_only_missing(quote_server):
+    with patch("src.utils.CURRENCY_API_URL", quote_server.url):
+        currency_rates(["USD"], batch=True)
+        currency_rates(["USD", "EUR"], batch=True)
+    assert quote_server.requests == ["/latest?base=RUB&symbols=USD", "/latest?base=RUB&symbols=EUR"]
@@ -2,8 +2,11 @@ from unittest.mock import patch
 
 import pandas as pd
 import pytest
-from src.views import views
+from src.settings_registry import settings_registry
+from src.views import refresh_quotes, views
 import json
+import os
+import time
 
 
 expected = {
@@ -78,3 +81,108 @@ def test_views_with_wrong_date():
     with pytest.raises(Exception) as exc_info:
         views("ABC", transactions)
         assert str(exc_info.value) == "При работе функции произошла ошибка!"
+
+
+def slow_section(delay, value):
+    def section(*args, **kwargs):
+        time.sleep(delay)
+        return value
+
+    return section
+
+
+@patch("src.views.stock_rates")
+@patch("src.views.currency_rates")
+@patch("src.views.json_loader")
+@patch("src.views.top_five_transactions")
+@patch("src.views.card_info")
+def test_views_partial_on_timeout(mock_card_info, mock_top, mock_json_loader, mock_currency, mock_stock):
+    mock_card_info.return_value = {"cards_info": 1234}
+    mock_top.return_value = {"transactions": 1234}
+    mock_json_loader.return_value = [["USD"], ["AAPL"]]
+    mock_currency.side_effect = slow_section(1.0, {"USD": 90})
+    mock_stock.side_effect = Exception("API недоступен")
+    result = json.loads(views("2024-07-06 10:42:30", transactions, deadlines={"currency_rates": 0.2}))
+    assert result["cards"] == {"cards_info": 1234}
+    assert result["currency_rates"] is None
+    assert result["stock_prices"] is None
+    assert result["sections_status"] == {
+        "cards": "ok",
+        "top_transactions": "ok",
+        "currency_rates": "timeout",
+        "stock_prices": "error",
+    }
+
+
+@patch("src.views.stock_rates")
+@patch("src.views.currency_rates")
+@patch("src.views.json_loader")
+@patch("src.views.top_five_transactions")
+@patch("src.views.card_info")
+def test_views_wall_time_bounded_by_slowest_section(
+    mock_card_info, mock_top, mock_json_loader, mock_currency, mock_stock
+):
+    mock_card_info.side_effect = slow_section(0.3, {"cards_info": 1234})
+    mock_top.side_effect = slow_section(0.3, {"transactions": 1234})
+    mock_json_loader.return_value = ["USD", "EUR"]
+    mock_currency.side_effect = slow_section(0.3, {"USD": 90})
+    mock_stock.side_effect = slow_section(0.3, {"APPL": 1500})
+    started = time.monotonic()
+    result = views("2024-07-06 10:42:30", transactions)
+    assert time.monotonic() - started < 0.9
+    assert result == expected_json
+
+
+@patch("src.views.stock_rates")
+@patch("src.views.currency_rates")
+@patch("src.views.json_loader")
+@patch("src.views.top_five_transactions")
+@patch("src.views.card_info")
+def test_views_nan_is_valid_json(mock_card_info, mock_top, mock_json_loader, mock_currency, mock_stock):
+    mock_card_info.return_value = []
+    mock_top.return_value = [{"Сумма операции": -150.0, "Кэшбэк": float("nan")}]
+    mock_json_loader.return_value = [["USD"], ["AAPL"]]
+    mock_currency.return_value = []
+    mock_stock.return_value = []
+
+    def reject_constant(constant):
+        raise ValueError(constant)
+
+    result = json.loads(views("2024-07-06 10:42:30", transactions), parse_constant=reject_constant)
+    assert result["top_transactions"] == [{"Сумма операции": -150.0, "Кэшбэк": None}]
+
+
+@pytest.fixture
+def profiles(tmp_path):
+    for user, currencies, stocks in [
+        ("alice", ["USD", "EUR"], ["AAPL", "MSFT"]),
+        ("bob", ["EUR", "CNY"], ["MSFT", "TSLA"]),
+        ("carol", ["USD"], ["AAPL", "TSLA"]),
+    ]:
+        settings = {"user_currencies": currencies, "user_stocks": stocks}
+        (tmp_path / f"{user}.json").write_text(json.dumps(settings), encoding="utf-8")
+    with patch.object(settings_registry, "settings_dir", str(tmp_path)):
+        yield settings_registry
+
+
+@patch.dict(os.environ, {"API_KEY_CURRENCY": "my_api_key", "API_KEY_STOCK": "my_api_key"})
+def test_refresh_quotes_fetches_each_symbol_once(quote_server, profiles):
+    with patch("src.utils.CURRENCY_API_URL", quote_server.url), patch("src.utils.STOCK_API_URL", quote_server.url):
+        result = refresh_quotes(["alice", "bob", "carol", "bob"])
+        assert len(quote_server.requests) == 1 + 3
+        assert result["bob"] == {
+            "currency_rates": [{"currency": "EUR", "rate": 100.0}, {"currency": "CNY", "rate": 12.5}],
+            "stock_prices": [{"stock": "MSFT", "price": 420.0}, {"stock": "TSLA", "price": 250.0}],
+        }
+        for user in ["alice", "bob", "carol"] * 10:
+            body = json.loads(views("2024-07-06 10:42:30", transactions, user=user))
+            assert body["currency_rates"] == result[user]["currency_rates"]
+            assert body["stock_prices"] == result[user]["stock_prices"]
+    assert len(quote_server.requests) == 4
+    assert profiles.loads == 3
+
+
+def test_views_unknown_user(profiles):
+    result = json.loads(views("2024-07-06 10:42:30", transactions, user="dave"))
+    assert result["currency_rates"] is None
+    assert result["sections_status"]["currency_rates"] == "error"